@@ -0,0 +1,86 @@
+"""
+Compare the throughput of `ConcurrentMemoryStorage` with a `MemoryStorage`
+behind one global lock, from 1 to N threads.
+
+Every thread runs a mix of reads and inserts on its own table, like request
+handlers of a threaded server working on different collections.
+
+    python -m benchmarks.concurrent_memory --threads 8 --operations 2000
+
+Threads only run in parallel on a free-threaded interpreter, with the GIL
+both storages stay around one core's worth and the benchmark shows the
+locking overhead.
+"""
+
+import argparse
+import threading
+import time
+
+from tinydb import TinyDB, Query
+
+from tinydbstorage.storage import ConcurrentMemoryStorage, LockedTable, MemoryStorage
+
+
+class ConcurrentTinyDB(TinyDB):
+    table_class = LockedTable
+
+
+def global_lock(operations: int, threads: int) -> float:
+    db = TinyDB(storage=MemoryStorage)
+    lock = threading.Lock()
+
+    def work(table):
+        for n in range(operations):
+            with lock:
+                if n % 4:
+                    db.table(table).search(Query().n == n - 1)
+                else:
+                    db.table(table).insert({"n": n})
+
+    return _run(work, threads)
+
+
+def striped(operations: int, threads: int) -> float:
+    db = ConcurrentTinyDB(storage=ConcurrentMemoryStorage)
+
+    def work(table):
+        for n in range(operations):
+            if n % 4:
+                db.table(table).search(Query().n == n - 1)
+            else:
+                db.table(table).insert({"n": n})
+
+    return _run(work, threads)
+
+
+def _run(work, threads: int) -> float:
+    workers = [
+        threading.Thread(target=work, args=(f"table_{i}",)) for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'global lock ops/s':>18} {'striped ops/s':>14}")
+    threads = 1
+    while threads <= args.threads:
+        total = threads * args.operations
+        baseline = total / global_lock(args.operations, threads)
+        concurrent = total / striped(args.operations, threads)
+        print(f"{threads:>7} {baseline:>18.0f} {concurrent:>14.0f}")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
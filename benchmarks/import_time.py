@@ -0,0 +1,127 @@
+"""
+Measure the import time and memory of every storage, each in a fresh
+interpreter, and report them as JSON.
+
+    python -m benchmarks.import_time --repeat 5 --output import.json
+    python -m benchmarks.import_time --max-ms 150
+
+The heavy modules each storage pulls in (boto3, botocore, redis, pydantic,
+aiobotocore) are listed with the results, so a storage starting to import a
+client it does not use shows up even when the timings are noisy. With
+``--max-ms`` the command fails when the median import time of a storage
+exceeds the budget.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any
+
+STORAGES = (
+    "MemoryStorage",
+    "ConcurrentMemoryStorage",
+    "FileStorage",
+    "JournalFileStorage",
+    "MappedFileStorage",
+    "TieredStorage",
+    "RedisStorage",
+    "S3Storage",
+    "AsyncRedisStorage",
+    "AsyncS3Storage",
+)
+HEAVY_MODULES = ("boto3", "botocore", "redis", "pydantic", "aiobotocore")
+
+# Run by the fresh interpreter, prints the measures of one import as JSON.
+PROBE = """
+import json, sys, time
+
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+before = rss()
+start = time.perf_counter()
+from tinydbstorage.storage import {name}
+seconds = time.perf_counter() - start
+after = rss()
+print(json.dumps({{
+    "seconds": seconds,
+    "rss_bytes": None if before is None else after - before,
+    "modules": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def measure(name: str, repeat: int) -> Dict[str, Any]:
+    """
+    Import a storage ``repeat`` times, each in a fresh interpreter.
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(name=name, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output))
+
+    rss = [run["rss_bytes"] for run in runs if run["rss_bytes"] is not None]
+    return {
+        "storage": name,
+        "median_ms": statistics.median(run["seconds"] for run in runs) * 1000,
+        "min_ms": min(run["seconds"] for run in runs) * 1000,
+        "rss_bytes": int(statistics.median(rss)) if rss else None,
+        "modules": runs[-1]["modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--storages", nargs="+", choices=STORAGES, default=STORAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="fail above this median")
+    parser.add_argument("--output", help="write the JSON report to a file")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.storages:
+        try:
+            results.append(measure(name, args.repeat))
+        except subprocess.CalledProcessError as e:
+            # e.g. an optional dependency that is not installed.
+            results.append({"storage": name, "error": e.stderr.strip()})
+            continue
+        result = results[-1]
+        print(
+            f"{name:>24} {result['median_ms']:>8.1f} ms "
+            f"{(result['rss_bytes'] or 0) / 2**20:>6.1f} MiB "
+            f"{' '.join(result['modules'])}",
+            file=sys.stderr,
+        )
+
+    output = json.dumps({"results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.max_ms is not None:
+        slow = [
+            result["storage"]
+            for result in results
+            if result.get("median_ms", 0) > args.max_ms
+        ]
+        if slow:
+            sys.exit(f"Import time above {args.max_ms} ms: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Run the standard workloads against every storage backend and report the
+results as JSON.
+
+Every case (backend, workload, number of documents, document size) runs in
+a fresh process so its peak RSS is its own:
+
+    python -m benchmarks.suite --docs 1000 10000 --doc-size 100 1000 --output bench.json
+    python -m benchmarks.suite compare base.json bench.json
+
+Workloads:
+
+- ``bulk_insert``: insert the documents in batches of 100, one operation per batch.
+- ``update``: update one document at a time.
+- ``point_lookup``: get one document by doc_id.
+- ``full_scan``: search the whole table with a query matching 1% of it.
+- ``mixed``: 80% point lookups and 20% updates.
+
+Redis runs against ``--redis-uri`` (or ``TINYDB_BENCH_REDIS_URI``), or an
+in-process fakeredis server when that package is installed. S3 runs against
+``--s3-endpoint`` (or ``TINYDB_BENCH_S3_ENDPOINT``), e.g. a local MinIO, or
+moto when that package is installed. Backends without one are reported in
+``skipped``.
+
+Bytes transferred are the bytes the process read and wrote through system
+calls during the timed operations (files and sockets, Linux only), an
+in-process stand-in transfers none.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack
+from typing import Optional, Dict, Any, List
+
+from tinydb import TinyDB, Query
+
+WORKLOADS = ("bulk_insert", "update", "point_lookup", "full_scan", "mixed")
+BACKENDS = ("memory", "file", "redis", "s3")
+BATCH_SIZE = 100
+TABLE = "bench"
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - optional dependency
+    fakeredis = None
+
+try:
+    from moto import mock_aws
+except ImportError:  # pragma: no cover - optional dependency
+    mock_aws = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def backend_status(backend: str, args) -> Optional[str]:
+    """
+    Return why a backend cannot run, None when it can.
+    """
+    if backend == "redis" and not args.redis_uri:
+        if fakeredis is None:
+            return "no --redis-uri given and fakeredis is not installed"
+    if backend == "redis" and args.redis_uri:
+        import redis
+
+        try:
+            redis.Redis.from_url(args.redis_uri).ping()
+        except redis.RedisError as e:
+            return f"cannot reach {args.redis_uri}: {e}"
+    if backend == "s3" and not args.s3_endpoint and mock_aws is None:
+        return "no --s3-endpoint given and moto is not installed"
+
+    return None
+
+
+def open_db(backend: str, stack: ExitStack, args: Dict[str, Any]) -> TinyDB:
+    """
+    Open an empty database on a backend, ``stack`` releases it.
+    """
+    from tinydbstorage.storage import (
+        FileStorage,
+        MemoryStorage,
+        RedisStorage,
+        S3Storage,
+    )
+
+    if backend == "memory":
+        return stack.enter_context(TinyDB(storage=MemoryStorage))
+
+    if backend == "file":
+        directory = tempfile.mkdtemp(prefix="tinydb-bench-")
+        stack.callback(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "db.json")
+        return stack.enter_context(TinyDB(path, storage=FileStorage))
+
+    if backend == "redis":
+        prefix = f"tinydb-bench:{uuid.uuid4().hex}"
+        redis_uri = args["redis_uri"] or "redis://localhost:6379/0"
+        db = stack.enter_context(
+            TinyDB(storage=RedisStorage, redis_uri=redis_uri, prefix=prefix)
+        )
+        if not args["redis_uri"]:
+            db.storage.connection = fakeredis.FakeRedis()
+        stack.callback(db.storage.connection.delete, prefix, db.storage.version_key)
+        return db
+
+    if backend == "s3":
+        from tinydbstorage.schema import S3Schema
+
+        if args["s3_endpoint"]:
+            os.environ["AWS_ENDPOINT_URL_S3"] = args["s3_endpoint"]
+        else:
+            stack.enter_context(mock_aws())
+
+        config = S3Schema(
+            file_path=f"tinydb-bench/{uuid.uuid4().hex}.json",
+            bucket_name=args["s3_bucket"],
+            region_name="us-east-1",
+            access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "bench"),
+            secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "bench"),
+        )
+        db = TinyDB(storage=S3Storage, config=config)
+        bucket = db.storage.client.Bucket(config.bucket_name)
+        if bucket.creation_date is None:
+            bucket.create()
+        stack.callback(bucket.Object(config.file_path).delete)
+        stack.enter_context(db)
+        return db
+
+    raise ValueError(f"Unknown backend: {backend!r}")
+
+
+def make_documents(count: int, size: int) -> List[Dict[str, Any]]:
+    """
+    Return ``count`` documents of about ``size`` bytes once serialized.
+    """
+    padding = "x" * max(size - 60, 0)
+    return [
+        {"n": n, "group": n % 100, "active": bool(n % 2), "payload": padding}
+        for n in range(count)
+    ]
+
+
+def operations(
+    workload: str, db: TinyDB, docs: List[Dict[str, Any]], count: int, seed: int
+):
+    """
+    Yield the operations of a workload as callables, after loading its data.
+    """
+    rng = random.Random(seed)
+    table = db.table(TABLE)
+
+    if workload == "bulk_insert":
+        for start in range(0, len(docs), BATCH_SIZE):
+            batch = docs[start : start + BATCH_SIZE]
+            yield lambda batch=batch: table.insert_multiple(batch)
+        return
+
+    doc_ids = table.insert_multiple(docs)
+    for n in range(count):
+        doc_id = rng.choice(doc_ids)
+        if workload == "update" or (workload == "mixed" and rng.random() < 0.2):
+            yield lambda n=n, doc_id=doc_id: table.update({"n": n}, doc_ids=[doc_id])
+        elif workload in ("point_lookup", "mixed"):
+            yield lambda doc_id=doc_id: table.get(doc_id=doc_id)
+        elif workload == "full_scan":
+            group = rng.randrange(100)
+            yield lambda group=group: table.search(Query().group == group)
+        else:
+            raise ValueError(f"Unknown workload: {workload!r}")
+
+
+def run_case(
+    backend: str,
+    workload: str,
+    count: int,
+    size: int,
+    args: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Run one case and return its result, meant to run in a fresh process.
+    """
+    docs = make_documents(count, size)
+    latencies = []
+    with ExitStack() as stack:
+        db = open_db(backend, stack, args)
+        ops = operations(workload, db, docs, args["operations"], args["seed"])
+        # The data of the workload is loaded by the first step.
+        ops = iter(ops)
+        op = next(ops, None)
+
+        io_before = _io_counters()
+        start = time.perf_counter()
+        while op is not None:
+            op_start = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - op_start)
+            op = next(ops, None)
+        elapsed = time.perf_counter() - start
+        io_after = _io_counters()
+
+    latencies.sort()
+    transferred = None
+    if io_before is not None and io_after is not None:
+        transferred = {
+            "read": io_after["rchar"] - io_before["rchar"],
+            "written": io_after["wchar"] - io_before["wchar"],
+        }
+
+    return {
+        "backend": backend,
+        "workload": workload,
+        "docs": count,
+        "doc_size": size,
+        "operations": len(latencies),
+        "seconds": elapsed,
+        "ops_per_sec": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "bytes": transferred,
+        "peak_rss_bytes": _peak_rss(),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    """
+    Run every requested case, each in its own process.
+    """
+    params = {
+        "operations": args.operations,
+        "seed": args.seed,
+        "redis_uri": args.redis_uri,
+        "s3_endpoint": args.s3_endpoint,
+        "s3_bucket": args.s3_bucket,
+    }
+    report = {"meta": _meta(args), "results": [], "skipped": []}
+    context = multiprocessing.get_context("spawn")
+    for backend in args.backends:
+        reason = backend_status(backend, args)
+        if reason is not None:
+            report["skipped"].append({"backend": backend, "reason": reason})
+            print(f"skipping {backend}: {reason}", file=sys.stderr)
+            continue
+
+        for workload in args.workloads:
+            for count in args.docs:
+                for size in args.doc_size:
+                    case = (backend, workload, count, size, params)
+                    with context.Pool(1, maxtasksperchild=1) as pool:
+                        result = pool.apply(run_case, case)
+                    report["results"].append(result)
+                    print(
+                        f"{backend:>6} {workload:>12} {count:>7} docs {size:>6} B "
+                        f"{result['ops_per_sec']:>10.1f} ops/s "
+                        f"p50 {result['p50_ms']:.2f} ms p99 {result['p99_ms']:.2f} ms",
+                        file=sys.stderr,
+                    )
+
+    return report
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Return the ops/sec and p99 ratios of the cases present in both reports.
+    """
+
+    def key(result):
+        return (
+            result["backend"],
+            result["workload"],
+            result["docs"],
+            result["doc_size"],
+        )
+
+    base_results = {key(result): result for result in base["results"]}
+    changes = []
+    for result in head["results"]:
+        previous = base_results.get(key(result))
+        if previous is None or not previous["ops_per_sec"]:
+            continue
+
+        changes.append(
+            {
+                "backend": result["backend"],
+                "workload": result["workload"],
+                "docs": result["docs"],
+                "doc_size": result["doc_size"],
+                "ops_per_sec_ratio": result["ops_per_sec"] / previous["ops_per_sec"],
+                "p99_ratio": (
+                    result["p99_ms"] / previous["p99_ms"]
+                    if previous["p99_ms"]
+                    else None
+                ),
+            }
+        )
+
+    return changes
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    # Nearest rank of sorted values.
+    if not values:
+        return 0.0
+
+    index = max(int(-(-fraction * len(values) // 1)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":") for line in f if ":" in line)
+    except OSError:
+        return None
+
+    return {name: int(fields[name]) for name in ("rchar", "wchar")}
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _meta(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "operations": args.operations,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command")
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two reports, e.g. of two commits"
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--docs", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--doc-size", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--redis-uri", default=os.environ.get("TINYDB_BENCH_REDIS_URI"))
+    parser.add_argument(
+        "--s3-endpoint", default=os.environ.get("TINYDB_BENCH_S3_ENDPOINT")
+    )
+    parser.add_argument(
+        "--s3-bucket", default=os.environ.get("TINYDB_BENCH_S3_BUCKET", "tinydb-bench")
+    )
+    parser.add_argument("--output", help="write the JSON report to a file")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.base) as base, open(args.head) as head:
+            report = compare(json.load(base), json.load(head))
+    else:
+        report = run(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output and args.command != "compare":
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
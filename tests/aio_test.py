@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+
+from tinydb import Query
+
+from tinydbstorage.aio import AsyncStorage, AsyncTinyDB
+
+
+class DictStorage(AsyncStorage):
+    """
+    An asyncio storage keeping a JSON-like copy of the data, yielding to the
+    event loop on every operation like a network storage would.
+    """
+
+    def __init__(self):
+        self.data = None
+        self.reads = 0
+        self.writes = 0
+        self.closed = False
+
+    async def read(self):
+        self.reads += 1
+        await asyncio.sleep(0)
+        if self.data is None:
+            return None
+        return {name: dict(table) for name, table in self.data.items()}
+
+    async def write(self, data):
+        self.writes += 1
+        await asyncio.sleep(0)
+        self.data = {name: dict(table) for name, table in data.items()}
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncTinyDB(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = AsyncTinyDB(storage=DictStorage)
+
+    async def test_crud(self):
+        self.assertEqual(await self.db.insert({"type": "apple", "count": 7}), 1)
+        self.assertEqual(
+            await self.db.insert_multiple(
+                [{"type": "peach", "count": 3}, {"type": "plum", "count": 1}]
+            ),
+            [2, 3],
+        )
+        await self.db.update({"count": 2}, Query().type == "apple")
+        await self.db.remove(Query().type == "plum")
+        await self.db.upsert({"type": "kiwi", "count": 5}, Query().type == "kiwi")
+
+        self.assertEqual(
+            await self.db.all(),
+            [
+                {"type": "apple", "count": 2},
+                {"type": "peach", "count": 3},
+                {"type": "kiwi", "count": 5},
+            ],
+        )
+        self.assertEqual(
+            await self.db.search(Query().count > 2),
+            [{"type": "peach", "count": 3}, {"type": "kiwi", "count": 5}],
+        )
+        self.assertEqual(await self.db.get(doc_id=2), {"type": "peach", "count": 3})
+        self.assertTrue(await self.db.contains(Query().type == "kiwi"))
+        self.assertEqual(await self.db.count(Query().count > 2), 2)
+        self.assertEqual(await self.db.length(), 3)
+
+    async def test_reads_do_not_write(self):
+        await self.db.insert({"type": "apple"})
+        writes = self.db.storage.writes
+
+        await self.db.search(Query().type == "apple")
+        await self.db.get(doc_id=1)
+
+        self.assertEqual(self.db.storage.writes, writes)
+
+    async def test_tables(self):
+        await self.db.table("fruits").insert({"type": "apple"})
+        await self.db.table("vegetables").insert({"type": "leek"})
+
+        self.assertEqual(await self.db.tables(), {"fruits", "vegetables"})
+
+        await self.db.drop_table("fruits")
+        self.assertEqual(await self.db.tables(), {"vegetables"})
+
+        await self.db.drop_tables()
+        self.assertEqual(await self.db.tables(), set())
+
+    async def test_concurrent_writes_are_not_lost(self):
+        table = self.db.table("fruits")
+
+        doc_ids = await asyncio.gather(*(table.insert({"n": n}) for n in range(50)))
+
+        self.assertEqual(sorted(doc_ids), list(range(1, 51)))
+        self.assertEqual(await table.length(), 50)
+
+    async def test_context_manager_closes_storage(self):
+        async with AsyncTinyDB(storage=DictStorage) as db:
+            await db.insert({"type": "apple"})
+
+        self.assertTrue(db.storage.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
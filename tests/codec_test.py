@@ -0,0 +1,68 @@
+import json
+import unittest
+
+from tinydbstorage import codec
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.payload = json.dumps({"_default": {"1": {"value": "A" * 100}}}).encode()
+
+    def test_round_trip(self):
+        for name in (codec.GZIP, codec.ZLIB, codec.LZMA, codec.ZSTD):
+            with self.subTest(codec=name):
+                if name == codec.ZSTD and codec.zstandard is None:
+                    self.skipTest("zstandard is not installed")
+
+                compressed = codec.compress(self.payload, name)
+
+                self.assertLess(len(compressed), len(self.payload))
+                self.assertEqual(codec.detect_codec(compressed), name)
+                self.assertEqual(codec.decompress(compressed), self.payload)
+
+    def test_streaming_round_trip(self):
+        for name in (codec.NONE, codec.GZIP, codec.ZLIB, codec.LZMA, codec.ZSTD):
+            with self.subTest(codec=name):
+                if name == codec.ZSTD and codec.zstandard is None:
+                    self.skipTest("zstandard is not installed")
+
+                stream = codec.compressor(name)
+                compressed = b"".join(
+                    [stream.compress(self.payload[i : i + 7]) for i in range(0, 200, 7)]
+                    + [stream.compress(self.payload[200:]), stream.flush()]
+                )
+                chunks = [compressed[i : i + 3] for i in range(0, len(compressed), 3)]
+
+                self.assertEqual(codec.detect_codec(compressed), name)
+                self.assertEqual(codec.decompress(compressed), self.payload)
+                self.assertEqual(b"".join(codec.iter_decompress(chunks)), self.payload)
+
+    def test_none_is_untouched(self):
+        self.assertIs(codec.compress(self.payload), self.payload)
+        self.assertEqual(codec.detect_codec(self.payload), codec.NONE)
+        self.assertIs(codec.decompress(self.payload), self.payload)
+
+    def test_str_payload(self):
+        compressed = codec.compress(self.payload.decode(), codec.GZIP)
+
+        self.assertEqual(codec.decompress(compressed), self.payload)
+        self.assertEqual(codec.decompress(self.payload.decode()), self.payload.decode())
+
+    def test_gzip_is_deterministic(self):
+        self.assertEqual(
+            codec.compress(self.payload, codec.GZIP),
+            codec.compress(self.payload, codec.GZIP),
+        )
+
+    def test_compression_level(self):
+        fast = codec.compress(self.payload, codec.ZLIB, 1)
+
+        self.assertEqual(codec.decompress(fast), self.payload)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.check_codec("brotli")
+
+
+if __name__ == "__main__":
+    unittest.main()
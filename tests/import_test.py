@@ -0,0 +1,56 @@
+import subprocess
+import sys
+import unittest
+
+import tinydbstorage.storage
+
+
+def imported_modules(statement: str):
+    # A fresh interpreter, the test process already imported everything.
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {statement}; "
+            "print(' '.join(m for m in ('boto3', 'redis', 'pydantic') if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_local_storages_do_not_import_clients(self):
+        for name in (
+            "MemoryStorage",
+            "ConcurrentMemoryStorage",
+            "FileStorage",
+            "JournalFileStorage",
+            "MappedFileStorage",
+            "TieredStorage",
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    imported_modules(f"from tinydbstorage.storage import {name}"),
+                    set(),
+                )
+
+    def test_remote_storages_import_their_client_only(self):
+        self.assertEqual(
+            imported_modules("from tinydbstorage.storage import RedisStorage"),
+            {"redis", "pydantic"},
+        )
+        self.assertEqual(
+            imported_modules("from tinydbstorage.storage import S3Storage"),
+            {"boto3", "pydantic"},
+        )
+
+    def test_attributes(self):
+        from tinydbstorage.storage.file import FileStorage
+
+        self.assertIs(tinydbstorage.storage.FileStorage, FileStorage)
+        self.assertIn("RedisStorage", dir(tinydbstorage.storage))
+        with self.assertRaises(AttributeError):
+            tinydbstorage.storage.UnknownStorage
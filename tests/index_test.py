@@ -0,0 +1,159 @@
+import unittest
+
+from tinydbstorage.index import (
+    HashIndex,
+    Index,
+    Indexes,
+    SortedIndex,
+    hash_key,
+)
+from tinydbstorage.schema import IndexSchema
+
+
+class TestHashIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = HashIndex("users", "email")
+
+    def update(self, docs):
+        self.index.apply(*self.index.diff(docs))
+
+    def test_lookup(self):
+        self.update({"1": {"email": "a"}, "2": {"email": "b"}, "3": {"email": "a"}})
+
+        self.assertEqual(self.index.lookup("a"), {1, 3})
+        self.assertEqual(self.index.lookup("c"), set())
+
+    def test_diff_only_changed_documents(self):
+        self.update({"1": {"email": "a"}, "2": {"email": "b"}})
+
+        added, removed = self.index.diff(
+            {"1": {"email": "a"}, "2": {"email": "c"}, "3": {"email": "d"}}
+        )
+
+        self.assertEqual(added, {"2": "c", "3": "d"})
+        self.assertEqual(removed, {"2": "b"})
+
+    def test_removed_documents_and_fields(self):
+        self.update({"1": {"email": "a"}, "2": {"email": "a"}})
+        self.update({"1": {"name": "John"}})
+
+        self.assertEqual(self.index.lookup("a"), set())
+        self.assertEqual(self.index.values, {})
+
+    def test_nested_field(self):
+        index = HashIndex("users", "address.city")
+        index.apply(*index.diff({"1": {"address": {"city": "Paris"}}, "2": {}}))
+
+        self.assertEqual(index.lookup("Paris"), {1})
+
+    def test_values_compared_by_json(self):
+        self.assertEqual(hash_key(1), hash_key(1.0))
+        self.assertNotEqual(hash_key(1), hash_key(True))
+        self.assertEqual(hash_key({"b": 1, "a": 2}), hash_key({"a": 2, "b": 1}))
+
+
+class TestSortedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SortedIndex("users", "age")
+        self.index.apply(
+            *self.index.diff(
+                {
+                    "1": {"age": 30},
+                    "2": {"age": 20},
+                    "3": {"age": 25.5},
+                    "4": {"age": "unknown"},
+                    "5": {"age": None},
+                    "6": {"age": 20},
+                }
+            )
+        )
+
+    def test_range(self):
+        self.assertEqual(self.index.range(20, 30), [2, 6, 3, 1])
+        self.assertEqual(self.index.range(20, 30, include_low=False), [3, 1])
+        self.assertEqual(self.index.range(20, 30, include_high=False), [2, 6, 3])
+        self.assertEqual(self.index.range(low=26), [1])
+        self.assertEqual(self.index.range(high=20), [2, 6])
+
+    def test_numbers_and_strings_kept_apart(self):
+        self.assertEqual(self.index.range(), [2, 6, 3, 1, 4])
+        self.assertEqual(self.index.range("a", "z"), [4])
+        with self.assertRaises(ValueError):
+            self.index.range(1, "z")
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup(20), {2, 6})
+        self.assertEqual(self.index.lookup(None), set())
+
+    def test_update_moves_document(self):
+        added, removed = self.index.diff(
+            {"1": {"age": 10}, "2": {"age": 20}, "3": {"age": 25.5}}
+        )
+        self.index.apply(added, removed)
+
+        self.assertEqual(added, {"1": 10})
+        self.assertEqual(self.index.range(), [1, 2, 3])
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.indexes = Indexes(
+            [
+                IndexSchema(table="users", field="email"),
+                IndexSchema(table="users", field="age", kind="sorted"),
+            ]
+        )
+
+    def test_update_returns_changes(self):
+        changes = self.indexes.update({"users": {"1": {"email": "a", "age": 3}}})
+        self.assertEqual(len(changes), 2)
+
+        self.assertEqual(
+            self.indexes.update({"users": {"1": {"email": "a", "age": 3}}}), []
+        )
+
+        ((index, added, removed),) = self.indexes.update(
+            {"users": {"1": {"email": "b", "age": 3}}}
+        )
+        self.assertEqual(
+            (index.field, added, removed), ("email", {"1": "b"}, {"1": "a"})
+        )
+
+    def test_dropped_table(self):
+        self.indexes.update({"users": {"1": {"email": "a"}}})
+        self.indexes.update({})
+
+        self.assertEqual(self.indexes.lookup("users", "email", "a"), set())
+
+    def test_unknown_and_unsorted_index(self):
+        with self.assertRaises(KeyError):
+            self.indexes.lookup("users", "name", "John")
+        with self.assertRaises(ValueError):
+            self.indexes.range("users", "email", "a", "b")
+
+    def test_dump_and_load(self):
+        self.indexes.update({"users": {"1": {"email": "a", "age": 3}}})
+        payload = self.indexes.dump()
+
+        indexes = Indexes(
+            [
+                IndexSchema(table="users", field="email"),
+                IndexSchema(table="users", field="age", kind="sorted"),
+            ]
+        )
+        self.assertTrue(indexes.load(payload))
+        self.assertEqual(indexes.lookup("users", "email", "a"), {1})
+        self.assertEqual(indexes.range("users", "age", 1, 5), [1])
+
+        changed = Indexes([IndexSchema(table="users", field="email", kind="sorted")])
+        self.assertFalse(changed.load(payload))
+
+    def test_without_lookups(self):
+        indexes = Indexes([IndexSchema(table="users", field="email")], lookups=False)
+        (index,) = indexes
+
+        self.assertIs(type(index), Index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from tinydb import TinyDB
+
+from tinydbstorage.instrument import (
+    DESERIALIZE,
+    NETWORK,
+    SERIALIZE,
+    Histogram,
+    Instrumentation,
+    LoggingHook,
+    Stats,
+    instrumentation,
+    instrumented,
+)
+from tinydbstorage.serializer import Serializer
+from tinydbstorage.storage import (
+    FileStorage,
+    JournalFileStorage,
+    MemoryStorage,
+    RedisStorage,
+)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "db.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_disabled_without_hooks(self):
+        instrumentation = Instrumentation()
+
+        self.assertFalse(instrumentation.enabled)
+        with instrumentation.span(NETWORK) as span:
+            span.size = 10
+
+        hook = MagicMock()
+        instrumentation.add_hook(hook)
+        self.assertTrue(instrumentation.enabled)
+        instrumentation.remove_hook(hook)
+        self.assertFalse(instrumentation.enabled)
+        hook.assert_not_called()
+
+        with self.assertRaises(ValueError):
+            instrumentation.remove_hook(hook)
+
+    def test_profile_reads_and_writes(self):
+        db = TinyDB(storage=MemoryStorage)
+        with instrumentation.profile() as stats:
+            db.storage.write({"_default": {"1": {"name": "John"}}})
+            db.all()
+            db.all()
+
+        snapshot = stats.snapshot()["MemoryStorage"]
+        self.assertEqual(snapshot["write"]["calls"], 1)
+        self.assertEqual(snapshot["read"]["calls"], 2)
+        self.assertFalse(instrumentation.enabled)
+
+        db.all()
+        self.assertEqual(stats.snapshot()["MemoryStorage"]["read"]["calls"], 2)
+
+    def test_serialization_bytes(self):
+        with TinyDB(self.path, storage=FileStorage) as db:
+            with instrumentation.profile() as stats:
+                db.insert({"name": "John"})
+
+        snapshot = stats.snapshot()["FileStorage"]
+        self.assertEqual(snapshot[SERIALIZE]["calls"], 1)
+        self.assertEqual(snapshot[SERIALIZE]["bytes"], os.path.getsize(self.path))
+        self.assertIn("write", snapshot)
+
+    def test_nested_calls_are_measured_once(self):
+        with TinyDB(self.path, storage=JournalFileStorage) as db:
+            with instrumentation.profile() as stats:
+                db.all()
+
+        self.assertEqual(stats.snapshot()["JournalFileStorage"]["read"]["calls"], 1)
+
+    def test_custom_serializer_is_measured(self):
+        class UpperSerializer(Serializer):
+            def dumps(self, data):
+                return str(data).upper()
+
+            def loads(self, payload):
+                return payload.lower()
+
+        events = []
+        instrumentation.add_hook(events.append)
+        try:
+            UpperSerializer().loads(UpperSerializer().dumps("abc"))
+        finally:
+            instrumentation.remove_hook(events.append)
+
+        self.assertEqual(
+            [event.operation for event in events], [SERIALIZE, DESERIALIZE]
+        )
+        self.assertEqual([event.size for event in events], [3, 3])
+        self.assertIsNone(events[0].storage)
+
+    def test_network_spans(self):
+        storage = RedisStorage("redis://localhost:6379/1")
+        storage.connection = MagicMock()
+        storage.connection.get.return_value = b'{"_default": {}}'
+
+        with instrumentation.profile() as stats:
+            storage.read()
+
+        snapshot = stats.snapshot()["RedisStorage"]
+        self.assertEqual(snapshot[NETWORK]["calls"], 1)
+        self.assertEqual(snapshot[NETWORK]["bytes"], 16)
+        self.assertEqual(snapshot[DESERIALIZE]["bytes"], 16)
+
+    def test_coroutine_methods(self):
+        class AsyncStorage:
+            @instrumented
+            async def read(self):
+                return {}
+
+        with instrumentation.profile() as stats:
+            self.assertEqual(asyncio.run(AsyncStorage().read()), {})
+
+        self.assertEqual(stats.snapshot()["AsyncStorage"]["read"]["calls"], 1)
+
+    def test_logging_hook(self):
+        hook = LoggingHook(level=logging.INFO)
+        instrumentation.add_hook(hook)
+        try:
+            with self.assertLogs("tinydbstorage", logging.INFO) as logs:
+                TinyDB(storage=MemoryStorage).all()
+        finally:
+            instrumentation.remove_hook(hook)
+
+        self.assertIn("MemoryStorage read", logs.output[0])
+
+
+class TestStats(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [1, 2, 1])
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+        self.assertEqual(histogram.quantile(0.99), float("inf"))
+        self.assertIsNone(Histogram().quantile(0.5))
+
+    def test_prometheus(self):
+        stats = Stats(buckets=(0.1,))
+        instrumentation = Instrumentation()
+        instrumentation.add_hook(stats)
+        instrumentation.emit("read", 0.05, 10, "FileStorage")
+        instrumentation.emit("read", 0.2, 20, "FileStorage")
+
+        lines = stats.prometheus().splitlines()
+        labels = 'storage="FileStorage",operation="read"'
+        self.assertIn(f"tinydbstorage_operations_total{{{labels}}} 2", lines)
+        self.assertIn(f"tinydbstorage_bytes_total{{{labels}}} 30", lines)
+        self.assertIn(f'tinydbstorage_seconds_bucket{{{labels},le="0.1"}} 1', lines)
+        self.assertIn(f'tinydbstorage_seconds_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertIn(f"tinydbstorage_seconds_count{{{labels}}} 2", lines)
+
+        stats.clear()
+        self.assertEqual(stats.snapshot(), {})
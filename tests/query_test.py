@@ -0,0 +1,54 @@
+import json
+import unittest
+
+from tinydb import Query
+
+from tinydbstorage.query import translate
+
+
+class TestTranslate(unittest.TestCase):
+    def setUp(self):
+        self.q = Query()
+
+    def test_comparisons(self):
+        for cond, predicate in (
+            (self.q.age == 18, ["==", ["age"], 18]),
+            (self.q.age != None, ["!=", ["age"], None]),
+            (self.q.a.b < 1.5, ["<", ["a", "b"], 1.5]),
+            (self.q.name >= "J", [">=", ["name"], "J"]),
+            (self.q.active == True, ["==", ["active"], True]),
+            (self.q.email.exists(), ["exists", ["email"]]),
+            (self.q.n.one_of([1, "x"]), ["one_of", ["n"], [1, "x"]]),
+        ):
+            with self.subTest(predicate=predicate):
+                self.assertEqual(translate(cond), predicate)
+
+    def test_logical_operators(self):
+        predicate = translate(~(self.q.a == 1) | ((self.q.b > 2) & (self.q.c < 3)))
+
+        self.assertEqual(predicate[0], "or")
+        self.assertIn(["not", ["==", ["a"], 1]], predicate[1])
+        self.assertIn(["and", [["<", ["c"], 3], [">", ["b"], 2]]], predicate[1])
+        self.assertEqual(
+            predicate, translate(((self.q.c < 3) & (self.q.b > 2)) | ~(self.q.a == 1))
+        )
+        # Sent to Redis as JSON
+        json.dumps(predicate)
+
+    def test_untranslatable(self):
+        for cond in (
+            self.q.name.matches("J.*"),
+            self.q.name.test(lambda value: True),
+            self.q.tags.any(["a"]),
+            self.q.tags == ["a"],
+            self.q.meta == {"a": 1},
+            self.q.n == 2**60,
+            self.q.n < float("nan"),
+            self.q.name.map(str.lower) == "john",
+            self.q.fragment({"a": 1}),
+            (self.q.a == 1) & self.q.b.matches("x"),
+            self.q.noop(),
+            lambda doc: True,
+        ):
+            with self.subTest(cond=cond):
+                self.assertIsNone(translate(cond))
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from tinydbstorage.registry import ConnectionRegistry, registry
+from tinydbstorage.storage import RedisStorage
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+
+    def test_redis_pool_shared_by_uri(self):
+        first = self.registry.redis_pool("redis://localhost:6379/1")
+        second = self.registry.redis_pool("redis://localhost:6379/1")
+        other = self.registry.redis_pool("redis://localhost:6379/2")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_redis_pool_options(self):
+        default = self.registry.redis_pool("redis://localhost:6379/1")
+        bounded = self.registry.redis_pool(
+            "redis://localhost:6379/1", max_connections=5, health_check_interval=30
+        )
+
+        self.assertIsNot(default, bounded)
+        self.assertEqual(bounded.max_connections, 5)
+        self.assertEqual(bounded.connection_kwargs["health_check_interval"], 30)
+
+    def test_stats(self):
+        self.registry.redis_pool("redis://:secret@localhost:6379/1", max_connections=5)
+        self.registry.redis_pool("redis://:secret@localhost:6379/1", max_connections=5)
+
+        stats = self.registry.stats()
+
+        self.assertEqual(
+            stats["redis"]["redis://:***@localhost:6379/1"],
+            {
+                "pools": 1,
+                "acquisitions": 2,
+                "max_connections": 5,
+                "created": 0,
+                "in_use": 0,
+                "available": 0,
+            },
+        )
+        self.assertNotIn("secret", repr(stats))
+
+    def test_stats_of_pools_with_the_same_uri(self):
+        self.registry.redis_pool("redis://localhost:6379/1", max_connections=5)
+        self.registry.redis_pool("redis://localhost:6379/1", max_connections=7)
+
+        stats = self.registry.stats()["redis"]["redis://localhost:6379/1"]
+
+        self.assertEqual(stats["pools"], 2)
+        self.assertEqual(stats["acquisitions"], 2)
+        self.assertEqual(stats["max_connections"], 12)
+
+        self.registry.redis_pool("redis://localhost:6379/1")
+        stats = self.registry.stats()["redis"]["redis://localhost:6379/1"]
+        self.assertEqual(stats["pools"], 3)
+        self.assertIsNone(stats["max_connections"])
+
+    @patch("boto3.resource")
+    def test_s3_resource_shared_by_credentials(self, mock_resource):
+        first = self.registry.s3_resource("us-east-1", "key", "secret")
+        second = self.registry.s3_resource("us-east-1", "key", "secret")
+        bounded = self.registry.s3_resource("us-east-1", "key", "secret", 50)
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_resource.call_count, 2)
+        self.assertEqual(
+            mock_resource.call_args.kwargs["config"].max_pool_connections, 50
+        )
+        self.assertEqual(
+            self.registry.stats()["s3"]["us-east-1/key"],
+            {"pools": 2, "acquisitions": 3, "max_connections": None},
+        )
+
+    def test_after_fork_forgets_pools(self):
+        first = self.registry.redis_pool("redis://localhost:6379/1")
+
+        self.registry._after_fork()
+
+        self.assertEqual(self.registry.forks, 1)
+        self.assertEqual(self.registry.stats()["redis"], {})
+        self.assertIsNot(first, self.registry.redis_pool("redis://localhost:6379/1"))
+
+    def test_pid_change_forgets_pools(self):
+        first = self.registry.redis_pool("redis://localhost:6379/1")
+
+        with patch("tinydbstorage.registry.os.getpid", return_value=-1):
+            second = self.registry.redis_pool("redis://localhost:6379/1")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.forks, 1)
+
+    def test_clear(self):
+        first = self.registry.redis_pool("redis://localhost:6379/1")
+
+        self.registry.clear()
+
+        self.assertIsNot(first, self.registry.redis_pool("redis://localhost:6379/1"))
+
+    def test_async_redis_pool_per_loop(self):
+        async def pools():
+            return (
+                self.registry.async_redis_pool("redis://localhost:6379/1"),
+                self.registry.async_redis_pool("redis://localhost:6379/1"),
+            )
+
+        first, second = asyncio.run(pools())
+        third, _ = asyncio.run(pools())
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+
+    def test_redis_storages_share_pool(self):
+        first = RedisStorage("redis://localhost:6379/3", max_connections=7)
+        second = RedisStorage("redis://localhost:6379/3", max_connections=7)
+
+        self.assertIs(
+            first.connection.connection_pool, second.connection.connection_pool
+        )
+        self.assertIs(
+            first.connection.connection_pool,
+            registry.redis_pool("redis://localhost:6379/3", 7),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from pydantic import ValidationError
+
+from tinydbstorage.schema import RetrySchema
+
+
+class TestRetrySchema(unittest.TestCase):
+    def test_retryschema_defaults(self):
+        retry = RetrySchema()
+
+        self.assertEqual(retry.max_retries, 5)
+        self.assertTrue(retry.jitter)
+
+    def test_retryschema_exponential_delay(self):
+        retry = RetrySchema(base_delay=0.1, multiplier=2, max_delay=0.3, jitter=False)
+
+        self.assertAlmostEqual(retry.delay(1), 0.1)
+        self.assertAlmostEqual(retry.delay(2), 0.2)
+        self.assertAlmostEqual(retry.delay(3), 0.3)
+
+    def test_retryschema_jitter_within_bounds(self):
+        retry = RetrySchema(base_delay=0.1, multiplier=2)
+
+        for attempt in range(1, 5):
+            self.assertLessEqual(retry.delay(attempt), 0.1 * 2 ** (attempt - 1))
+
+    def test_retryschema_validation(self):
+        with self.assertRaises(ValidationError):
+            RetrySchema(max_retries=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
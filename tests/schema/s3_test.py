@@ -1,5 +1,7 @@
 import unittest
 
+from pydantic import ValidationError
+
 from tinydbstorage.schema import S3Schema
 
 
@@ -24,6 +26,18 @@ class TestS3Schema(unittest.TestCase):
         self.assertEqual(s3_schema.region_name, region_name)
         self.assertEqual(s3_schema.access_key_id, access_key)
         self.assertEqual(s3_schema.secret_access_key, secret_key)
+        self.assertIsNone(s3_schema.max_staleness)
+        self.assertEqual(s3_schema.layout, "single")
+
+    def test_s3schema_unknown_layout(self):
+        with self.assertRaises(ValidationError):
+            S3Schema(
+                file_path="test/path",
+                bucket_name="test-bucket",
+                access_key_id="your-access-key",
+                secret_access_key="your-secret-key",
+                layout="foo",
+            )
 
     def test_s3schema_from_param(self):
         file_path = "test/path"
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from tinydb import TinyDB
+
+from tinydbstorage import serializer
+from tinydbstorage.storage import FileStorage, MemoryStorage
+
+
+def available_serializers():
+    names = ["json"]
+    if serializer.orjson is not None:
+        names.append("orjson")
+    if serializer.msgpack is not None:
+        names.append("msgpack")
+    return names
+
+
+class TestSerializer(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "_default": {"1": {"name": "A", "tags": ["x", "y"], "n": 1.5}},
+            "users": {},
+        }
+
+    def test_round_trip(self):
+        for name in available_serializers():
+            with self.subTest(serializer=name):
+                instance = serializer.get_serializer(name)
+
+                payload = instance.dumps(instance.loads(instance.dumpb(self.data)))
+
+                self.assertEqual(instance.loads(payload), self.data)
+                self.assertIsInstance(instance.dumpb(self.data), bytes)
+
+    def test_int_doc_ids_become_str(self):
+        # TinyDB looks documents up with ``str(doc_id)``
+        for name in available_serializers():
+            with self.subTest(serializer=name):
+                instance = serializer.get_serializer(name)
+
+                loaded = instance.loads(instance.dumps({"_default": {1: {"a": 1}}}))
+
+                self.assertEqual(loaded, {"_default": {"1": {"a": 1}}})
+
+    def test_tinydb_get_by_doc_id(self):
+        for name in available_serializers():
+            with self.subTest(serializer=name):
+                db = TinyDB(storage=MemoryStorage, serializer=name)
+                db.storage.write({"_default": {1: {"a": 1}, 2: {"a": 2}}})
+
+                self.assertEqual(db.get(doc_id=2), {"a": 2})
+                self.assertEqual(db.insert({"a": 3}), 3)
+                self.assertEqual(db.get(doc_id=3), {"a": 3})
+
+    def test_file_storage(self):
+        for name in available_serializers():
+            with self.subTest(serializer=name):
+                handle, path = tempfile.mkstemp()
+                os.close(handle)
+                try:
+                    db = TinyDB(path=path, storage=FileStorage, serializer=name)
+                    db.insert_multiple([{"a": 1}, {"a": 2}])
+                    db.close()
+
+                    db = TinyDB(path=path, storage=FileStorage, serializer=name)
+                    self.assertEqual(db.get(doc_id=2), {"a": 2})
+                    db.close()
+                finally:
+                    os.remove(path)
+
+    def test_json_options(self):
+        instance = serializer.get_serializer("json", indent=2)
+
+        self.assertIn("\n", instance.dumps(self.data))
+
+    def test_unknown_serializer(self):
+        with self.assertRaises(ValueError):
+            serializer.get_serializer("pickle")
+
+    def test_instance_is_returned(self):
+        instance = serializer.JSONSerializer()
+
+        self.assertIs(serializer.get_serializer(instance), instance)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import unittest
+
+import redis
+from tinydb import Query
+
+from tinydbstorage.aio import AsyncTinyDB
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.schema import RetrySchema
+from tinydbstorage.storage import AsyncRedisStorage
+
+
+class FakeAsyncRedis:
+    """
+    An in-memory stand-in for the `redis.asyncio.Redis` commands used by the storage.
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.closed = False
+
+    def _get(self, key):
+        return self.store.get(key)
+
+    def _set(self, key, value):
+        self.store[key] = value if isinstance(value, bytes) else value.encode()
+        return True
+
+    def _incr(self, key):
+        value = int(self.store.get(key, b"0")) + 1
+        self.store[key] = str(value).encode()
+        return value
+
+    def _smembers(self, key):
+        return set(self.store.get(key, set()))
+
+    def _sadd(self, key, *members):
+        self.store.setdefault(key, set()).update(m.encode() for m in members)
+
+    def _srem(self, key, *members):
+        self.store.get(key, set()).difference_update(m.encode() for m in members)
+
+    def _hgetall(self, key):
+        return dict(self.store.get(key, {}))
+
+    def _hset(self, key, mapping):
+        self.store.setdefault(key, {}).update(mapping)
+
+    def _hdel(self, key, *fields):
+        for field in fields:
+            self.store.get(key, {}).pop(field, None)
+
+    def _delete(self, key):
+        self.store.pop(key, None)
+
+    async def get(self, key):
+        return self._get(key)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakePipeline:
+    def __init__(self, connection):
+        self.connection = connection
+        self.commands = []
+        self.watched = None
+
+    def __getattr__(self, name):
+        command = getattr(self.connection, f"_{name}")
+
+        def queue(*args, **kwargs):
+            if self.watched is not None and not self.commands and name == "get":
+                # Commands run immediately between WATCH and MULTI.
+                async def immediate():
+                    return command(*args, **kwargs)
+
+                return immediate()
+
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def watch(self, key):
+        self.watched = (key, self.connection._get(key))
+
+    def multi(self):
+        pass
+
+    async def execute(self):
+        if self.watched is not None:
+            key, value = self.watched
+            if self.connection._get(key) != value:
+                raise redis.WatchError(key)
+
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class TestAsyncRedisStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.connection = FakeAsyncRedis()
+        self.db = AsyncTinyDB(
+            storage=AsyncRedisStorage, redis_uri="redis://localhost:6379/1"
+        )
+        self.db.storage.connection = self.connection
+
+    async def test_read_empty(self):
+        self.assertEqual(await self.db.storage.read(), {})
+        self.assertEqual(await self.db.all(), [])
+
+    async def test_write_and_read(self):
+        await self.db.insert_multiple([{"type": "apple"}, {"type": "peach"}])
+        await self.db.update({"count": 2}, Query().type == "apple")
+
+        self.assertEqual(
+            await self.db.storage.read(),
+            {"_default": {"1": {"type": "apple", "count": 2}, "2": {"type": "peach"}}},
+        )
+        self.assertEqual(self.connection.store["tiny_db:__version__"], b"2")
+
+    async def test_hash_layout(self):
+        self.db.storage.layout = "hash"
+        await self.db.table("fruits").insert_multiple([{"n": 1}, {"n": 2}])
+        await self.db.table("fruits").remove(doc_ids=[1])
+
+        self.assertEqual(self.connection.store["tiny_db"], {b"fruits"})
+        self.assertEqual(self.connection.store["tiny_db:fruits"], {b"2": b'{"n": 2}'})
+        self.assertEqual(await self.db.table("fruits").all(), [{"n": 2}])
+
+    async def test_optimistic_conflict(self):
+        self.db.storage.optimistic = True
+        self.db.storage.retry = RetrySchema(base_delay=0, jitter=False)
+        await self.db.insert({"n": 1})
+        await self.db.storage.read()
+
+        # Another writer increments the version
+        self.connection._incr("tiny_db:__version__")
+
+        with self.assertRaises(WriteConflictError):
+            await self.db.storage.write({"_default": {}})
+        self.assertEqual(self.db.storage.conflicts, 1)
+
+        self.connection._incr("tiny_db:__version__")
+        await self.db.storage.retry_on_conflict(self.db.insert, {"n": 2})
+        self.assertEqual(len(await self.db.all()), 2)
+
+    async def test_concurrent_read_keeps_write_base(self):
+        for layout in ("blob", "hash"):
+            with self.subTest(layout=layout):
+                self.connection.store.clear()
+                self.db.storage.layout = layout
+                self.db.storage.optimistic = True
+                self.db.storage._version = None
+                self.db.storage._tracker.reset()
+                await self.db.insert({"n": 1})
+
+                write = self.db.storage.write
+                reading = asyncio.Event()
+
+                async def slow_write(data):
+                    # Let the reader run between the read and the write
+                    await reading.wait()
+                    return await write(data)
+
+                self.db.storage.write = slow_write
+                try:
+                    writer = asyncio.create_task(self.db.update({"owner": "A"}))
+                    await asyncio.sleep(0)
+
+                    # Another process commits, then a task of this one reads it
+                    if layout == "blob":
+                        self.connection._set(
+                            "tiny_db", json.dumps({"_default": {"1": {"n": 999}}})
+                        )
+                    else:
+                        self.connection._hset(
+                            "tiny_db:_default", mapping={b"1": b'{"n": 999}'}
+                        )
+                    self.connection._incr("tiny_db:__version__")
+                    self.assertEqual(await self.db.all(), [{"n": 999}])
+                    reading.set()
+
+                    with self.assertRaises(WriteConflictError):
+                        await writer
+                finally:
+                    del self.db.storage.write
+
+                self.assertEqual(await self.db.all(), [{"n": 999}])
+
+    async def test_close(self):
+        await self.db.close()
+
+        self.assertTrue(self.connection.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from tinydb import Query
+
+from tinydbstorage.aio import AsyncTinyDB
+from tinydbstorage.schema import S3Schema
+from tinydbstorage.storage import AsyncS3Storage
+
+
+class FakeBody:
+    def __init__(self, body):
+        self.body = body
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class FakeAsyncS3Client:
+    """
+    A local stand-in for the aiobotocore S3 client.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+        self.closed = False
+
+    async def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.gets += 1
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+        body, etag = self.objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304"}}, "GetObject")
+
+        return {"Body": FakeBody(body), "ETag": etag}
+
+    async def put_object(self, Bucket, Key, Body):
+        etag = f'"{len(self.objects)}-{hash(Body)}"'
+        self.objects[(Bucket, Key)] = (Body, etag)
+        return {"ETag": etag}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, client):
+        self.client = client
+
+    def create_client(self, service, **kwargs):
+        return self.client
+
+
+class TestAsyncS3Storage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = FakeAsyncS3Client()
+        patcher = patch(
+            "tinydbstorage.storage.async_s3.get_session",
+            return_value=FakeSession(self.client),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = S3Schema(
+            file_path="db.json",
+            bucket_name="bucket",
+            access_key_id="key",
+            secret_access_key="secret",
+        )
+        self.db = AsyncTinyDB(storage=AsyncS3Storage, config=self.config)
+
+    async def test_read_empty(self):
+        self.assertEqual(await self.db.all(), [])
+
+    async def test_write_and_read(self):
+        await self.db.insert_multiple([{"type": "apple"}, {"type": "peach"}])
+        await self.db.remove(Query().type == "peach")
+
+        self.assertEqual(
+            self.client.objects[("bucket", "db.json")][0],
+            b'{"_default": {"1": {"type": "apple"}}}',
+        )
+        self.assertEqual(await self.db.all(), [{"type": "apple"}])
+
+    async def test_unchanged_object_is_not_downloaded_again(self):
+        await self.db.insert({"type": "apple"})
+
+        self.assertEqual(await self.db.all(), [{"type": "apple"}])
+        self.assertEqual(await self.db.all(), [{"type": "apple"}])
+
+        # Answered by 304 Not Modified from the ETag
+        self.assertEqual(self.client.gets, 3)
+
+    async def test_failed_update_is_not_cached(self):
+        await self.db.insert_multiple([{"tags": ["a"]}, {"tags": None}])
+
+        def transform(doc):
+            doc["tags"].append("b")
+
+        # The first document is changed in place before the update fails
+        with self.assertRaises(AttributeError):
+            await self.db.update(transform)
+
+        self.assertEqual(await self.db.all(), [{"tags": ["a"]}, {"tags": None}])
+
+    async def test_compressed(self):
+        self.db = AsyncTinyDB(
+            storage=AsyncS3Storage,
+            config=self.config.model_copy(update={"codec": "gzip"}),
+        )
+        await self.db.insert({"type": "apple"})
+
+        self.assertTrue(
+            self.client.objects[("bucket", "db.json")][0].startswith(b"\x1f\x8b")
+        )
+        self.db.storage._cache = None
+        self.assertEqual(await self.db.all(), [{"type": "apple"}])
+
+    async def test_unsupported_configuration(self):
+        with self.assertRaises(ValueError):
+            AsyncS3Storage(self.config.model_copy(update={"layout": "sharded"}))
+        with self.assertRaises(ValueError):
+            AsyncS3Storage(self.config.model_copy(update={"write_behind": True}))
+
+    async def test_close(self):
+        await self.db.insert({"type": "apple"})
+
+        await self.db.close()
+
+        self.assertTrue(self.client.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import unittest
+
+from tinydb import TinyDB, Query
+
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.storage import ConcurrentMemoryStorage, LockedTable
+
+
+class ConcurrentTinyDB(TinyDB):
+    table_class = LockedTable
+
+
+class TestConcurrentMemoryStorage(unittest.TestCase):
+    def setUp(self):
+        self.db = ConcurrentTinyDB(storage=ConcurrentMemoryStorage, stripes=4)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_crud(self):
+        self.db.insert_multiple([{"type": "apple"}, {"type": "peach"}])
+        self.db.update({"count": 2}, Query().type == "apple")
+        self.db.remove(Query().type == "peach")
+        self.db.table("other").insert({"type": "plum"})
+        self.db.drop_table("other")
+
+        self.assertEqual(self.db.all(), [{"type": "apple", "count": 2}])
+        self.assertEqual(self.db.tables(), {"_default"})
+
+    def test_invalid_stripes(self):
+        with self.assertRaises(ValueError):
+            ConcurrentMemoryStorage(stripes=0)
+
+    def test_writes_to_other_tables_are_merged(self):
+        storage = self.db.storage
+        self.db.table("a").insert({"n": 0})
+        data = storage.read()
+
+        # Another thread writes table "b" in the meantime
+        thread = threading.Thread(target=self.db.table("b").insert, args=({"n": 1},))
+        thread.start()
+        thread.join()
+
+        data["a"] = {"1": {"n": 2}}
+        storage.write(data)
+
+        self.assertEqual(self.db.table("a").all(), [{"n": 2}])
+        self.assertEqual(self.db.table("b").all(), [{"n": 1}])
+
+    def test_stale_write_raises_conflict(self):
+        storage = self.db.storage
+        self.db.insert({"n": 0})
+        data = storage.read()
+
+        thread = threading.Thread(target=self.db.update, args=({"n": 1},))
+        thread.start()
+        thread.join()
+
+        data["_default"] = {"1": {"n": 2}}
+        with self.assertRaises(WriteConflictError):
+            storage.write(data)
+
+        self.assertEqual(storage.conflicts, 1)
+        self.assertEqual(self.db.all(), [{"n": 1}])
+
+    def test_concurrent_inserts(self):
+        def insert(table):
+            for n in range(50):
+                self.db.table(table).insert({"n": n})
+
+        threads = [
+            threading.Thread(target=insert, args=(f"table_{i % 2}",)) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.db.table("table_0")), 200)
+        self.assertEqual(len(self.db.table("table_1")), 200)
+        self.assertEqual(self.db.storage.conflicts, 0)
+
+    def test_snapshot_is_consistent(self):
+        self.db.insert({"n": 0})
+        snapshot = self.db.storage.snapshot()
+
+        self.db.update({"n": 1})
+
+        self.assertEqual(snapshot["_default"]["1"], {"n": 0})
+
+    def test_nested_values_are_isolated(self):
+        data = {"_default": {"1": {"tags": ["red"]}}}
+        self.db.storage.write(data)
+        snapshot = self.db.storage.snapshot()
+
+        # Mutate a nested value after it was written
+        data["_default"]["1"]["tags"].append("green")
+
+        self.assertEqual(self.db.all(), [{"tags": ["red"]}])
+        self.assertEqual(snapshot["_default"]["1"], {"tags": ["red"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,15 @@
+import json
 import os
+import stat
 import tempfile
+import time
 import unittest
+from unittest.mock import patch
 
 from tinydb import TinyDB, Query
 
-from tinydbstorage.storage import FileStorage
+from tinydbstorage.schema import IndexSchema
+from tinydbstorage.storage import FileStorage, JournalFileStorage
 
 
 class TestFileStorage(unittest.TestCase):
@@ -83,6 +88,279 @@ class TestFileStorage(unittest.TestCase):
         result = self.db.all()
         self.assertEqual(result, [])
 
+    def test_filestorage_compressed(self):
+        self.db = TinyDB(path=self.temp_file.name, storage=FileStorage, codec="gzip")
+        self.db.insert({"key": "value"})
+
+        with open(self.temp_file.name, "rb") as handle:
+            self.assertEqual(handle.read(2), b"\x1f\x8b")
+        self.assertEqual(self.db.all(), [{"key": "value"}])
+
+    def test_filestorage_reads_any_codec(self):
+        # Data written without compression is still readable
+        self.db = TinyDB(path=self.temp_file.name, storage=FileStorage)
+        self.db.insert({"key": "value"})
+        self.db.close()
+
+        self.db = TinyDB(path=self.temp_file.name, storage=FileStorage, codec="lzma")
+        self.assertEqual(self.db.all(), [{"key": "value"}])
+
+    def test_iter_table(self):
+        for options in ({}, {"codec": "gzip"}, {"serializer": "msgpack"}):
+            with self.subTest(options=options):
+                self.db = TinyDB(
+                    path=self.temp_file.name, storage=FileStorage, **options
+                )
+                self.db.drop_tables()
+                self.db.insert({"key": "default"})
+                self.db.table("users").insert_multiple({"n": n} for n in range(5))
+
+                batches = list(self.db.storage.iter_table("users", batch_size=2))
+                self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+                self.assertEqual(batches[2], {"5": {"n": 4}})
+                self.assertEqual(
+                    list(self.db.storage.iter_documents("_default")),
+                    [("1", {"key": "default"})],
+                )
+                self.assertEqual(list(self.db.storage.iter_table("missing")), [])
+                self.db.close()
+
+        with self.assertRaises(ValueError):
+            self.db.storage.iter_table("users", batch_size=0)
+
+
+class TestFileStorageIndexes(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "db.json")
+        self.indexes = [
+            IndexSchema(table="users", field="email"),
+            IndexSchema(table="users", field="age", kind="sorted"),
+        ]
+        self.db = TinyDB(path=self.path, storage=FileStorage, indexes=self.indexes)
+        self.db.table("users").insert_multiple(
+            [
+                {"email": "a@example.com", "age": 30},
+                {"email": "b@example.com", "age": 20},
+                {"email": "a@example.com", "age": 25},
+            ]
+        )
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_lookup_and_range(self):
+        self.assertEqual(
+            self.db.storage.lookup("users", "email", "a@example.com"), {1, 3}
+        )
+        self.assertEqual(self.db.storage.range("users", "age", 20, 25), [2, 3])
+
+    def test_maintained_on_write(self):
+        users = self.db.table("users")
+        users.update({"email": "c@example.com"}, doc_ids=[1])
+        users.remove(doc_ids=[2])
+
+        self.assertEqual(self.db.storage.lookup("users", "email", "a@example.com"), {3})
+        self.assertEqual(self.db.storage.lookup("users", "email", "c@example.com"), {1})
+        self.assertEqual(self.db.storage.range("users", "age"), [3, 1])
+
+    def test_loaded_from_sidecar(self):
+        self.db.close()
+        self.db = TinyDB(path=self.path, storage=FileStorage, indexes=self.indexes)
+
+        with patch.object(self.db.storage, "read") as read:
+            self.assertEqual(
+                self.db.storage.lookup("users", "email", "b@example.com"), {2}
+            )
+            read.assert_not_called()
+
+    def test_stale_sidecar_rebuilt(self):
+        self.db.close()
+        self.db = TinyDB(path=self.path, storage=FileStorage)
+        self.db.table("users").insert({"email": "b@example.com", "age": 40})
+        self.db.close()
+
+        self.db = TinyDB(path=self.path, storage=FileStorage, indexes=self.indexes)
+
+        self.assertEqual(
+            self.db.storage.lookup("users", "email", "b@example.com"), {2, 4}
+        )
+
+    def test_journal_rejects_indexes(self):
+        with self.assertRaises(ValueError):
+            JournalFileStorage(
+                os.path.join(self.directory.name, "journal.json"), indexes=self.indexes
+            )
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "db.json")
+
+    def tearDown(self):
+        if hasattr(self, "db"):
+            self.db.close()
+        self.directory.cleanup()
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, durability="always")
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, group_commit=-1)
+        with self.assertRaises(ValueError):
+            JournalFileStorage(self.path, group_commit=0.01)
+
+    def test_durability_levels(self):
+        for durability, atomic, fsyncs in (
+            ("fsync", False, 1),
+            ("fsync", True, 2),
+            ("flush", False, 0),
+            ("flush", True, 0),
+            ("none", False, 0),
+        ):
+            with self.subTest(durability=durability, atomic=atomic):
+                self.db = TinyDB(
+                    path=self.path,
+                    storage=FileStorage,
+                    durability=durability,
+                    atomic=atomic,
+                )
+                with patch("os.fsync") as fsync:
+                    self.db.insert({"n": 1})
+
+                self.assertEqual(fsync.call_count, fsyncs)
+                self.assertEqual(self.db.all()[-1], {"n": 1})
+                self.db.close()
+
+                with open(self.path) as f:
+                    self.assertIn('{"n": 1}', f.read())
+
+    def test_atomic_write_replaces_file(self):
+        self.db = TinyDB(path=self.path, storage=FileStorage, atomic=True)
+        os.chmod(self.path, 0o640)
+        inode = os.stat(self.path).st_ino
+
+        self.db.insert({"n": 1})
+
+        self.assertNotEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        self.assertEqual(os.listdir(self.directory.name), ["db.json"])
+        self.db.insert({"n": 2})
+        self.assertEqual(self.db.all(), [{"n": 1}, {"n": 2}])
+
+    def test_atomic_write_with_truncating_mode(self):
+        # TinyDB warns about the mode, which atomic writes make safe
+        with self.assertWarns(UserWarning):
+            self.db = TinyDB(
+                path=self.path, storage=FileStorage, access_mode="w", atomic=True
+            )
+        self.db.insert({"n": 1})
+        self.db.insert({"n": 2})
+
+        self.assertEqual(self.db.all(), [{"n": 1}, {"n": 2}])
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {"_default": {"1": {"n": 1}, "2": {"n": 2}}})
+
+    def test_failed_directory_fsync_reopens_file(self):
+        self.db = TinyDB(
+            path=self.path, storage=FileStorage, durability="fsync", atomic=True
+        )
+
+        with patch(
+            "tinydbstorage.storage.file._fsync_directory",
+            side_effect=OSError("I/O error"),
+        ):
+            with self.assertRaises(OSError):
+                self.db.insert({"n": 1})
+
+        # The rename happened, the handle is on the new file
+        self.assertEqual(
+            os.fstat(self.db.storage._handle.fileno()).st_ino,
+            os.stat(self.path).st_ino,
+        )
+        self.db.insert({"n": 2})
+        self.assertEqual(self.db.all(), [{"n": 1}, {"n": 2}])
+
+    def test_failed_atomic_write_keeps_file(self):
+        self.db = TinyDB(path=self.path, storage=FileStorage, atomic=True)
+        self.db.insert({"n": 1})
+
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.db.insert({"n": 2})
+
+        self.assertEqual(os.listdir(self.directory.name), ["db.json"])
+        self.assertEqual(self.db.all(), [{"n": 1}])
+
+    def test_group_commit_shares_one_fsync(self):
+        self.db = TinyDB(path=self.path, storage=FileStorage, group_commit=60)
+        with patch("os.fsync") as fsync:
+            for n in range(20):
+                self.db.insert({"n": n})
+
+            # Every write is visible before it is committed
+            self.assertEqual(len(self.db), 20)
+            self.assertEqual(os.path.getsize(self.path), 0)
+            fsync.assert_not_called()
+
+            self.db.storage.flush()
+            fsync.assert_called_once()
+
+        self.assertEqual(self.db.storage.flushes, 1)
+        self.assertEqual(self.db.storage.coalesced_writes, 19)
+        with open(self.path) as f:
+            self.assertIn('"20": {"n": 19}', f.read())
+
+    def test_group_commit_in_background(self):
+        self.db = TinyDB(
+            path=self.path, storage=FileStorage, group_commit=0.01, atomic=True
+        )
+        self.db.insert({"n": 1})
+
+        deadline = time.monotonic() + 5
+        while self.db.storage.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.db.storage.flushes, 1)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '{"_default": {"1": {"n": 1}}}')
+
+    def test_close_commits_pending_write(self):
+        self.db = TinyDB(path=self.path, storage=FileStorage, group_commit=60)
+        self.db.insert({"n": 1})
+        self.db.close()
+
+        self.db = TinyDB(path=self.path, storage=FileStorage)
+        self.assertEqual(self.db.all(), [{"n": 1}])
+
+    def test_group_commit_with_indexes(self):
+        indexes = [IndexSchema(table="users", field="email")]
+        self.db = TinyDB(
+            path=self.path, storage=FileStorage, indexes=indexes, group_commit=60
+        )
+        self.db.table("users").insert({"email": "a@example.com"})
+
+        self.assertEqual(self.db.storage.lookup("users", "email", "a@example.com"), {1})
+        self.assertFalse(os.path.exists(f"{self.path}.idx"))
+        self.db.close()
+
+        self.db = TinyDB(path=self.path, storage=FileStorage, indexes=indexes)
+        with patch.object(FileStorage, "read") as read:
+            self.assertEqual(
+                self.db.storage.lookup("users", "email", "a@example.com"), {1}
+            )
+            read.assert_not_called()
+
+    def test_journal_durability(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage, durability="flush")
+        with patch("os.fsync") as fsync:
+            self.db.insert({"n": 1})
+
+        fsync.assert_not_called()
+        self.assertGreater(os.path.getsize(f"{self.path}.journal"), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
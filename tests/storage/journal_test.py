@@ -0,0 +1,182 @@
+import os
+import tempfile
+import time
+import unittest
+
+from tinydb import TinyDB, Query
+
+from tinydbstorage.storage import JournalFileStorage
+
+
+class TestJournalFileStorage(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory holding the snapshot and the journal
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "db.json")
+        self.journal_path = f"{self.path}.journal"
+
+    def tearDown(self):
+        if hasattr(self, "db") and isinstance(self.db, TinyDB):
+            self.db.close()
+
+        self.temp_dir.cleanup()
+
+    def reopen(self, **kwargs):
+        self.db.close()
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage, **kwargs)
+
+    def test_journal_round_trip(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+        self.db.insert_multiple([{"key": "A"}, {"key": "B"}, {"key": "C"}])
+        self.db.update({"key": "D"}, Query().key == "B")
+        self.db.remove(Query().key == "C")
+        self.db.table("other").insert({"key": "E"})
+
+        self.reopen()
+
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "D"}])
+        self.assertEqual(self.db.table("other").all(), [{"key": "E"}])
+
+    def test_write_appends_to_journal(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+        self.db.insert({"key": "A"})
+        size = os.path.getsize(self.journal_path)
+
+        self.db.insert({"key": "B"})
+
+        # Only the new document was appended, the snapshot is untouched
+        self.assertEqual(os.path.getsize(self.journal_path), 2 * size)
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+    def test_drop_table(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+        self.db.table("other").insert({"key": "A"})
+        self.db.drop_table("other")
+
+        self.reopen()
+
+        self.assertEqual(self.db.tables(), set())
+
+    def test_torn_tail_is_dropped(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+        self.db.insert({"key": "A"})
+        self.db.insert({"key": "B"})
+        self.db.close()
+
+        # Simulate a crash in the middle of the last record
+        size = os.path.getsize(self.journal_path)
+        with open(self.journal_path, "rb+") as journal:
+            journal.truncate(size - 3)
+
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+
+        self.assertEqual(self.db.all(), [{"key": "A"}])
+        self.db.insert({"key": "C"})
+        self.reopen()
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "C"}])
+
+    def test_corrupted_record_is_dropped(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+        self.db.insert({"key": "A"})
+        self.db.close()
+
+        with open(self.journal_path, "rb+") as journal:
+            journal.seek(-2, os.SEEK_END)
+            journal.write(b"!!")
+
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage)
+
+        self.assertEqual(self.db.all(), [])
+
+    def test_failed_update_is_not_read_back(self):
+        self.db = TinyDB(self.path, storage=JournalFileStorage)
+        self.db.insert_multiple([{"n": 1}, {"n": 2}])
+
+        def transform(doc):
+            if doc["n"] == 2:
+                raise ValueError("failed")
+            doc["n"] = 10
+
+        # The first document is changed in place before the update fails
+        with self.assertRaises(ValueError):
+            self.db.update(transform)
+
+        self.assertEqual(self.db.all(), [{"n": 1}, {"n": 2}])
+        self.db.insert({"n": 3})
+
+        self.reopen()
+        self.assertEqual(self.db.all(), [{"n": 1}, {"n": 2}, {"n": 3}])
+
+    def test_iter_documents_include_journal(self):
+        self.db = TinyDB(self.path, storage=JournalFileStorage)
+        self.db.insert({"n": 1})
+        self.db.insert({"n": 2})
+        self.db.update({"n": 3}, doc_ids=[1])
+
+        self.assertEqual(
+            list(self.db.storage.iter_documents("_default")),
+            [("1", {"n": 3}), ("2", {"n": 2})],
+        )
+
+    def test_compaction(self):
+        self.db = TinyDB(
+            path=self.path,
+            storage=JournalFileStorage,
+            compact_min_bytes=0,
+            compact_ratio=0,
+        )
+        self.db.insert_multiple([{"key": "A"}, {"key": "B"}])
+
+        self.assertEqual(self.db.storage.compactions, 1)
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+        self.assertGreater(os.path.getsize(self.path), 0)
+
+        self.reopen()
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "B"}])
+
+    def test_compact_on_demand(self):
+        self.db = TinyDB(path=self.path, storage=JournalFileStorage, codec="gzip")
+        self.db.insert({"key": "A"})
+
+        self.db.storage.compact()
+        self.db.insert({"key": "B"})
+
+        self.reopen(codec="gzip")
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "B"}])
+
+    def test_compact_with_truncating_mode(self):
+        with self.assertWarns(UserWarning):
+            self.db = TinyDB(
+                path=self.path, storage=JournalFileStorage, access_mode="w"
+            )
+        self.db.insert({"key": "A"})
+
+        self.db.storage.compact()
+        self.db.insert({"key": "B"})
+
+        self.assertGreater(os.path.getsize(self.path), 0)
+        self.reopen()
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "B"}])
+
+    def test_background_compaction(self):
+        self.db = TinyDB(
+            path=self.path,
+            storage=JournalFileStorage,
+            compact_min_bytes=0,
+            background_compaction=True,
+        )
+        self.db.insert({"key": "A"})
+
+        for _ in range(100):
+            if self.db.storage.compactions:
+                break
+            time.sleep(0.01)
+
+        self.assertGreaterEqual(self.db.storage.compactions, 1)
+        self.db.insert({"key": "B"})
+        self.reopen()
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "B"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tinydb import TinyDB, Query
+
+from tinydbstorage.storage import MappedFileStorage
+from tinydbstorage.storage.mapped import LazyTable
+
+
+class TestMappedFileStorage(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory holding the mapped file
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "db.tdb")
+        self.db = TinyDB(path=self.path, storage=MappedFileStorage)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_read_empty(self):
+        self.assertIsNone(self.db.storage.read())
+        self.assertEqual(self.db.all(), [])
+
+    def test_round_trip(self):
+        self.db.insert_multiple([{"key": "A"}, {"key": "B"}, {"key": "C"}])
+        self.db.update({"key": "D"}, Query().key == "B")
+        self.db.remove(Query().key == "C")
+        self.db.table("other").insert({"key": "E"})
+        self.db.close()
+
+        self.db = TinyDB(path=self.path, storage=MappedFileStorage)
+
+        self.assertEqual(self.db.all(), [{"key": "A"}, {"key": "D"}])
+        self.assertEqual(self.db.get(doc_id=2), {"key": "D"})
+        self.assertEqual(self.db.table("other").all(), [{"key": "E"}])
+        self.assertEqual(self.db.tables(), {"_default", "other"})
+
+    def test_read_is_lazy(self):
+        self.db.insert_multiple([{"key": "A"}, {"key": "B"}])
+
+        with patch.object(
+            self.db.storage.serializer,
+            "loads",
+            wraps=self.db.storage.serializer.loads,
+        ) as loads:
+            table = self.db.storage.read()["_default"]
+            self.assertIsInstance(table, LazyTable)
+            self.assertEqual(len(table), 2)
+
+            # Only the table index and the requested document are decoded
+            self.assertEqual(self.db.get(doc_id=2), {"key": "B"})
+            self.assertEqual(loads.call_count, 2)
+
+    def test_untouched_tables_are_copied_without_decoding(self):
+        self.db.table("big").insert_multiple([{"n": n} for n in range(10)])
+
+        with patch.object(
+            self.db.storage.serializer,
+            "loads",
+            wraps=self.db.storage.serializer.loads,
+        ) as loads:
+            self.db.table("small").insert({"n": 1})
+            decoded = [call.args[0] for call in loads.call_args_list]
+
+        self.assertNotIn(b'{"n": 5}', decoded)
+        self.assertEqual(len(self.db.table("big")), 10)
+
+    def test_lazy_table_mutation(self):
+        self.db.insert_multiple([{"key": "A"}, {"key": "B"}])
+        data = self.db.storage.read()
+
+        data["_default"]["1"] = {"key": "C"}
+        del data["_default"]["2"]
+        data["_default"]["3"] = {"key": "D"}
+        self.db.storage.write(data)
+
+        self.assertEqual(self.db.all(), [{"key": "C"}, {"key": "D"}])
+
+    def test_drop_table(self):
+        self.db.table("other").insert({"key": "A"})
+
+        self.db.drop_table("other")
+
+        self.assertEqual(self.db.tables(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
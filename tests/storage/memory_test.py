@@ -1,8 +1,11 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
 from tinydb import TinyDB, Query
 
-from tinydbstorage.storage import MemoryStorage
+from tinydbstorage.storage import FileStorage, MemoryStorage
 
 
 class TestMemoryStorage(unittest.TestCase):
@@ -85,6 +88,205 @@ class TestMemoryStorage(unittest.TestCase):
         # Check if the queried data is correct
         self.assertEqual(queried_data, [{"count": 7, "type": "apple"}])
 
+    def test_memorystorage_read_is_isolated(self):
+        self.db.insert({"count": 7, "type": "apple"})
+
+        # Mutate the data read without writing it back
+        data_read = self.db.storage.read()
+        data_read["_default"]["1"]["count"] = 0
+        data_read["other"] = {}
+
+        self.assertEqual(self.db.all(), [{"count": 7, "type": "apple"}])
+        self.assertEqual(self.db.tables(), {"_default"})
+
+    def test_memorystorage_write_is_isolated(self):
+        data = {"_default": {"1": {"count": 7}}}
+        self.db.storage.write(data)
+
+        # Mutate the data after it was written
+        data["_default"]["1"]["count"] = 0
+        data["_default"]["2"] = {"count": 3}
+
+        self.assertEqual(self.db.all(), [{"count": 7}])
+
+    def test_memorystorage_nested_values_are_isolated(self):
+        tags = ["red"]
+        self.db.insert({"type": "apple", "tags": tags, "size": {"cm": 7}})
+        snapshot = self.db.storage.snapshot()
+
+        # Mutate the nested values written, read and updated in place
+        tags.append("green")
+        self.db.all()[0]["size"]["cm"] = 0
+        self.db.update(lambda doc: doc["tags"].append("yellow"))
+
+        self.assertEqual(
+            snapshot["_default"]["1"],
+            {"type": "apple", "tags": ["red"], "size": {"cm": 7}},
+        )
+        self.assertEqual(
+            self.db.all(),
+            [{"type": "apple", "tags": ["red", "yellow"], "size": {"cm": 7}}],
+        )
+
+    def test_memorystorage_write_shares_untouched_tables(self):
+        self.db.table("a").insert({"count": 7})
+        self.db.table("b").insert({"count": 3})
+        table_a = self.db.storage.internal_memory["a"]
+        table_b = self.db.storage.internal_memory["b"]
+
+        self.db.table("b").update({"count": 4})
+
+        self.assertIs(self.db.storage.internal_memory["a"], table_a)
+        self.assertIsNot(self.db.storage.internal_memory["b"], table_b)
+
+    def test_memorystorage_snapshot(self):
+        self.db.insert({"count": 7, "type": "apple"})
+
+        snapshot = self.db.storage.snapshot()
+        self.db.update({"count": 2})
+        self.db.insert({"count": 3, "type": "peach"})
+        self.db.table("other").insert({"count": 1})
+
+        # The snapshot keeps the version it was taken from
+        self.assertEqual(set(snapshot), {"_default"})
+        self.assertEqual(snapshot["_default"], {"1": {"count": 7, "type": "apple"}})
+        snapshot["_default"]["1"]["count"] = 0
+        self.assertEqual(snapshot["_default"]["1"], {"count": 7, "type": "apple"})
+
+    def test_memorystorage_snapshot_serialized(self):
+        self.db = TinyDB(storage=MemoryStorage, serializer="json")
+        self.db.insert({"count": 7})
+
+        snapshot = self.db.storage.snapshot()
+        self.db.update({"count": 2})
+
+        self.assertEqual(snapshot["_default"], {"1": {"count": 7}})
+
+
+class TestBoundedMemoryStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spill = FileStorage(os.path.join(self.temp_dir.name, "spill.json"))
+        self.db = TinyDB(storage=MemoryStorage, max_documents=4, spill=self.spill)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            MemoryStorage(max_documents=1)
+        with self.assertRaises(ValueError):
+            MemoryStorage(max_documents=1, spill=self.spill, serializer="json")
+        with self.assertRaises(ValueError):
+            MemoryStorage(max_documents=1, spill=self.spill, eviction="fifo")
+
+    def test_evicts_least_recently_used_table(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}])
+        self.db.table("b").insert_multiple([{"n": 3}, {"n": 4}])
+        self.db.table("a").all()
+
+        self.db.table("c").insert({"n": 5})
+
+        storage = self.db.storage
+        self.assertEqual(set(storage.internal_memory), {"a", "c"})
+        self.assertEqual(storage.evictions, 1)
+        self.assertEqual(storage.resident_size, 3)
+        self.assertEqual(self.spill.read(), {"b": {"1": {"n": 3}, "2": {"n": 4}}})
+        self.assertEqual(self.db.tables(), {"a", "b", "c"})
+
+    def test_evicts_least_frequently_used_table(self):
+        self.db = TinyDB(
+            storage=MemoryStorage, max_documents=4, spill=self.spill, eviction="lfu"
+        )
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}])
+        self.db.table("b").insert_multiple([{"n": 3}, {"n": 4}])
+        for _ in range(3):
+            self.db.table("b").all()
+        self.db.table("a").all()
+
+        self.db.table("c").insert({"n": 5})
+
+        self.assertEqual(set(self.db.storage.internal_memory), {"b", "c"})
+
+    def test_spilled_table_is_faulted_in(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+
+        storage = self.db.storage
+        self.assertIn("a", storage._spilled)
+        misses = storage.misses
+
+        self.assertEqual(self.db.table("a").count(Query().n > 1), 2)
+
+        self.assertEqual(storage.misses, misses + 1)
+        self.assertEqual(set(storage.internal_memory), {"a"})
+
+        hits = storage.hits
+        self.db.table("a").all()
+        self.assertEqual(storage.hits, hits + 1)
+        self.assertEqual(storage.misses, misses + 1)
+
+    def test_unchanged_table_is_not_spilled_again(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+        self.db.table("a").all()
+
+        with patch.object(self.spill, "write", wraps=self.spill.write) as write:
+            self.db.table("b").all()
+
+        # "b" was loaded and "a" evicted, unchanged since it was spilled
+        self.assertEqual(write.call_count, 0)
+
+    def test_update_spilled_table(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+
+        self.db.table("a").update({"n": 0}, Query().n == 1)
+        self.db.table("b").all()
+
+        self.assertEqual(self.db.table("a").all(), [{"n": 0}, {"n": 2}, {"n": 3}])
+        self.assertEqual(self.db.table("b").all(), [{"n": 4}, {"n": 5}])
+
+    def test_drop_spilled_table(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+
+        self.db.drop_table("a")
+
+        self.assertEqual(self.db.tables(), {"b"})
+        self.assertNotIn("a", self.spill.read())
+
+    def test_max_bytes(self):
+        self.db = TinyDB(storage=MemoryStorage, max_bytes=64, spill=self.spill)
+        self.db.table("a").insert({"text": "x" * 40})
+        self.db.table("b").insert({"text": "y" * 40})
+
+        self.assertEqual(set(self.db.storage.internal_memory), {"b"})
+        self.assertLessEqual(self.db.storage.resident_size, 64)
+        self.assertEqual(self.db.table("a").all(), [{"text": "x" * 40}])
+
+    def test_snapshot_with_spilled_tables(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+
+        snapshot = self.db.storage.snapshot()
+
+        self.assertEqual(set(snapshot), {"a", "b"})
+        self.assertEqual(snapshot["a"]["2"], {"n": 2})
+
+    def test_snapshot_pins_spilled_tables(self):
+        self.db.table("a").insert_multiple([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.db.table("b").insert_multiple([{"n": 4}, {"n": 5}])
+        snapshot = self.db.storage.snapshot()
+
+        # "a" is loaded back, changed and spilled again
+        self.db.table("a").update({"n": 0})
+        self.db.table("b").all()
+        self.assertIn("a", self.db.storage._spilled)
+
+        self.assertEqual(snapshot["a"], {"1": {"n": 1}, "2": {"n": 2}, "3": {"n": 3}})
+
 
 if __name__ == "__main__":
     unittest.main()
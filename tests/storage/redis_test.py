@@ -1,9 +1,14 @@
 import json
+import os
 import unittest
-from unittest.mock import patch
+import zlib
+from unittest.mock import MagicMock, patch
 
-from tinydb import TinyDB
+import redis
+from tinydb import Query, TinyDB
 
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.schema import IndexSchema, RetrySchema
 from tinydbstorage.storage.redis import RedisStorage
 
 
@@ -71,5 +76,647 @@ class TestRedisStorage(unittest.TestCase):
         mock_strict_redis.return_value.close.assert_called_once()
 
 
+class TestRedisHashStorage(unittest.TestCase):
+    def setUp(self):
+        # Use the hash layout with a mocked connection
+        self.storage = RedisStorage("redis://localhost:6379/1", layout="hash")
+        self.storage.connection = MagicMock()
+        self.pipe = self.storage.connection.pipeline.return_value
+
+        # One table with two documents is stored in Redis, the pipeline
+        # answers the version and table names, the hashes, then the write
+        self.pipe.execute.side_effect = [
+            [b"1", {b"_default"}],
+            [{b"1": b'{"value": "A"}', b"2": b'{"value": "B"}'}],
+            [1, 1, 2],
+        ]
+
+    def test_read_hash(self):
+        data_read = self.storage.read()
+
+        self.pipe.smembers.assert_called_once_with("tiny_db")
+        self.pipe.hgetall.assert_called_once_with("tiny_db:_default")
+        self.assertEqual(
+            data_read, {"_default": {"1": {"value": "A"}, "2": {"value": "B"}}}
+        )
+
+    def test_write_only_changed_documents(self):
+        data = self.storage.read()
+        data["_default"]["1"]["value"] = "C"
+        del data["_default"]["2"]
+        data["_default"]["3"] = {"value": "D"}
+
+        self.storage.write(data)
+
+        self.pipe.hset.assert_called_once_with(
+            "tiny_db:_default",
+            mapping={b"1": b'{"value": "C"}', b"3": b'{"value": "D"}'},
+        )
+        self.pipe.hdel.assert_called_once_with("tiny_db:_default", b"2")
+        self.pipe.sadd.assert_not_called()
+
+    def test_write_unchanged_sends_nothing(self):
+        self.storage.write(self.storage.read())
+
+        self.pipe.hset.assert_not_called()
+        self.pipe.hdel.assert_not_called()
+
+    def test_write_new_and_dropped_tables(self):
+        self.storage.read()
+        self.storage.write({"users": {"1": {"name": "foo"}}})
+
+        self.pipe.sadd.assert_called_once_with("tiny_db", "users")
+        self.pipe.hset.assert_called_once_with(
+            "tiny_db:users", mapping={b"1": b'{"name": "foo"}'}
+        )
+        self.pipe.delete.assert_called_once_with("tiny_db:_default")
+        self.pipe.srem.assert_called_once_with("tiny_db", "_default")
+
+    def test_write_bumps_version(self):
+        self.storage.write(self.storage.read())
+
+        self.pipe.incr.assert_called_once_with("tiny_db:__version__")
+
+    def test_iter_table_scans_hash(self):
+        self.storage.connection.hscan.side_effect = [
+            (b"7", {b"1": b'{"value": "A"}', b"2": b'{"value": "B"}'}),
+            (0, {b"3": b'{"value": "C"}'}),
+        ]
+
+        batches = list(self.storage.iter_table("_default", batch_size=2))
+
+        self.assertEqual(
+            batches,
+            [{"1": {"value": "A"}, "2": {"value": "B"}}, {"3": {"value": "C"}}],
+        )
+        self.storage.connection.hscan.assert_called_with(
+            "tiny_db:_default", b"7", count=2
+        )
+        self.pipe.execute.assert_not_called()
+
+    def test_iter_documents_blob_layout(self):
+        storage = RedisStorage("redis://localhost:6379/1", codec="gzip")
+        storage.connection = MagicMock()
+        storage.connection.get.return_value = storage._compress(
+            json.dumps({"_default": {"1": {"value": "A"}}, "users": {"2": {}}})
+        )
+
+        self.assertEqual(
+            list(storage.iter_documents("_default")), [("1", {"value": "A"})]
+        )
+
+        storage.connection.get.return_value = None
+        self.assertEqual(list(storage.iter_documents("_default")), [])
+
+    def test_search_filters_in_redis(self):
+        script = self.storage.connection.register_script.return_value
+        script.side_effect = [
+            [b"5", b"1", b'{"value": "A"}'],
+            # A false positive of the script is dropped
+            [b"0", b"3", b'{"value": "B"}', b"4", b'{"value": "A"}'],
+        ]
+
+        documents = self.storage.search("_default", Query().value == "A", batch_size=10)
+
+        self.assertEqual(documents, [{"value": "A"}, {"value": "A"}])
+        self.assertEqual([doc.doc_id for doc in documents], [1, 4])
+        script.assert_called_with(
+            keys=["tiny_db:_default"],
+            args=['["==", ["value"], "A"]', b"5", 10],
+        )
+        self.assertEqual(self.storage.server_searches, 1)
+        self.pipe.execute.assert_not_called()
+
+    def test_search_falls_back_to_client(self):
+        self.storage.connection.hscan.return_value = (
+            0,
+            {b"1": b'{"value": "A"}', b"2": b'{"value": "B"}'},
+        )
+
+        documents = self.storage.search("_default", Query().value.matches("[B-Z]"))
+
+        self.assertEqual(documents, [{"value": "B"}])
+        self.assertEqual(documents[0].doc_id, 2)
+        self.assertEqual(self.storage.client_searches, 1)
+        self.storage.connection.register_script.assert_not_called()
+
+        self.storage.codec = "gzip"
+        self.storage.connection.hscan.return_value = (
+            0,
+            {b"1": self.storage._compress(b'{"value": "A"}')},
+        )
+        self.assertEqual(
+            self.storage.search("_default", Query().value == "A"), [{"value": "A"}]
+        )
+        self.assertEqual(self.storage.client_searches, 2)
+
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            RedisStorage("redis://localhost:6379/1", layout="foo")
+
+
+class TestRedisOptimisticStorage(unittest.TestCase):
+    def setUp(self):
+        # Use optimistic writes with a mocked connection and no backoff
+        self.storage = RedisStorage(
+            "redis://localhost:6379/1",
+            optimistic=True,
+            retry=RetrySchema(max_retries=2, base_delay=0),
+        )
+        self.storage.connection = MagicMock()
+        self.pipe = self.storage.connection.pipeline.return_value
+        self.watched = self.pipe.__enter__.return_value
+
+        # Version 1 of the database is stored in Redis
+        self.pipe.execute.return_value = [b"1", json.dumps({"_default": {}})]
+
+    def test_read_remembers_version(self):
+        data_read = self.storage.read()
+
+        self.pipe.get.assert_any_call("tiny_db:__version__")
+        self.assertEqual(data_read, {"_default": {}})
+
+    def test_write_without_conflict(self):
+        self.storage.read()
+        self.watched.get.return_value = b"1"
+        self.watched.execute.return_value = [True, 2]
+
+        self.storage.write({"_default": {"1": {"value": "A"}}})
+
+        self.watched.watch.assert_called_once_with("tiny_db:__version__")
+        self.watched.multi.assert_called_once()
+        self.watched.set.assert_called_once_with(
+            "tiny_db", json.dumps({"_default": {"1": {"value": "A"}}})
+        )
+        self.watched.incr.assert_called_once_with("tiny_db:__version__")
+        self.assertEqual(self.storage.conflicts, 0)
+
+        # The next write is based on the version this write produced
+        self.watched.get.return_value = b"2"
+        self.storage.write({"_default": {}})
+        self.assertEqual(self.storage.conflicts, 0)
+
+    def test_write_with_stale_version(self):
+        self.storage.read()
+        self.watched.get.return_value = b"2"
+
+        with self.assertRaises(WriteConflictError):
+            self.storage.write({"_default": {}})
+
+        self.watched.multi.assert_not_called()
+        self.assertEqual(self.storage.conflicts, 1)
+
+    def test_write_with_concurrent_exec(self):
+        self.storage.read()
+        self.watched.get.return_value = b"1"
+        self.watched.execute.side_effect = redis.WatchError()
+
+        with self.assertRaises(WriteConflictError):
+            self.storage.write({"_default": {}})
+
+        self.assertEqual(self.storage.conflicts, 1)
+
+    def test_retry_on_conflict(self):
+        operation = MagicMock(side_effect=[WriteConflictError(), "done"])
+
+        result = self.storage.retry_on_conflict(operation, "foo", bar=1)
+
+        self.assertEqual(result, "done")
+        operation.assert_called_with("foo", bar=1)
+        self.assertEqual(self.storage.retries, 1)
+
+    def test_retry_on_conflict_exhausted(self):
+        operation = MagicMock(side_effect=WriteConflictError())
+
+        with self.assertRaises(WriteConflictError):
+            self.storage.retry_on_conflict(operation)
+
+        self.assertEqual(operation.call_count, 3)
+        self.assertEqual(self.storage.retries, 2)
+
+
+class TestRedisCachedStorage(unittest.TestCase):
+    def setUp(self):
+        # Use the read cache with a mocked connection
+        self.storage = RedisStorage("redis://localhost:6379/1", cache=True)
+        self.storage.connection = MagicMock()
+        self.pipe = self.storage.connection.pipeline.return_value
+
+        # Version 1 of the database is stored in Redis
+        self.data = {"_default": {"1": {"value": "A"}}}
+        self.pipe.execute.return_value = [b"1", json.dumps(self.data)]
+
+    def test_read_revalidates_with_version(self):
+        self.storage.connection.get.return_value = b"1"
+
+        self.assertEqual(self.storage.read(), self.data)
+        self.assertEqual(self.storage.read(), self.data)
+
+        # The data was only fetched once, the second read checked the version
+        self.pipe.execute.assert_called_once()
+        self.storage.connection.get.assert_called_once_with("tiny_db:__version__")
+
+    def test_read_refetches_changed_version(self):
+        self.storage.connection.get.return_value = b"2"
+
+        self.storage.read()
+        self.storage.read()
+
+        self.assertEqual(self.pipe.execute.call_count, 2)
+
+    def test_read_within_ttl_skips_redis(self):
+        self.storage.cache_ttl = 60
+
+        self.storage.read()
+        self.storage.read()
+
+        self.pipe.execute.assert_called_once()
+        self.storage.connection.get.assert_not_called()
+
+    def test_read_returns_copies(self):
+        self.storage.cache_ttl = 60
+
+        self.storage.read()["_default"]["2"] = {"value": "B"}
+
+        self.assertEqual(self.storage.read(), self.data)
+
+    def test_failed_update_is_not_cached(self):
+        self.storage.cache_ttl = 60
+        self.data = {"_default": {"1": {"tags": ["a"]}, "2": {"tags": None}}}
+        self.pipe.execute.return_value = [b"1", json.dumps(self.data)]
+        db = TinyDB(storage=lambda: self.storage)
+
+        def transform(doc):
+            doc["tags"].append("b")
+
+        # The first document is changed in place before the update fails
+        with self.assertRaises(AttributeError):
+            db.update(transform)
+
+        self.assertEqual(self.storage.read(), self.data)
+        self.pipe.execute.assert_called_once()
+
+    def test_written_documents_are_copied(self):
+        self.storage.cache_ttl = 60
+        self.storage.read()
+        self.pipe.execute.return_value = [True, 2]
+
+        data_to_write = {"_default": {"1": {"tags": ["a"]}}}
+        self.storage.write(data_to_write)
+        data_to_write["_default"]["1"]["tags"].append("b")
+
+        self.assertEqual(self.storage.read(), {"_default": {"1": {"tags": ["a"]}}})
+
+    def test_write_updates_cache(self):
+        self.storage.cache_ttl = 60
+        self.storage.read()
+        self.pipe.execute.return_value = [True, 2]
+
+        data_to_write = {"_default": {"1": {"value": "B"}}}
+        self.storage.write(data_to_write)
+
+        self.assertEqual(self.storage.read(), data_to_write)
+        self.assertEqual(self.pipe.execute.call_count, 2)
+
+    def test_interleaved_writer_drops_cache(self):
+        connection = FakeRedis()
+        first, second = (
+            RedisStorage("redis://localhost:6379/1", layout="hash", cache=True)
+            for _ in range(2)
+        )
+        first.connection = second.connection = connection
+        first.write({"_default": {"1": {"n": 1}, "2": {"n": 2}}})
+
+        # The first writer reads, the second one changes document 1
+        data = first.read()
+        second.read()
+        second.write({"_default": {"1": {"n": 10}, "2": {"n": 2}}})
+        data["_default"]["2"] = {"n": 20}
+        first.write(data)
+
+        self.assertIsNone(first._cache)
+        self.assertEqual(first.read(), {"_default": {"1": {"n": 10}, "2": {"n": 20}}})
+
+    def test_failed_write_drops_cache(self):
+        self.storage.cache_ttl = 60
+        self.storage.read()
+        self.pipe.execute.side_effect = redis.ConnectionError()
+
+        with self.assertRaises(redis.ConnectionError):
+            self.storage.write({"_default": {}})
+
+        self.assertIsNone(self.storage._cache)
+
+
+class TestRedisCompressedStorage(unittest.TestCase):
+    def setUp(self):
+        self.storage = RedisStorage("redis://localhost:6379/1", codec="zlib")
+        self.storage.connection = MagicMock()
+        self.pipe = self.storage.connection.pipeline.return_value
+
+    def test_write_compressed(self):
+        data_to_write = {"_default": {"1": {"value": "A"}}}
+
+        self.storage.write(data_to_write)
+
+        stored = self.pipe.set.call_args.args[1]
+        self.assertEqual(zlib.decompress(stored), json.dumps(data_to_write).encode())
+
+    def test_read_compressed_and_plain(self):
+        data = {"_default": {"1": {"value": "A"}}}
+
+        self.storage.connection.get.return_value = zlib.compress(
+            json.dumps(data).encode()
+        )
+        self.assertEqual(self.storage.read(), data)
+
+        self.storage.connection.get.return_value = json.dumps(data).encode()
+        self.assertEqual(self.storage.read(), data)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            RedisStorage("redis://localhost:6379/1", codec="foo")
+
+
+class FakeRedis:
+    """
+    An in-memory stand-in for the Redis commands used by the indexes.
+    """
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store[key] = value if isinstance(value, bytes) else value.encode()
+
+    def incr(self, key):
+        value = int(self.store.get(key, b"0")) + 1
+        self.store[key] = str(value).encode()
+        return value
+
+    def smembers(self, key):
+        return set(self.store.get(key, set()))
+
+    def sadd(self, key, *members):
+        self.store.setdefault(key, set()).update(_encode(m) for m in members)
+
+    def srem(self, key, *members):
+        self._shrink(key, lambda value: value.difference_update(map(_encode, members)))
+
+    def hgetall(self, key):
+        return dict(self.store.get(key, {}))
+
+    def hset(self, key, mapping):
+        self.store.setdefault(key, {}).update(
+            {_encode(k): _encode(v) for k, v in mapping.items()}
+        )
+
+    def hdel(self, key, *fields):
+        self._shrink(key, lambda value: [value.pop(_encode(f), None) for f in fields])
+
+    def zadd(self, key, mapping):
+        self.store.setdefault(key, {}).update(
+            {_encode(k): float(v) for k, v in mapping.items()}
+        )
+
+    def zrem(self, key, *members):
+        self._shrink(key, lambda value: [value.pop(_encode(m), None) for m in members])
+
+    def zrange(self, key, start, end):
+        return self._sorted(key)
+
+    def zrangebyscore(self, key, low, high):
+        def inside(score):
+            return _score_check(score, low, 1) and _score_check(score, high, -1)
+
+        return [m for m in self._sorted(key) if inside(self.store[key][m])]
+
+    def zrangebylex(self, key, low, high):
+        def inside(member):
+            return _lex_check(member, low, 1) and _lex_check(member, high, -1)
+
+        return [m for m in self._sorted(key) if inside(m.decode())]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _sorted(self, key):
+        value = self.store.get(key, {})
+        return sorted(value, key=lambda member: (value[member], member))
+
+    def _shrink(self, key, change):
+        if key in self.store:
+            change(self.store[key])
+            if not self.store[key]:
+                del self.store[key]
+
+
+class FakePipeline:
+    def __init__(self, connection):
+        self.connection = connection
+        self.commands = []
+        self.watched = None
+        self.immediate = False
+
+    def __getattr__(self, name):
+        command = getattr(self.connection, name)
+
+        def queue(*args, **kwargs):
+            if self.immediate:
+                return command(*args, **kwargs)
+
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def watch(self, key):
+        self.watched = (key, self.connection.get(key))
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    def execute(self):
+        if self.watched is not None:
+            key, value = self.watched
+            if self.connection.get(key) != value:
+                raise redis.WatchError(key)
+
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def _encode(value):
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+def _score_check(score, bound, sign):
+    if bound in ("-inf", "+inf"):
+        return True
+    if bound.startswith("("):
+        return (score - float(bound[1:])) * sign > 0
+    return (score - float(bound)) * sign >= 0
+
+
+def _lex_check(member, bound, sign):
+    if bound in ("-", "+"):
+        return True
+    if sign > 0:
+        return member >= bound[1:] if bound[0] == "[" else member > bound[1:]
+    return member <= bound[1:] if bound[0] == "[" else member < bound[1:]
+
+
+class TestRedisIndexes(unittest.TestCase):
+    def setUp(self):
+        self.connection = FakeRedis()
+        self.indexes = [
+            IndexSchema(table="users", field="email"),
+            IndexSchema(table="users", field="age", kind="sorted"),
+            IndexSchema(table="users", field="name", kind="sorted"),
+        ]
+        self.db = self.open()
+        self.db.table("users").insert_multiple(
+            [
+                {"email": "a@example.com", "age": 30, "name": "John"},
+                {"email": "b@example.com", "age": 20, "name": "Jane"},
+                {"email": "a@example.com", "age": 25, "name": "Jack"},
+            ]
+        )
+
+    def open(self, **kwargs):
+        db = TinyDB(
+            storage=RedisStorage,
+            redis_uri="redis://localhost:6379/1",
+            indexes=self.indexes,
+            **kwargs,
+        )
+        db.storage.connection = self.connection
+        return db
+
+    def test_lookup(self):
+        self.assertEqual(
+            self.db.storage.lookup("users", "email", "a@example.com"), {1, 3}
+        )
+        self.assertEqual(self.db.storage.lookup("users", "age", 20), {2})
+        self.assertEqual(
+            self.db.storage.lookup("users", "email", "c@example.com"), set()
+        )
+
+    def test_range(self):
+        storage = self.db.storage
+
+        self.assertEqual(storage.range("users", "age", 20, 25), [2, 3])
+        self.assertEqual(storage.range("users", "age", 20, include_low=False), [3, 1])
+        self.assertEqual(storage.range("users", "name", "Jack", "Jane"), [3, 2])
+        self.assertEqual(
+            storage.range("users", "name", "Jack", "Jane", include_high=False), [3]
+        )
+        self.assertEqual(storage.range("users", "name", low="Jane"), [2, 1])
+        with self.assertRaises(ValueError):
+            storage.range("users", "email")
+
+    def test_maintained_on_write(self):
+        users = self.db.table("users")
+        users.update({"email": "c@example.com", "age": 50}, doc_ids=[1])
+        users.remove(doc_ids=[2])
+
+        self.assertEqual(self.db.storage.lookup("users", "email", "a@example.com"), {3})
+        self.assertEqual(self.db.storage.lookup("users", "email", "c@example.com"), {1})
+        self.assertEqual(self.db.storage.range("users", "age"), [3, 1])
+        self.assertNotIn(
+            'tiny_db:__index__:users:email:"b@example.com"', self.connection.store
+        )
+
+    def test_other_writer_reloads_values(self):
+        other = self.open()
+        other.table("users").update({"email": "d@example.com"}, doc_ids=[3])
+
+        self.db.table("users").update({"email": "e@example.com"}, doc_ids=[1])
+
+        self.assertEqual(
+            self.db.storage.lookup("users", "email", "a@example.com"), set()
+        )
+        self.assertEqual(self.db.storage.lookup("users", "email", "d@example.com"), {3})
+
+    def test_built_from_existing_data(self):
+        self.indexes.append(IndexSchema(table="users", field="name"))
+        db = self.open()
+
+        self.assertEqual(db.storage.lookup("users", "name", "Jane"), {2})
+        self.assertIn(
+            b"users:name:hash", self.connection.smembers("tiny_db:__indexes__")
+        )
+
+    def test_optimistic_write(self):
+        db = self.open(optimistic=True)
+        db.table("users").update({"age": 21}, doc_ids=[2])
+
+        self.assertEqual(db.storage.range("users", "age", 21, 21), [2])
+
+
+@unittest.skipUnless(
+    os.environ.get("TINYDB_TEST_REDIS_URI"), "TINYDB_TEST_REDIS_URI is not set"
+)
+class TestRedisServerSearch(unittest.TestCase):
+    """Compares the Lua search script with TinyDB on a real Redis."""
+
+    def setUp(self):
+        self.db = TinyDB(
+            storage=RedisStorage,
+            redis_uri=os.environ["TINYDB_TEST_REDIS_URI"],
+            prefix="tinydbstorage_test_search",
+            layout="hash",
+        )
+        self.db.drop_tables()
+        self.table = self.db.table("users")
+        self.table.insert_multiple(
+            [
+                {"name": "Ann", "age": 17, "active": True, "address": {"city": "Oslo"}},
+                {"name": "Bob", "age": 30.5, "active": False, "tags": ["a"]},
+                {"name": "Cid", "age": "old", "active": 1, "address": None},
+                {"name": "Dee", "age": None},
+                {"name": "Eve", "age": 42, "address": {"city": "Rome"}},
+            ]
+        )
+
+    def tearDown(self):
+        self.db.drop_tables()
+        self.db.close()
+
+    def test_same_results_as_tinydb(self):
+        q = Query()
+        for cond in (
+            q.name == "Bob",
+            q.age == None,
+            q.age != 17,
+            q.name >= "C",
+            q.active == True,
+            q.active == 1,
+            q.address.city == "Rome",
+            q.address.exists(),
+            ~q.address.city.exists(),
+            q.name.one_of(["Ann", "Eve", "Zed"]),
+            (q.name > "A") & ~(q.name == "Eve") | (q.active == False),
+        ):
+            with self.subTest(cond=cond):
+                # Hash fields come back in no particular order
+                expected = {doc.doc_id: doc for doc in self.table.search(cond)}
+                before = self.db.storage.server_searches
+                found = self.db.storage.search("users", cond)
+                self.assertEqual({doc.doc_id: doc for doc in found}, expected)
+                self.assertEqual(self.db.storage.server_searches, before + 1)
+
+
 if __name__ == "__main__":
     unittest.main()
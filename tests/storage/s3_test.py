@@ -1,5 +1,10 @@
+import gc
+import gzip
+import io
 import json
+import time
 import unittest
+import weakref
 from unittest.mock import MagicMock, patch
 
 from botocore.exceptions import ClientError
@@ -7,11 +12,17 @@ from tinydb import TinyDB
 
 from tinydbstorage.schema import S3Schema
 from tinydbstorage.storage import S3Storage
+from tinydbstorage.registry import registry
+from tinydbstorage.storage import s3
+from tinydbstorage.storage.s3 import clear_resources
 
 
 class TestS3Storage(unittest.TestCase):
     @patch("tinydbstorage.storage.s3.boto3.resource")
     def setUp(self, mock_boto_resource):
+        # Do not reuse the resource cached by a previous test
+        clear_resources()
+
         # Mock the S3 client
         self.mock_s3_client = mock_boto_resource.return_value
 
@@ -72,6 +83,461 @@ class TestS3Storage(unittest.TestCase):
             Body=json.dumps(data_to_write)
         )
 
+    def test_read_not_modified_uses_cache(self):
+        # The first read downloads the object and remembers its ETag
+        data = {"key1": {"value": "A"}}
+        mock_s3_get = self.mock_s3_client.Object.return_value.get
+        mock_s3_get.return_value = {"Body": MagicMock(), "ETag": '"v1"'}
+        mock_s3_get.return_value["Body"].read.return_value = json.dumps(data).encode()
+        self.assertEqual(self.db.storage.read(), data)
+
+        # The second read is conditional and S3 answers 304
+        mock_s3_get.side_effect = ClientError(
+            {"Error": {"Code": "304"}}, "operation_name"
+        )
+        self.assertEqual(self.db.storage.read(), data)
+        mock_s3_get.assert_called_with(IfNoneMatch='"v1"')
+
+    def test_read_within_max_staleness_skips_s3(self):
+        self.db.storage.max_staleness = 60
+        mock_s3_get = self.mock_s3_client.Object.return_value.get
+        mock_s3_get.return_value = {"Body": MagicMock(), "ETag": '"v1"'}
+        mock_s3_get.return_value["Body"].read.return_value = b"{}"
+
+        self.db.storage.read()
+        self.db.storage.read()
+
+        mock_s3_get.assert_called_once_with()
+
+    def test_write_updates_cache(self):
+        self.db.storage.max_staleness = 60
+        self.mock_s3_client.Object.return_value.put.return_value = {"ETag": '"v2"'}
+
+        data_to_write = {"key1": {"value": "A"}}
+        self.db.storage.write(data_to_write)
+
+        self.assertEqual(self.db.storage.read(), data_to_write)
+        self.mock_s3_client.Object.return_value.get.assert_not_called()
+
+    def test_failed_update_is_not_cached(self):
+        self.db.storage.max_staleness = 60
+        data = {"_default": {"1": {"tags": ["a"]}, "2": {"tags": None}}}
+        mock_s3_get = self.mock_s3_client.Object.return_value.get
+        mock_s3_get.return_value = {"Body": MagicMock(), "ETag": '"v1"'}
+        mock_s3_get.return_value["Body"].read.return_value = json.dumps(data).encode()
+
+        def transform(doc):
+            doc["tags"].append("b")
+
+        # The first document is changed in place before the update fails
+        with self.assertRaises(AttributeError):
+            self.db.update(transform)
+
+        self.assertEqual(self.db.storage.read(), data)
+        mock_s3_get.assert_called_once_with()
+
+    def test_written_documents_are_copied(self):
+        self.db.storage.max_staleness = 60
+        self.mock_s3_client.Object.return_value.put.return_value = {"ETag": '"v2"'}
+
+        data_to_write = {"_default": {"1": {"tags": ["a"]}}}
+        self.db.storage.write(data_to_write)
+        data_to_write["_default"]["1"]["tags"].append("b")
+
+        self.assertEqual(self.db.storage.read(), {"_default": {"1": {"tags": ["a"]}}})
+
+    @patch("tinydbstorage.storage.s3.boto3.resource")
+    def test_resource_shared_between_storages(self, mock_boto_resource):
+        clear_resources()
+
+        first = S3Storage(self.s3_config)
+        second = S3Storage(self.s3_config)
+
+        self.assertIs(first.client, second.client)
+        mock_boto_resource.assert_called_once()
+
+    @patch("tinydbstorage.storage.s3.boto3.resource")
+    def test_new_resource_after_fork(self, mock_boto_resource):
+        clear_resources()
+        mock_boto_resource.side_effect = lambda *args, **kwargs: MagicMock()
+        storage = S3Storage(self.s3_config)
+        parent = storage.client
+        storage._executor()
+
+        # What the fork handlers do in the child process
+        registry._after_fork()
+        s3._after_fork()
+
+        self.assertIsNot(storage.client, parent)
+        self.assertIs(
+            storage.client,
+            s3.get_resource(
+                "mocked-region", "mocked-access-key-id", "mocked-secret-access-key"
+            ),
+        )
+        self.assertIsNone(storage._pool)
+
+
+class TestS3WriteBehindStorage(unittest.TestCase):
+    @patch("tinydbstorage.storage.s3.boto3.resource")
+    def setUp(self, mock_boto_resource):
+        clear_resources()
+        self.mock_s3_client = mock_boto_resource.return_value
+        self.mock_put = self.mock_s3_client.Object.return_value.put
+        self.mock_put.return_value = {"ETag": '"v1"'}
+
+        # Only flush explicitly unless a test asks otherwise
+        self.s3_config = S3Schema(
+            bucket_name="mocked-bucket",
+            file_path="mocked-file-path",
+            access_key_id="mocked-access-key-id",
+            secret_access_key="mocked-secret-access-key",
+            write_behind=True,
+            flush_interval=60,
+        )
+        self.storage = S3Storage(self.s3_config)
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_writes_are_coalesced(self):
+        for value in range(3):
+            self.storage.write({"_default": {"1": {"value": value}}})
+        self.mock_put.assert_not_called()
+
+        self.storage.flush()
+
+        self.mock_put.assert_called_once_with(
+            Body=json.dumps({"_default": {"1": {"value": 2}}})
+        )
+        self.assertEqual(self.storage.flushes, 1)
+        self.assertEqual(self.storage.coalesced_writes, 2)
+        self.assertGreaterEqual(self.storage.last_flush_latency, 0)
+
+    def test_read_returns_buffered_data(self):
+        data_to_write = {"_default": {"1": {"value": "A"}}}
+        self.storage.write(data_to_write)
+
+        self.assertEqual(self.storage.read(), data_to_write)
+        self.mock_s3_client.Object.return_value.get.assert_not_called()
+
+    def test_flush_every_triggers_upload(self):
+        self.storage.flush_every = 2
+        self.storage.write({"_default": {}})
+        self.storage.write({"_default": {}})
+
+        for _ in range(100):
+            if self.storage.flushes:
+                break
+            time.sleep(0.01)
+
+        self.mock_put.assert_called_once()
+
+    def test_failed_flush_keeps_snapshot(self):
+        self.mock_put.side_effect = [ClientError({"Error": {"Code": "500"}}, "put"), {}]
+        self.storage.write({"_default": {}})
+
+        with self.assertRaises(ClientError):
+            self.storage.flush()
+        self.storage.flush()
+
+        self.assertEqual(self.mock_put.call_count, 2)
+        self.assertEqual(self.storage.flushes, 1)
+
+    def test_close_flushes(self):
+        self.storage.write({"_default": {}})
+
+        self.storage.close()
+
+        self.mock_put.assert_called_once()
+        self.assertFalse(self.storage._flusher.is_alive())
+
+    def test_write_after_close_is_uploaded(self):
+        self.storage.close()
+
+        self.storage.write({"_default": {"1": {"value": "A"}}})
+
+        self.mock_put.assert_called_once_with(
+            Body=json.dumps({"_default": {"1": {"value": "A"}}})
+        )
+        self.assertIsNone(self.storage._pending)
+
+    def test_closed_storage_is_released(self):
+        self.storage.close()
+        storage = weakref.ref(self.storage)
+        self.storage = S3Storage(self.s3_config)
+
+        gc.collect()
+
+        self.assertIsNone(storage())
+
+
+class FakeS3Client:
+    """In-memory stand-in for the low level S3 client."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = []
+        self.gets = []
+        self.uploads = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts.append(Key)
+        etag = f'"{hash(Body)}"'
+        self.objects[Key] = (Body, etag)
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.gets.append(Key)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+        body, etag = self.objects[Key]
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304"}}, "GetObject")
+
+        return {"Body": io.BytesIO(body), "ETag": etag}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = str(len(self.uploads))
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f'"{hash(Body)}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts), numbers
+        return self.put_object(Bucket, Key, b"".join(parts[n] for n in numbers))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+
+
+class TestS3ShardedStorage(unittest.TestCase):
+    @patch("tinydbstorage.storage.s3.boto3.resource")
+    def setUp(self, mock_boto_resource):
+        clear_resources()
+        self.fake = FakeS3Client()
+        mock_boto_resource.return_value.meta.client = self.fake
+
+        # Two doc_ids per shard under the "db" prefix
+        self.s3_config = S3Schema(
+            bucket_name="mocked-bucket",
+            file_path="mocked-file-path",
+            access_key_id="mocked-access-key-id",
+            secret_access_key="mocked-secret-access-key",
+            layout="sharded",
+            key_prefix="db",
+            shard_size=2,
+        )
+        self.db = TinyDB(storage=S3Storage, config=self.s3_config)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_read_empty(self):
+        self.assertEqual(self.db.storage.read(), {})
+
+    def test_write_shards_by_doc_id_range(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(3)])
+        self.db.table("empty")
+
+        self.assertEqual(
+            sorted(self.fake.objects),
+            ["db/manifest.json", "db/users/0.json", "db/users/1.json"],
+        )
+        manifest = json.loads(self.fake.objects["db/manifest.json"][0])
+        self.assertEqual(manifest, {"tables": {"users": ["0", "1"]}})
+
+    def test_write_uploads_only_dirty_shards(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(4)])
+        self.db.table("orders").insert({"total": 1})
+        self.fake.puts.clear()
+
+        self.db.table("users").update({"n": 10}, doc_ids=[4])
+
+        self.assertEqual(self.fake.puts, ["db/users/2.json"])
+
+    def test_remove_deletes_empty_shard(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(3)])
+
+        self.db.table("users").remove(doc_ids=[2, 3])
+
+        self.assertNotIn("db/users/1.json", self.fake.objects)
+        manifest = json.loads(self.fake.objects["db/manifest.json"][0])
+        self.assertEqual(manifest, {"tables": {"users": ["0"]}})
+
+    def test_read_round_trip_from_new_storage(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(3)])
+        self.db.table("orders").insert({"total": 1})
+
+        other = TinyDB(storage=S3Storage, config=self.s3_config)
+
+        self.assertEqual(other.table("users").all(), [{"n": 0}, {"n": 1}, {"n": 2}])
+        self.assertEqual(other.table("orders").get(doc_id=1), {"total": 1})
+        other.close()
+
+    def test_read_unchanged_shards_are_not_downloaded(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(3)])
+        self.db.storage.read()
+
+        # Every conditional request is answered with 304
+        self.fake.get_object = MagicMock(
+            side_effect=ClientError({"Error": {"Code": "304"}}, "GetObject")
+        )
+
+        self.assertEqual(len(self.db.table("users").all()), 3)
+        self.assertEqual(self.fake.get_object.call_count, 3)
+
+    def test_iter_table_fetches_shards_in_order(self):
+        self.db.table("users").insert_multiple([{"n": n} for n in range(5)])
+        self.db.table("orders").insert({"total": 1})
+        self.fake.gets.clear()
+
+        batches = list(self.db.storage.iter_table("users", batch_size=4))
+
+        self.assertEqual(
+            batches,
+            [
+                {"1": {"n": 0}, "2": {"n": 1}, "3": {"n": 2}, "4": {"n": 3}},
+                {"5": {"n": 4}},
+            ],
+        )
+        self.assertNotIn("db/orders/0.json", self.fake.gets)
+        self.assertEqual(list(self.db.storage.iter_documents("missing")), [])
+
+    def test_compressed_shards(self):
+        self.db.storage.codec = "gzip"
+        self.db.table("users").insert({"n": 1})
+
+        body = self.fake.objects["db/users/0.json"][0]
+        self.assertEqual(gzip.decompress(body), b'{"1": {"n": 1}}')
+
+        other = TinyDB(storage=S3Storage, config=self.s3_config)
+        self.assertEqual(other.table("users").all(), [{"n": 1}])
+        other.close()
+
+
+class TestS3StreamingStorage(unittest.TestCase):
+    @patch("tinydbstorage.storage.s3.boto3.resource")
+    def setUp(self, mock_boto_resource):
+        clear_resources()
+        self.fake = FakeS3Client()
+        mock_boto_resource.return_value.meta.client = self.fake
+
+        self.s3_config = S3Schema(
+            bucket_name="mocked-bucket",
+            file_path="db.json",
+            access_key_id="mocked-access-key-id",
+            secret_access_key="mocked-secret-access-key",
+            streaming=True,
+            max_concurrency=2,
+        )
+        self.db = TinyDB(storage=S3Storage, config=self.s3_config)
+        self.docs = [{"n": n, "text": "x" * 100} for n in range(200)]
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_read_empty(self):
+        self.assertEqual(self.db.storage.read(), {})
+
+    def test_small_database_uses_single_request(self):
+        self.db.insert_multiple(self.docs)
+
+        self.assertEqual(self.fake.puts, ["db.json"])
+        self.assertEqual(
+            json.loads(self.fake.objects["db.json"][0]),
+            {"_default": {str(n + 1): doc for n, doc in enumerate(self.docs)}},
+        )
+
+    def test_multipart_round_trip(self):
+        # Parts are only this small in tests, S3 needs 5 MiB.
+        self.db.storage.part_size = 1000
+        with patch("tinydbstorage.storage.s3.STREAM_BATCH_SIZE", 500):
+            self.db.insert_multiple(self.docs)
+
+        body = self.fake.objects["db.json"][0]
+        self.assertGreater(len(body), 10000)
+        self.assertEqual(json.loads(body)["_default"]["200"], self.docs[-1])
+        self.assertEqual(self.fake.uploads, {})
+
+        other = TinyDB(storage=S3Storage, config=self.s3_config)
+        self.assertEqual(other.all(), self.docs)
+        other.close()
+
+    def test_compressed_multipart(self):
+        self.db.storage.codec = "gzip"
+        self.db.storage.part_size = 100
+        with patch("tinydbstorage.storage.s3.STREAM_BATCH_SIZE", 50):
+            self.db.insert_multiple({"n": n} for n in range(200))
+
+        body = self.fake.objects["db.json"][0]
+        self.assertEqual(json.loads(gzip.decompress(body))["_default"]["1"], {"n": 0})
+
+        other = TinyDB(storage=S3Storage, config=self.s3_config)
+        self.assertEqual(len(other), 200)
+        other.close()
+
+    def test_failed_part_aborts_upload(self):
+        self.db.storage.part_size = 1000
+        self.fake.upload_part = MagicMock(side_effect=RuntimeError("network"))
+
+        with patch("tinydbstorage.storage.s3.STREAM_BATCH_SIZE", 500):
+            with self.assertRaises(RuntimeError):
+                self.db.storage.write({"_default": dict(enumerate(self.docs))})
+
+        self.assertEqual(self.fake.uploads, {})
+        self.assertNotIn("db.json", self.fake.objects)
+
+    def test_read_not_modified_uses_cache(self):
+        self.db.insert({"n": 1})
+        self.fake.gets.clear()
+
+        self.assertEqual(self.db.all(), [{"n": 1}])
+        self.assertEqual(self.db.all(), [{"n": 1}])
+        self.assertEqual(self.fake.gets, ["db.json", "db.json"])
+
+    def test_iter_documents(self):
+        self.db.storage.codec = "zstd"
+        self.db.insert_multiple(self.docs)
+        self.db.table("users").insert({"name": "John"})
+
+        other = TinyDB(storage=S3Storage, config=self.s3_config)
+        self.assertEqual(
+            [doc for _, doc in other.storage.iter_documents("_default")], self.docs
+        )
+        self.assertEqual(
+            list(other.storage.iter_documents("users")), [("1", {"name": "John"})]
+        )
+        other.close()
+
+        # Answered from the cache once S3 reports the object unchanged.
+        self.db.all()
+        self.fake.get_object = MagicMock(
+            side_effect=ClientError({"Error": {"Code": "304"}}, "GetObject")
+        )
+        self.assertEqual(len(list(self.db.storage.iter_documents("_default"))), 200)
+
+    def test_invalid_config(self):
+        for options in (
+            {"layout": "sharded"},
+            {"write_behind": True},
+            {"serializer": "msgpack"},
+        ):
+            with self.subTest(options=options):
+                config = self.s3_config.model_copy(update=options)
+                with self.assertRaises(ValueError):
+                    S3Storage(config)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from tinydb import TinyDB, Query
+
+from tinydbstorage.storage import (
+    FileStorage,
+    MappedFileStorage,
+    MemoryStorage,
+    TieredStorage,
+)
+
+
+class TestTieredStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "db.json")
+        self.memory = MemoryStorage()
+        self.file = FileStorage(self.path)
+        self.db = TinyDB(storage=TieredStorage, tiers=[self.memory, self.file])
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            TieredStorage(tiers=[])
+        with self.assertRaises(ValueError):
+            TieredStorage(tiers=[MemoryStorage()], policies=["write_through"])
+        with self.assertRaises(ValueError):
+            TieredStorage(tiers=[MemoryStorage(), MemoryStorage()], policies=["lazy"])
+
+    def test_write_through(self):
+        self.db.insert_multiple([{"type": "apple"}, {"type": "peach"}])
+        self.db.remove(Query().type == "peach")
+
+        expected = {"_default": {"1": {"type": "apple"}}}
+        self.assertEqual(self.memory.read(), expected)
+        self.assertEqual(self.file.read(), expected)
+
+    def test_read_through_populates_upper_tiers(self):
+        self.file.write({"_default": {"1": {"type": "apple"}}})
+
+        self.assertEqual(self.db.all(), [{"type": "apple"}])
+        self.assertEqual(self.memory.read(), {"_default": {"1": {"type": "apple"}}})
+
+        # The lower tier is not read anymore
+        with patch.object(self.file, "read") as read:
+            self.assertEqual(self.db.all(), [{"type": "apple"}])
+            read.assert_not_called()
+
+    def test_read_empty(self):
+        self.assertIsNone(self.db.storage.read())
+        self.assertEqual(self.db.all(), [])
+
+    def test_write_behind(self):
+        self.db = TinyDB(
+            storage=TieredStorage,
+            tiers=[self.memory, self.file],
+            policies=["write_behind"],
+            flush_interval=60,
+        )
+        self.db.insert({"type": "apple"})
+        self.db.insert({"type": "peach"})
+
+        self.assertEqual(len(self.db), 2)
+        self.assertIsNone(self.file.read())
+
+        self.db.storage.flush()
+
+        self.assertEqual(
+            self.file.read(),
+            {"_default": {"1": {"type": "apple"}, "2": {"type": "peach"}}},
+        )
+        self.assertEqual(self.db.storage.flushes, 1)
+        self.assertEqual(self.db.storage.coalesced_writes, 1)
+
+    def test_write_behind_queues_a_copy(self):
+        storage = TieredStorage(
+            tiers=[MemoryStorage(), self.file],
+            policies=["write_behind"],
+            flush_interval=60,
+        )
+        data = {"_default": {"1": {"tags": ["red"]}}}
+        storage.write(data)
+
+        # Changed by the caller before the flush
+        data["_default"]["1"]["tags"].append("green")
+        data["_default"]["2"] = {"tags": []}
+        storage.flush()
+
+        self.assertEqual(self.file.read(), {"_default": {"1": {"tags": ["red"]}}})
+        storage.close()
+
+    def test_write_behind_flush_every(self):
+        self.db = TinyDB(
+            storage=TieredStorage,
+            tiers=[self.memory, self.file],
+            policies=["write_behind"],
+            flush_interval=60,
+            flush_every=2,
+        )
+        self.db.insert({"type": "apple"})
+        self.db.insert({"type": "peach"})
+
+        # The background thread flushes without waiting for the interval
+        deadline = time.monotonic() + 5
+        while self.db.storage.flushes < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.db.storage.flushes, 1)
+        self.assertEqual(len(self.file.read()["_default"]), 2)
+
+    def test_write_behind_failure_is_retried(self):
+        self.db = TinyDB(
+            storage=TieredStorage,
+            tiers=[self.memory, self.file],
+            policies=["write_behind"],
+            flush_interval=60,
+        )
+        self.db.insert({"type": "apple"})
+
+        with patch.object(self.file, "write", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.db.storage.flush()
+
+        self.db.storage.flush()
+        self.assertEqual(self.file.read(), {"_default": {"1": {"type": "apple"}}})
+
+    def test_close_flushes_and_closes_tiers(self):
+        self.db = TinyDB(
+            storage=TieredStorage,
+            tiers=[self.memory, self.file],
+            policies=["write_behind"],
+            flush_interval=60,
+        )
+        self.db.insert({"type": "apple"})
+
+        self.db.close()
+
+        self.assertTrue(self.file._handle.closed)
+        with open(self.path) as handle:
+            self.assertIn("apple", handle.read())
+
+    def test_lazy_tables_are_materialized(self):
+        mapped = MappedFileStorage(os.path.join(self.temp_dir.name, "db.tdb"))
+        mapped.write({"_default": {"1": {"type": "apple"}}})
+        self.db = TinyDB(storage=TieredStorage, tiers=[mapped, self.file])
+
+        self.db.table("other").insert({"type": "peach"})
+
+        self.assertEqual(
+            self.file.read(),
+            {"_default": {"1": {"type": "apple"}}, "other": {"1": {"type": "peach"}}},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
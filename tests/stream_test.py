@@ -0,0 +1,101 @@
+import json
+import unittest
+
+from tinydbstorage.serializer import get_serializer
+from tinydbstorage.stream import (
+    TableStream,
+    dump_json,
+    iter_chunks,
+    iter_json,
+    iter_table_json,
+    load_json,
+)
+
+
+def chunked(payload: bytes, size: int):
+    return [payload[i : i + size] for i in range(0, len(payload), size)]
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "users": {
+                "1": {"name": "Jöhn", "tags": ["a", "b"], "age": 12345},
+                "2": {"name": 'quote " and \\ backslash', "nested": {"x": [1.5]}},
+            },
+            "empty": {},
+            'odd "name"': {'odd "id"': None},
+        }
+
+    def test_dump_json_matches_json_dumps(self):
+        dumpb = get_serializer("json").dumpb
+
+        self.assertEqual(
+            b"".join(dump_json(self.data, dumpb)), json.dumps(self.data).encode()
+        )
+        self.assertEqual(b"".join(dump_json({}, dumpb)), b"{}")
+
+    def test_load_json_any_chunk_size(self):
+        for payload in (
+            json.dumps(self.data).encode(),
+            json.dumps(self.data, indent=2, ensure_ascii=False).encode(),
+        ):
+            for size in (1, 2, 3, 7, 64, 4096):
+                with self.subTest(size=size):
+                    self.assertEqual(load_json(chunked(payload, size)), self.data)
+
+    def test_iter_json_reports_tables(self):
+        items = list(iter_json([json.dumps(self.data).encode()]))
+
+        self.assertEqual(items[0], ("users", None, None))
+        self.assertIn(("empty", None, None), items)
+        self.assertEqual(len(items), 6)
+
+    def test_iter_table_json(self):
+        payload = chunked(json.dumps(self.data).encode(), 5)
+
+        self.assertEqual(dict(iter_table_json(payload, "users")), self.data["users"])
+        self.assertEqual(list(iter_table_json(payload, "empty")), [])
+        self.assertEqual(list(iter_table_json(payload, "missing")), [])
+
+    def test_table_stream_batches(self):
+        class Storage(TableStream):
+            def iter_documents(self, name, batch_size=1000):
+                return ((str(n), {"n": n}) for n in range(5))
+
+        self.assertEqual(
+            [list(batch) for batch in Storage().iter_table("users", batch_size=2)],
+            [["0", "1"], ["2", "3"], ["4"]],
+        )
+
+    def test_empty_payload(self):
+        self.assertEqual(load_json([]), {})
+        self.assertEqual(load_json([b"  {}  "]), {})
+
+    def test_encoding(self):
+        payload = json.dumps(self.data, ensure_ascii=False).encode("utf-16")
+
+        self.assertEqual(load_json(chunked(payload, 5), "utf-16"), self.data)
+
+    def test_invalid_payload(self):
+        for payload in (
+            b"[]",
+            b'{"a": 1}',
+            b'{"a": {"1": 2}',
+            b'{"a": {}} x',
+            b"{1: {}}",
+        ):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValueError):
+                    load_json(chunked(payload, 2))
+
+    def test_iter_chunks(self):
+        class Body:
+            def __init__(self):
+                self.payload = b"abcdefg"
+
+            def read(self, size):
+                chunk, self.payload = self.payload[:size], self.payload[size:]
+                return chunk
+
+        self.assertEqual(list(iter_chunks(Body(), 3)), [b"abc", b"def", b"g"])
@@ -0,0 +1,98 @@
+import datetime
+import unittest
+
+from tinydbstorage.tracker import ChangeTracker
+
+
+class TestChangeTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ChangeTracker()
+        self.tracker.track(
+            {"users": {"1": {"name": "John"}, "2": {"name": "Jane"}}, "logs": {}}
+        )
+
+    def test_unchanged_data_has_no_delta(self):
+        delta = self.tracker.diff(
+            {"users": {"1": {"name": "John"}, "2": {"name": "Jane"}}, "logs": {}}
+        )
+
+        self.assertFalse(delta)
+        self.assertEqual(delta.tables, {})
+        self.assertEqual(delta.dropped, [])
+
+    def test_document_changes(self):
+        delta = self.tracker.diff(
+            {"users": {"1": {"name": "Jack"}, "3": {"name": "Jill"}}, "logs": {}}
+        )
+
+        changes = delta.tables["users"]
+        self.assertEqual(changes.inserted, {"3": {"name": "Jill"}})
+        self.assertEqual(changes.updated, {"1": {"name": "Jack"}})
+        self.assertEqual(changes.deleted, ["2"])
+        self.assertEqual(
+            changes.changed, {"1": {"name": "Jack"}, "3": {"name": "Jill"}}
+        )
+        self.assertFalse(changes.created)
+        self.assertNotIn("logs", delta.tables)
+
+    def test_documents_modified_in_place(self):
+        data = {"users": {"1": {"name": "John"}, "2": {"name": "Jane"}}, "logs": {}}
+        self.tracker.track(data)
+
+        data["users"]["1"]["name"] = "Jack"
+        delta = self.tracker.diff(data)
+
+        self.assertEqual(delta.tables["users"].updated, {"1": {"name": "Jack"}})
+
+    def test_created_and_dropped_tables(self):
+        delta = self.tracker.diff({"users": {}, "orders": {}})
+
+        self.assertTrue(delta.tables["orders"].created)
+        self.assertEqual(delta.tables["users"].deleted, ["1", "2"])
+        self.assertEqual(delta.dropped, ["logs"])
+
+    def test_commit(self):
+        delta = self.tracker.diff({"users": {"1": {"name": "Jack"}}})
+        self.tracker.commit(delta, version=2)
+
+        self.assertEqual(self.tracker.version, 2)
+        self.assertFalse(self.tracker.diff({"users": {"1": {"name": "Jack"}}}))
+
+    def test_track_skips_known_version(self):
+        self.tracker.track({"users": {"1": {"name": "John"}}}, version=1)
+        self.tracker.track({"users": {"1": {"name": "Jack"}}}, version=1)
+
+        delta = self.tracker.diff({"users": {"1": {"name": "John"}}})
+        self.assertFalse(delta)
+
+        self.tracker.track({"users": {"1": {"name": "Jack"}}}, version=2)
+        delta = self.tracker.diff({"users": {"1": {"name": "John"}}})
+        self.assertEqual(delta.tables["users"].updated, {"1": {"name": "John"}})
+
+    def test_reset(self):
+        self.tracker.reset()
+
+        self.assertFalse(self.tracker.synced)
+        self.assertTrue(self.tracker.diff({"users": {}}).tables["users"].created)
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            self.tracker.fingerprint({"a": [1, 2.5, None, True]}),
+            self.tracker.fingerprint({"a": [1, 2.5, None, True]}),
+        )
+        self.assertNotEqual(
+            self.tracker.fingerprint({"a": 1}), self.tracker.fingerprint({"a": 2})
+        )
+
+    def test_fingerprint_falls_back_to_encode(self):
+        encoded = []
+
+        def encode(doc):
+            encoded.append(doc)
+            return repr(doc).encode()
+
+        tracker = ChangeTracker(encode)
+        doc = {"at": datetime.date(2024, 1, 1)}
+
+        self.assertEqual(tracker.fingerprint(doc), tracker.fingerprint(dict(doc)))
+        self.assertEqual(len(encoded), 2)
@@ -0,0 +1,235 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Callable, List, Mapping, Iterable, Set, Type
+
+from tinydb.storages import Storage
+from tinydb.table import Document, Table
+
+
+class AsyncStorage(ABC):
+    """
+    Represents the asyncio counterpart of a TinyDB storage.
+
+    .. versionadded:: 2.1.0
+    """
+
+    @abstractmethod
+    async def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the current state of the database.
+
+        :return: Dictionary data from the storage, or None if it is empty.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        raise NotImplementedError("To be overridden!")
+
+    async def read_snapshot(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the current state of the database for a read-only operation.
+
+        Unlike `read`, the state is not recorded as the base of the next
+        write, so a read overlapping a write cannot change what the write is
+        checked against.
+
+        :return: Dictionary data from the storage, or None if it is empty.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        return await self.read()
+
+    @abstractmethod
+    async def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write the current state of the database.
+
+        :param data: Dictionary data to store.
+        :type data: Dict[str, Dict[str, Any]]
+        """
+        raise NotImplementedError("To be overridden!")
+
+    async def close(self):
+        """
+        Release the resources of the storage.
+        """
+        pass
+
+
+class AsyncTinyDB:
+    """
+    Represents an asyncio facade over TinyDB for `AsyncStorage` storages.
+
+    Every operation awaits the storage I/O, then runs the TinyDB table logic
+    in memory. Reads of concurrent tasks overlap, writes of the same
+    database are serialized so that no update is lost.
+
+    Example usage:
+
+    >>> db = AsyncTinyDB(storage=AsyncRedisStorage, redis_uri="redis://localhost:6379/0")
+    >>> await db.table("users").insert({"name": "John"})
+    >>> await db.search(Query().name == "John")
+    >>> await db.close()
+
+    :param storage: The class of the storage.
+    :type storage: Type[AsyncStorage]
+    :param args: Positional arguments to pass to the storage.
+    :param kwargs: Keyword arguments to pass to the storage.
+
+    .. versionadded:: 2.1.0
+    """
+
+    default_table_name = "_default"
+
+    def __init__(self, *args, storage: Type[AsyncStorage], **kwargs):
+        self.storage = storage(*args, **kwargs)
+        self._tables: Dict[str, AsyncTable] = {}
+        self._write_lock = asyncio.Lock()
+
+    def table(self, name: str) -> "AsyncTable":
+        """
+        Return a table of the database.
+
+        :param name: The table name.
+        :type name: str
+
+        :return: The table.
+        :rtype: AsyncTable
+        """
+        if name not in self._tables:
+            self._tables[name] = AsyncTable(self, name)
+
+        return self._tables[name]
+
+    async def tables(self) -> Set[str]:
+        """
+        Return the names of the tables of the database.
+
+        :return: The table names.
+        :rtype: Set[str]
+        """
+        return set(await self.storage.read_snapshot() or {})
+
+    async def drop_table(self, name: str):
+        """
+        Drop a table from the database.
+
+        :param name: The table name.
+        :type name: str
+        """
+        async with self._write_lock:
+            data = await self.storage.read() or {}
+            if name in data:
+                del data[name]
+                await self.storage.write(data)
+
+    async def drop_tables(self):
+        """
+        Drop every table of the database.
+        """
+        async with self._write_lock:
+            await self.storage.write({})
+
+    async def close(self):
+        """
+        Close the storage.
+        """
+        await self.storage.close()
+
+    async def __aenter__(self) -> "AsyncTinyDB":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __getattr__(self, name: str):
+        # Forward the table operations to the default table, like TinyDB.
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.table(self.default_table_name), name)
+
+
+class AsyncTable:
+    """
+    Represents a table of an `AsyncTinyDB`, with the TinyDB table operations.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, db: AsyncTinyDB, name: str):
+        self._db = db
+        self.name = name
+
+    async def insert(self, document: Mapping) -> int:
+        return await self._write(Table.insert, document)
+
+    async def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        return await self._write(Table.insert_multiple, documents)
+
+    async def all(self) -> List[Document]:
+        return await self._read(Table.all)
+
+    async def search(self, cond) -> List[Document]:
+        return await self._read(Table.search, cond)
+
+    async def get(self, cond=None, doc_id=None, doc_ids=None):
+        return await self._read(Table.get, cond, doc_id, doc_ids)
+
+    async def contains(self, cond=None, doc_id=None) -> bool:
+        return await self._read(Table.contains, cond, doc_id)
+
+    async def count(self, cond) -> int:
+        return await self._read(Table.count, cond)
+
+    async def length(self) -> int:
+        return await self._read(Table.__len__)
+
+    async def update(self, fields, cond=None, doc_ids=None) -> List[int]:
+        return await self._write(Table.update, fields, cond, doc_ids)
+
+    async def update_multiple(self, updates) -> List[int]:
+        return await self._write(Table.update_multiple, updates)
+
+    async def upsert(self, document: Mapping, cond=None) -> List[int]:
+        return await self._write(Table.upsert, document, cond)
+
+    async def remove(self, cond=None, doc_ids=None) -> List[int]:
+        return await self._write(Table.remove, cond, doc_ids)
+
+    async def truncate(self):
+        return await self._write(Table.truncate)
+
+    async def _read(self, operation: Callable, *args):
+        """
+        Run a read-only TinyDB operation on the current state.
+        """
+        storage = _StateStorage(await self._db.storage.read_snapshot())
+        return operation(Table(storage, self.name, cache_size=0), *args)
+
+    async def _write(self, operation: Callable, *args):
+        """
+        Run a TinyDB operation on the current state and write its result.
+        """
+        async with self._db._write_lock:
+            storage = _StateStorage(await self._db.storage.read())
+            result = operation(Table(storage, self.name, cache_size=0), *args)
+            if storage.written:
+                await self._db.storage.write(storage.data)
+
+            return result
+
+
+class _StateStorage(Storage):
+    """
+    A synchronous storage over data read beforehand, recording the writes of
+    the TinyDB table logic.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Any]]]):
+        self.data = data
+        self.written = False
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.data
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        self.data = data
+        self.written = True
@@ -0,0 +1,226 @@
+import gzip
+import itertools
+import lzma
+import zlib
+from typing import Optional, Iterable, Iterator, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+NONE = "none"
+GZIP = "gzip"
+ZLIB = "zlib"
+LZMA = "lzma"
+ZSTD = "zstd"
+CODECS = (NONE, GZIP, ZLIB, LZMA, ZSTD)
+
+GZIP_MAGIC = b"\x1f\x8b"
+LZMA_MAGIC = b"\xfd7zXZ\x00"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def check_codec(codec: str):
+    """
+    Make sure a codec is known and usable.
+
+    :param codec: The codec name, one of `CODECS`.
+    :type codec: str
+
+    :return: None
+    :rtype: None
+
+    :raises ValueError: When the codec is unknown.
+    :raises ImportError: When the codec needs a package that is not installed.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec!r}, expected one of {CODECS}")
+
+    if codec == ZSTD and zstandard is None:
+        raise ImportError("The zstd codec requires the zstandard package")
+
+
+def compress(
+    payload: Union[str, bytes], codec: str = NONE, level: Optional[int] = None
+) -> Union[str, bytes]:
+    """
+    Compress a serialized payload.
+
+    Payloads are returned untouched with the ``"none"`` codec. Every codec
+    writes its own magic header so `decompress` does not need to be told
+    which one was used. Gzip output does not embed a timestamp, compressing
+    the same payload twice gives the same bytes.
+
+    :param payload: The serialized payload.
+    :type payload: Union[str, bytes]
+    :param codec: The codec name, one of `CODECS`. Default is ``"none"``.
+    :type codec: str
+    :param level: The compression level, None uses the codec default.
+    :type level: Optional[int]
+
+    :return: The compressed payload.
+    :rtype: Union[str, bytes]
+    """
+    if codec == NONE:
+        return payload
+
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+
+    if codec == GZIP:
+        return gzip.compress(payload, compresslevel=_level(level, 9), mtime=0)
+    if codec == ZLIB:
+        return zlib.compress(payload, _level(level, -1))
+    if codec == LZMA:
+        return lzma.compress(payload, preset=_level(level, 6))
+
+    check_codec(codec)
+    return zstandard.ZstdCompressor(level=_level(level, 3)).compress(payload)
+
+
+def decompress(payload: Union[str, bytes]) -> Union[str, bytes]:
+    """
+    Decompress a payload written by `compress` with any codec.
+
+    Uncompressed payloads, including data written before compression was
+    enabled, are returned untouched.
+
+    :param payload: The stored payload.
+    :type payload: Union[str, bytes]
+
+    :return: The serialized payload.
+    :rtype: Union[str, bytes]
+    """
+    codec = detect_codec(payload)
+    if codec == NONE:
+        return payload
+    if codec == GZIP:
+        return gzip.decompress(payload)
+    if codec == ZLIB:
+        return zlib.decompress(payload)
+    if codec == LZMA:
+        return lzma.decompress(payload)
+
+    check_codec(codec)
+    # Frames written by `compressor` do not record their size, which the
+    # one-shot decompress method needs.
+    return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+
+
+def detect_codec(payload: Union[str, bytes]) -> str:
+    """
+    Detect the codec of a payload from its magic header.
+
+    :param payload: The stored payload.
+    :type payload: Union[str, bytes]
+
+    :return: The codec name, ``"none"`` when the payload is not compressed.
+    :rtype: str
+    """
+    if not isinstance(payload, (bytes, bytearray, memoryview)) or len(payload) < 2:
+        return NONE
+
+    head = bytes(payload[:6])
+    if head.startswith(GZIP_MAGIC):
+        return GZIP
+    if head.startswith(LZMA_MAGIC):
+        return LZMA
+    if head.startswith(ZSTD_MAGIC):
+        return ZSTD
+    # RFC 1950 header: deflate method with a window of at most 32K and a
+    # checksum making the first two bytes a multiple of 31.
+    if head[0] & 0x0F == 8 and head[0] >> 4 <= 7 and (head[0] << 8 | head[1]) % 31 == 0:
+        return ZLIB
+
+    return NONE
+
+
+def _level(level: Optional[int], default: int) -> int:
+    return default if level is None else level
+
+
+def compressor(codec: str = NONE, level: Optional[int] = None):
+    """
+    Return an incremental compressor writing the same format as `compress`.
+
+    Example usage:
+
+    >>> stream = compressor("zstd")
+    >>> payload = stream.compress(b"{") + stream.compress(b"}") + stream.flush()
+
+    :param codec: The codec name, one of `CODECS`. Default is ``"none"``.
+    :type codec: str
+    :param level: The compression level, None uses the codec default.
+    :type level: Optional[int]
+
+    :return: An object with ``compress(bytes)`` and ``flush()`` methods returning bytes.
+
+    .. versionadded:: 2.1.0
+    """
+    if codec == NONE:
+        return _Identity()
+    if codec == GZIP:
+        # The zlib gzip container has no timestamp either.
+        return zlib.compressobj(_level(level, 9), zlib.DEFLATED, 31)
+    if codec == ZLIB:
+        return zlib.compressobj(_level(level, -1))
+    if codec == LZMA:
+        return lzma.LZMACompressor(preset=_level(level, 6))
+
+    check_codec(codec)
+    return zstandard.ZstdCompressor(level=_level(level, 3)).compressobj()
+
+
+def iter_decompress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Decompress a payload written by `compress` with any codec, chunk by chunk.
+
+    :param chunks: The chunks of the stored payload.
+    :type chunks: Iterable[bytes]
+
+    :return: The chunks of the serialized payload.
+    :rtype: Iterator[bytes]
+
+    .. versionadded:: 2.1.0
+    """
+    chunks = iter(chunks)
+    head = b""
+    # The magic headers are at most 6 bytes long.
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= 6:
+            break
+
+    codec = detect_codec(head)
+    if codec == NONE:
+        stream = _Identity()
+    elif codec == GZIP:
+        stream = zlib.decompressobj(31)
+    elif codec == ZLIB:
+        stream = zlib.decompressobj()
+    elif codec == LZMA:
+        stream = lzma.LZMADecompressor()
+    else:
+        check_codec(codec)
+        stream = zstandard.ZstdDecompressor().decompressobj()
+
+    for chunk in itertools.chain((head,), chunks):
+        data = stream.decompress(chunk)
+        if data:
+            yield data
+
+    data = stream.flush() if hasattr(stream, "flush") else b""
+    if data:
+        yield data
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
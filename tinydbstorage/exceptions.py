@@ -0,0 +1,9 @@
+class WriteConflictError(Exception):
+    """
+    Raised when a write is rejected because the stored data changed since it was read.
+
+    The TinyDB operation that triggered the write can safely be retried, it
+    will read the new state first.
+
+    .. versionadded:: 2.1.0
+    """
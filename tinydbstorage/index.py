@@ -0,0 +1,539 @@
+import json
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Dict,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    # Only needed for annotations, pydantic is not imported by file storages.
+    from tinydbstorage.schema import IndexSchema
+
+HASH_INDEX = "hash"
+SORTED_INDEX = "sorted"
+INDEX_KINDS = (HASH_INDEX, SORTED_INDEX)
+
+# Returned by `field_value` when a document has no value for a field.
+MISSING = object()
+
+
+def field_value(doc: Mapping, path: List[str]) -> Any:
+    """
+    Return the value of a possibly nested field of a document.
+
+    :param doc: The document.
+    :type doc: Mapping
+    :param path: The keys leading to the field, e.g. ``["address", "city"]``.
+    :type path: List[str]
+
+    :return: The value, or `MISSING` when the document has no such field.
+    :rtype: Any
+    """
+    value = doc
+    for key in path:
+        if not isinstance(value, Mapping) or key not in value:
+            return MISSING
+        value = value[key]
+
+    return value
+
+
+def hash_key(value: Any) -> str:
+    """
+    Return the canonical encoding of a value used as hash index key.
+
+    Values are compared by their JSON encoding, so ``1`` and ``1.0`` share a
+    key while ``1`` and ``True`` do not.
+
+    :param value: The field value.
+    :type value: Any
+
+    :return: The key of the value.
+    :rtype: str
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def sortable(value: Any) -> bool:
+    """
+    Tell whether a value can be stored in a sorted index.
+
+    Numbers and strings are sortable, they are kept apart: a range of
+    numbers never returns strings and the other way around.
+
+    :param value: The field value.
+    :type value: Any
+
+    :return: True for numbers other than NaN and strings without NUL characters.
+    :rtype: bool
+    """
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return not math.isnan(value)
+
+    return isinstance(value, str) and "\x00" not in value
+
+
+class Index:
+    """
+    Represents the value of a field for every document of a table.
+
+    Storages keeping the lookup structures somewhere else, e.g. in Redis,
+    use it as is to compute what changed on write. `HashIndex` and
+    `SortedIndex` also answer lookups from memory.
+
+    :param table: The name of the indexed table.
+    :type table: str
+    :param field: The indexed field, nested fields are separated by dots.
+    :type field: str
+    :param kind: Either ``"hash"`` or ``"sorted"``.
+    :type kind: str
+    :param values: The indexed value of each document, by doc_id.
+    :type values: Dict[str, Any]
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, table: str, field: str, kind: str = HASH_INDEX):
+        if kind not in INDEX_KINDS:
+            raise ValueError(
+                f"Unknown index kind: {kind!r}, expected one of {INDEX_KINDS}"
+            )
+
+        self.table = table
+        self.field = field
+        self.kind = kind
+        self.values: Dict[str, Any] = {}
+        self._path = field.split(".")
+
+    def accepts(self, value: Any) -> bool:
+        """
+        Tell whether a value is indexed, documents with other values are left out.
+
+        :param value: The field value.
+        :type value: Any
+
+        :return: True when the value is indexed.
+        :rtype: bool
+        """
+        if value is MISSING:
+            return False
+        if self.kind == SORTED_INDEX:
+            return sortable(value)
+
+        return True
+
+    def diff(self, docs: Optional[Mapping]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Compare the documents of the table with the indexed values.
+
+        :param docs: The documents of the table by doc_id, None when the table does not exist.
+        :type docs: Optional[Mapping]
+
+        :return: The values to add and the values to remove, by doc_id. A
+            changed value is in both.
+        :rtype: Tuple[Dict[str, Any], Dict[str, Any]]
+        """
+        docs = docs or {}
+        added, removed = {}, {}
+        for doc_id, doc in docs.items():
+            value = field_value(doc, self._path)
+            if not self.accepts(value):
+                value = MISSING
+
+            old = self.values.get(doc_id, MISSING)
+            if old is value or (type(old) is type(value) and old == value):
+                continue
+
+            if old is not MISSING:
+                removed[doc_id] = old
+            if value is not MISSING:
+                added[doc_id] = value
+
+        for doc_id in self.values.keys() - docs.keys():
+            removed[doc_id] = self.values[doc_id]
+
+        return added, removed
+
+    def apply(self, added: Dict[str, Any], removed: Dict[str, Any]):
+        """
+        Update the index with the result of `diff`.
+
+        :param added: The values to add by doc_id.
+        :type added: Dict[str, Any]
+        :param removed: The values to remove by doc_id.
+        :type removed: Dict[str, Any]
+
+        :return: None
+        :rtype: None
+        """
+        for doc_id, value in removed.items():
+            del self.values[doc_id]
+            self._remove(int(doc_id), value)
+        for doc_id, value in added.items():
+            self.values[doc_id] = value
+            self._add(int(doc_id), value)
+
+    def clear(self):
+        """
+        Forget every indexed value.
+
+        :return: None
+        :rtype: None
+        """
+        self.values = {}
+
+    def _add(self, doc_id: int, value: Any):
+        pass
+
+    def _remove(self, doc_id: int, value: Any):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.table}.{self.field})"
+
+
+class HashIndex(Index):
+    """
+    Represents an index answering equality lookups.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, table: str, field: str):
+        super(HashIndex, self).__init__(table, field, HASH_INDEX)
+        self._ids: Dict[str, Set[int]] = {}
+
+    def lookup(self, value: Any) -> Set[int]:
+        """
+        Return the documents whose field equals a value.
+
+        :param value: The value to look for.
+        :type value: Any
+
+        :return: The doc_ids of the matching documents.
+        :rtype: Set[int]
+        """
+        return set(self._ids.get(hash_key(value), ()))
+
+    def clear(self):
+        super(HashIndex, self).clear()
+        self._ids = {}
+
+    def _add(self, doc_id: int, value: Any):
+        self._ids.setdefault(hash_key(value), set()).add(doc_id)
+
+    def _remove(self, doc_id: int, value: Any):
+        key = hash_key(value)
+        ids = self._ids[key]
+        ids.discard(doc_id)
+        if not ids:
+            del self._ids[key]
+
+
+class SortedIndex(Index):
+    """
+    Represents an index answering range lookups on numbers or strings.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, table: str, field: str):
+        super(SortedIndex, self).__init__(table, field, SORTED_INDEX)
+        # (0 for numbers or 1 for strings, value, doc_id), in order.
+        self._keys: List[Tuple[int, Any, int]] = []
+
+    def lookup(self, value: Any) -> Set[int]:
+        """
+        Return the documents whose field equals a value.
+
+        :param value: The value to look for.
+        :type value: Any
+
+        :return: The doc_ids of the matching documents.
+        :rtype: Set[int]
+        """
+        if not sortable(value):
+            return set()
+
+        return set(self.range(value, value))
+
+    def range(
+        self,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> List[int]:
+        """
+        Return the documents whose field is between two values.
+
+        :param low: The lower bound, None for no lower bound.
+        :type low: Any
+        :param high: The upper bound, None for no upper bound.
+        :type high: Any
+        :param include_low: Whether documents equal to ``low`` are returned.
+        :type include_low: bool
+        :param include_high: Whether documents equal to ``high`` are returned.
+        :type include_high: bool
+
+        :return: The doc_ids of the matching documents, ordered by value.
+        :rtype: List[int]
+
+        :raises ValueError: When the bounds are not both numbers or both strings.
+        """
+        rank = range_rank(low, high)
+        if rank is None:
+            return [doc_id for _, _, doc_id in self._keys]
+
+        if low is None:
+            start = bisect_left(self._keys, (rank,))
+        elif include_low:
+            start = bisect_left(self._keys, (rank, low))
+        else:
+            start = bisect_right(self._keys, (rank, low, math.inf))
+
+        if high is None:
+            end = bisect_left(self._keys, (rank + 1,))
+        elif include_high:
+            end = bisect_right(self._keys, (rank, high, math.inf))
+        else:
+            end = bisect_left(self._keys, (rank, high))
+
+        return [doc_id for _, _, doc_id in self._keys[start:end]]
+
+    def clear(self):
+        super(SortedIndex, self).clear()
+        self._keys = []
+
+    def _add(self, doc_id: int, value: Any):
+        key = (_rank(value), value, doc_id)
+        self._keys.insert(bisect_left(self._keys, key), key)
+
+    def _remove(self, doc_id: int, value: Any):
+        key = (_rank(value), value, doc_id)
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+
+class Indexes:
+    """
+    Represents the secondary indexes declared on a storage.
+
+    On write, the storage gives the new data to `update`, which compares
+    the documents of every indexed table with the indexed values and
+    returns what changed so that the storage can persist only that.
+
+    Example usage:
+
+    >>> indexes = Indexes([IndexSchema(table="users", field="email")])
+    >>> indexes.update({"users": {"1": {"email": "john@example.com"}}})
+    >>> indexes.lookup("users", "email", "john@example.com")
+    {1}
+
+    :param schemas: The declared indexes.
+    :type schemas: Iterable[IndexSchema]
+    :param lookups: Whether lookups are answered from memory, storages
+        persisting the lookup structures themselves only need the values.
+    :type lookups: bool
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, schemas: Iterable["IndexSchema"], lookups: bool = True):
+        self._indexes: Dict[Tuple[str, str], Index] = {}
+        for schema in schemas:
+            if not lookups:
+                index = Index(schema.table, schema.field, schema.kind)
+            elif schema.kind == SORTED_INDEX:
+                index = SortedIndex(schema.table, schema.field)
+            else:
+                index = HashIndex(schema.table, schema.field)
+            self._indexes[(schema.table, schema.field)] = index
+
+    def get(self, table: str, field: str) -> Index:
+        """
+        Return the index of a field.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The indexed field.
+        :type field: str
+
+        :return: The index.
+        :rtype: Index
+
+        :raises KeyError: When the field is not indexed.
+        """
+        try:
+            return self._indexes[(table, field)]
+        except KeyError:
+            raise KeyError(f"No index on {table}.{field}") from None
+
+    def update(
+        self, data: Optional[Mapping]
+    ) -> List[Tuple[Index, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Bring every index up to date with the data written to the storage.
+
+        :param data: Dictionary data written to the storage.
+        :type data: Optional[Mapping]
+
+        :return: The index, the added and the removed values of every index that changed.
+        :rtype: List[Tuple[Index, Dict[str, Any], Dict[str, Any]]]
+        """
+        data = data or {}
+        changes = []
+        for index in self._indexes.values():
+            added, removed = index.diff(data.get(index.table))
+            if added or removed:
+                index.apply(added, removed)
+                changes.append((index, added, removed))
+
+        return changes
+
+    def lookup(self, table: str, field: str, value: Any) -> Set[int]:
+        """
+        Return the documents of a table whose field equals a value.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The indexed field.
+        :type field: str
+        :param value: The value to look for.
+        :type value: Any
+
+        :return: The doc_ids of the matching documents.
+        :rtype: Set[int]
+
+        :raises KeyError: When the field is not indexed.
+        """
+        return self.get(table, field).lookup(value)
+
+    def range(
+        self,
+        table: str,
+        field: str,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> List[int]:
+        """
+        Return the documents of a table whose field is between two values.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The field of a sorted index.
+        :type field: str
+        :param low: The lower bound, None for no lower bound.
+        :type low: Any
+        :param high: The upper bound, None for no upper bound.
+        :type high: Any
+        :param include_low: Whether documents equal to ``low`` are returned.
+        :type include_low: bool
+        :param include_high: Whether documents equal to ``high`` are returned.
+        :type include_high: bool
+
+        :return: The doc_ids of the matching documents, ordered by value.
+        :rtype: List[int]
+
+        :raises KeyError: When the field is not indexed.
+        :raises ValueError: When the index is not sorted.
+        """
+        index = self.get(table, field)
+        if index.kind != SORTED_INDEX:
+            raise ValueError(f"{table}.{field} is not a sorted index")
+
+        return index.range(low, high, include_low, include_high)
+
+    def clear(self):
+        """
+        Forget every indexed value.
+
+        :return: None
+        :rtype: None
+        """
+        for index in self._indexes.values():
+            index.clear()
+
+    def dump(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Return the indexed values, to be persisted next to the data.
+
+        :return: For every table and field, the kind and the values of the index.
+        :rtype: Dict[str, Dict[str, Dict[str, Any]]]
+        """
+        payload = {}
+        for index in self._indexes.values():
+            payload.setdefault(index.table, {})[index.field] = {
+                "kind": index.kind,
+                "values": index.values,
+            }
+
+        return payload
+
+    def load(self, payload: Mapping) -> bool:
+        """
+        Restore the indexed values returned by `dump`.
+
+        :param payload: The persisted indexes.
+        :type payload: Mapping
+
+        :return: False, leaving the indexes empty, when an index is missing
+            from the payload or was built with another kind.
+        :rtype: bool
+        """
+        self.clear()
+        for index in self._indexes.values():
+            persisted = payload.get(index.table, {}).get(index.field)
+            if not persisted or persisted.get("kind") != index.kind:
+                self.clear()
+                return False
+
+            index.apply(persisted["values"], {})
+
+        return True
+
+    def __bool__(self):
+        return bool(self._indexes)
+
+    def __iter__(self) -> Iterator[Index]:
+        return iter(self._indexes.values())
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+def range_rank(low: Any, high: Any) -> Optional[int]:
+    """
+    Return whether a range is on numbers (0) or strings (1), None when unbounded.
+
+    :raises ValueError: When the bounds are not both numbers or both strings.
+    """
+    ranks = {_rank(bound) for bound in (low, high) if bound is not None}
+    if len(ranks) > 1 or None in ranks:
+        raise ValueError("Range bounds must be both numbers or both strings")
+
+    return ranks.pop() if ranks else None
+
+
+def _rank(value: Any) -> Optional[int]:
+    if not sortable(value):
+        return None
+
+    return 1 if isinstance(value, str) else 0
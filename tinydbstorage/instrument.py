@@ -0,0 +1,553 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Tuple
+
+if TYPE_CHECKING:
+    import logging
+
+READ = "read"
+WRITE = "write"
+SERIALIZE = "serialize"
+DESERIALIZE = "deserialize"
+NETWORK = "network"
+OPERATIONS = (READ, WRITE, SERIALIZE, DESERIALIZE, NETWORK)
+
+# inspect.CO_COROUTINE, without importing inspect at start up.
+CO_COROUTINE = 0x80
+
+# Upper bounds of the latency histogram buckets, in seconds.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# The storage running the instrumented read or write of the current thread
+# or task, the serialization and network spans inside it are its own.
+_current: ContextVar[Optional[str]] = ContextVar("tinydbstorage_storage", default=None)
+
+
+class Event:
+    """
+    Represents one measured operation.
+
+    :param operation: One of `OPERATIONS`.
+    :type operation: str
+    :param storage: The class name of the storage, None outside of a storage call.
+    :type storage: Optional[str]
+    :param seconds: The duration of the operation.
+    :type seconds: float
+    :param size: The payload bytes of the operation, None when unknown.
+    :type size: Optional[int]
+
+    .. versionadded:: 2.1.0
+    """
+
+    __slots__ = ("operation", "storage", "seconds", "size")
+
+    def __init__(
+        self,
+        operation: str,
+        storage: Optional[str],
+        seconds: float,
+        size: Optional[int] = None,
+    ):
+        self.operation = operation
+        self.storage = storage
+        self.seconds = seconds
+        self.size = size
+
+    def __repr__(self):
+        return (
+            f"Event(operation={self.operation!r}, storage={self.storage!r}, "
+            f"seconds={self.seconds!r}, size={self.size!r})"
+        )
+
+
+class Span:
+    """
+    Represents an operation being measured, see `Instrumentation.span`.
+
+    The payload size can be set inside the block once it is known.
+
+    :param size: The payload bytes of the operation.
+    :type size: Optional[int]
+
+    .. versionadded:: 2.1.0
+    """
+
+    __slots__ = ("instrumentation", "operation", "storage", "size", "_start")
+
+    def __init__(
+        self,
+        instrumentation: "Instrumentation",
+        operation: str,
+        storage: Optional[str] = None,
+    ):
+        self.instrumentation = instrumentation
+        self.operation = operation
+        self.storage = storage
+        self.size: Optional[int] = None
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.instrumentation.emit(
+            self.operation, time.perf_counter() - self._start, self.size, self.storage
+        )
+
+
+class _NoopSpan:
+    """
+    Stands for a `Span` while the instrumentation is disabled.
+    """
+
+    __slots__ = ("size",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Histogram:
+    """
+    Represents the distribution of observed values in cumulative buckets,
+    like a Prometheus histogram.
+
+    :param buckets: The upper bound of every bucket, sorted.
+    :type buckets: Tuple[float, ...]
+    :param counts: The number of observations of every bucket, plus one for larger values.
+    :type counts: List[int]
+    :param count: The number of observations.
+    :type count: int
+    :param sum: The sum of the observed values.
+    :type sum: float
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Record one value.
+
+        :param value: The observed value.
+        :type value: float
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """
+        Return the upper bound of the bucket holding a quantile.
+
+        :param fraction: The quantile, e.g. 0.99.
+        :type fraction: float
+
+        :return: The bucket bound, infinity above the last bucket, None without observations.
+        :rtype: Optional[float]
+        """
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+        return float("inf")
+
+
+class Stats:
+    """
+    Represents a hook aggregating the events by storage and operation into
+    counters and latency histograms.
+
+    Example usage:
+
+    >>> stats = Stats()
+    >>> instrumentation.add_hook(stats)
+    >>> print(stats.prometheus())
+
+    :param buckets: The latency histogram buckets, in seconds.
+    :type buckets: Tuple[float, ...]
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[Optional[str], str], int] = {}
+        self._bytes: Dict[Tuple[Optional[str], str], int] = {}
+        self._latency: Dict[Tuple[Optional[str], str], Histogram] = {}
+
+    def __call__(self, event: Event):
+        key = (event.storage, event.operation)
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+            if event.size is not None:
+                self._bytes[key] = self._bytes.get(key, 0) + event.size
+            if key not in self._latency:
+                self._latency[key] = Histogram(self.buckets)
+            self._latency[key].observe(event.seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Return the statistics of every storage and operation.
+
+        :return: By storage name (``""`` outside of a storage call) and
+            operation, the number of calls, payload bytes, total seconds and
+            p50/p99 latency bucket bounds.
+        :rtype: Dict[str, Dict[str, Dict[str, Any]]]
+        """
+        with self._lock:
+            snapshot = {}
+            for (storage, operation), histogram in self._latency.items():
+                snapshot.setdefault(storage or "", {})[operation] = {
+                    "calls": self._calls[(storage, operation)],
+                    "bytes": self._bytes.get((storage, operation), 0),
+                    "seconds": histogram.sum,
+                    "p50": histogram.quantile(0.5),
+                    "p99": histogram.quantile(0.99),
+                }
+            return snapshot
+
+    def prometheus(self, namespace: str = "tinydbstorage") -> str:
+        """
+        Return the statistics in the Prometheus text exposition format.
+
+        :param namespace: The prefix of the metric names.
+        :type namespace: str
+
+        :return: The exposition, one sample per line.
+        :rtype: str
+        """
+        calls, size, latency = [], [], []
+        with self._lock:
+            for key, histogram in sorted(
+                self._latency.items(), key=lambda item: (item[0][0] or "", item[0][1])
+            ):
+                labels = f'storage="{key[0] or ""}",operation="{key[1]}"'
+                calls.append(
+                    f"{namespace}_operations_total{{{labels}}} {self._calls[key]}"
+                )
+                size.append(
+                    f"{namespace}_bytes_total{{{labels}}} {self._bytes.get(key, 0)}"
+                )
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    latency.append(
+                        f'{namespace}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                latency.append(
+                    f'{namespace}_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+                )
+                latency.append(f"{namespace}_seconds_sum{{{labels}}} {histogram.sum}")
+                latency.append(
+                    f"{namespace}_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+        lines = [f"# TYPE {namespace}_operations_total counter", *calls]
+        lines += [f"# TYPE {namespace}_bytes_total counter", *size]
+        lines += [f"# TYPE {namespace}_seconds histogram", *latency]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """
+        Forget every statistic.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self._calls, self._bytes, self._latency = {}, {}, {}
+
+
+class LoggingHook:
+    """
+    Represents a hook logging every event.
+
+    :param logger: The logger. Default is the ``tinydbstorage`` logger.
+    :type logger: logging.Logger
+    :param level: The log level. Default is DEBUG.
+    :type level: int
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(
+        self, logger: Optional["logging.Logger"] = None, level: Optional[int] = None
+    ):
+        # Imported here, the storages import this module on every start.
+        import logging
+
+        self.logger = logger or logging.getLogger("tinydbstorage")
+        self.level = logging.DEBUG if level is None else level
+
+    def __call__(self, event: Event):
+        self.logger.log(
+            self.level,
+            "%s %s %.6fs %s bytes",
+            event.storage,
+            event.operation,
+            event.seconds,
+            event.size,
+        )
+
+
+class Instrumentation:
+    """
+    Represents the instrumentation shared by every storage of the process.
+
+    Storages measure their reads and writes, the (de)serialization and the
+    network requests they run, and hand every measure to the hooks as an
+    `Event`. Without hooks it is disabled and costs a flag check per call.
+
+    Example usage:
+
+    >>> from tinydbstorage.instrument import instrumentation
+    >>> with instrumentation.profile() as stats:
+    ...     db.table("users").all()
+    >>> stats.snapshot()
+
+    :param hooks: The callables receiving every event.
+    :type hooks: List[Callable[[Event], None]]
+    :param enabled: Whether events are measured, i.e. whether there are hooks.
+    :type enabled: bool
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self):
+        self.hooks: List[Callable[[Event], None]] = []
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Callable[[Event], None]):
+        """
+        Start handing the events to a hook.
+
+        :param hook: The callable receiving every event, e.g. a `Stats`.
+        :type hook: Callable[[Event], None]
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self.hooks = [*self.hooks, hook]
+            self.enabled = True
+
+    def remove_hook(self, hook: Callable[[Event], None]):
+        """
+        Stop handing the events to a hook, the last one disables the instrumentation.
+
+        :param hook: A hook given to `add_hook`.
+        :type hook: Callable[[Event], None]
+
+        :return: None
+        :rtype: None
+
+        :raises ValueError: When the hook was not added.
+        """
+        with self._lock:
+            hooks = list(self.hooks)
+            hooks.remove(hook)
+            self.hooks = hooks
+            self.enabled = bool(hooks)
+
+    @contextmanager
+    def profile(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Collect the events of a code block.
+
+        :param buckets: The latency histogram buckets, in seconds.
+        :type buckets: Tuple[float, ...]
+
+        :return: The statistics of the block, filled in as it runs.
+        :rtype: Stats
+        """
+        stats = Stats(buckets)
+        self.add_hook(stats)
+        try:
+            yield stats
+        finally:
+            self.remove_hook(stats)
+
+    def span(self, operation: str, storage: Any = None):
+        """
+        Measure an operation of the current storage call.
+
+        Example usage:
+
+        >>> with instrumentation.span(NETWORK) as span:
+        ...     body = client.get_object(...)["Body"].read()
+        ...     span.size = len(body)
+
+        :param operation: One of `OPERATIONS`.
+        :type operation: str
+        :param storage: The storage running the operation, needed outside of
+            its ``read`` and ``write`` calls, e.g. in a background thread.
+        :type storage: Any
+
+        :return: The context manager measuring the block.
+        :rtype: Span
+        """
+        if not self.enabled:
+            return _NOOP
+
+        return Span(self, operation, storage and type(storage).__name__)
+
+    def emit(
+        self,
+        operation: str,
+        seconds: float,
+        size: Optional[int] = None,
+        storage: Optional[str] = None,
+    ):
+        """
+        Hand an event to every hook.
+
+        :param operation: One of `OPERATIONS`.
+        :type operation: str
+        :param seconds: The duration of the operation.
+        :type seconds: float
+        :param size: The payload bytes of the operation.
+        :type size: Optional[int]
+        :param storage: The storage class name. Default is the storage of the current call.
+        :type storage: Optional[str]
+
+        :return: None
+        :rtype: None
+        """
+        event = Event(operation, storage or _current.get(), seconds, size)
+        for hook in self.hooks:
+            hook(event)
+
+
+instrumentation = Instrumentation()
+
+
+def instrumented(method: Callable) -> Callable:
+    """
+    Measure a storage ``read`` or ``write`` method, coroutine functions included.
+
+    The spans opened inside the call are attributed to the storage class.
+    Calls to the same storage nested in the measured one, e.g. a subclass
+    calling ``super().read()``, are not measured twice.
+
+    :param method: The method, named ``read`` or ``write``.
+    :type method: Callable
+
+    :return: The measured method.
+    :rtype: Callable
+    """
+    operation = method.__name__
+
+    def enter(self):
+        name = type(self).__name__
+        if _current.get() == name:
+            return None
+        return _current.set(name)
+
+    if method.__code__.co_flags & CO_COROUTINE:
+
+        @functools.wraps(method)
+        async def measured(self, *args, **kwargs):
+            if not instrumentation.enabled:
+                return await method(self, *args, **kwargs)
+
+            token = enter(self)
+            if token is None:
+                return await method(self, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                instrumentation.emit(operation, time.perf_counter() - start)
+                _current.reset(token)
+
+        return measured
+
+    @functools.wraps(method)
+    def measured(self, *args, **kwargs):
+        if not instrumentation.enabled:
+            return method(self, *args, **kwargs)
+
+        token = enter(self)
+        if token is None:
+            return method(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            instrumentation.emit(operation, time.perf_counter() - start)
+            _current.reset(token)
+
+    return measured
+
+
+def measured(operation: str) -> Callable[[Callable], Callable]:
+    """
+    Measure a serializer ``dumps`` or ``loads`` method as a `SERIALIZE` or
+    `DESERIALIZE` span sized by the serialized payload.
+
+    :param operation: Either `SERIALIZE` or `DESERIALIZE`.
+    :type operation: str
+
+    :return: The decorator.
+    :rtype: Callable[[Callable], Callable]
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def measured_method(self, value):
+            if not instrumentation.enabled:
+                return method(self, value)
+
+            start = time.perf_counter()
+            result = method(self, value)
+            payload = result if operation == SERIALIZE else value
+            instrumentation.emit(operation, time.perf_counter() - start, len(payload))
+            return result
+
+        measured_method.__measured__ = True
+        return measured_method
+
+    return decorator
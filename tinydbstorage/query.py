@@ -0,0 +1,96 @@
+import math
+from typing import Any, List, Optional
+
+# Largest integer a double, the only number type of Lua 5.1, holds exactly.
+MAX_SAFE_INTEGER = 2**53
+COMPARISONS = ("==", "!=", "<", "<=", ">", ">=")
+
+
+def translate(cond) -> Optional[list]:
+    """
+    Translate a TinyDB query into a predicate a backend can evaluate.
+
+    A predicate is a JSON array, one of ``[op, path, value]`` with ``op`` in
+    `COMPARISONS`, ``["exists", path]``, ``["one_of", path, values]``,
+    ``["and", predicates]``, ``["or", predicates]`` or ``["not", predicate]``.
+    ``path`` is a list of field names and values are strings, numbers,
+    booleans or null. Queries using anything else (``matches``, ``test``,
+    ``map``, ``any``, list or dict values...) are left to the client.
+
+    Example usage:
+
+    >>> translate((Query().age >= 18) & (Query().name == "John"))
+    ['and', [['==', ['name'], 'John'], ['>=', ['age'], 18]]]
+
+    :param cond: The query, e.g. ``Query().age >= 18``.
+    :type cond: tinydb.queries.QueryLike
+
+    :return: The predicate, or None when the query cannot be translated.
+    :rtype: Optional[list]
+
+    .. versionadded:: 2.1.0
+    """
+    return _translate(getattr(cond, "_hash", None))
+
+
+def _translate(hashval: Any) -> Optional[list]:
+    """
+    Translate the hash TinyDB computes for a query, which describes it.
+    """
+    if not isinstance(hashval, tuple) or not hashval:
+        return None
+
+    op = hashval[0]
+    if op in ("and", "or") and len(hashval) == 2:
+        # Sorted so the same query always gives the same predicate.
+        parts = [_translate(part) for part in sorted(hashval[1], key=repr)]
+        if any(part is None for part in parts):
+            return None
+        return [op, parts]
+
+    if op == "not" and len(hashval) == 2:
+        part = _translate(hashval[1])
+        return None if part is None else [op, part]
+
+    if len(hashval) < 2:
+        return None
+
+    path = _path(hashval[1])
+    if path is None:
+        return None
+
+    if op == "exists" and len(hashval) == 2:
+        return [op, path]
+
+    if op in COMPARISONS and len(hashval) == 3 and _scalar(hashval[2]):
+        return [op, path, hashval[2]]
+
+    if (
+        op == "one_of"
+        and len(hashval) == 3
+        and isinstance(hashval[2], tuple)
+        and all(_scalar(item) for item in hashval[2])
+    ):
+        return [op, path, list(hashval[2])]
+
+    return None
+
+
+def _path(path: Any) -> Optional[List[str]]:
+    if not isinstance(path, tuple) or not path:
+        return None
+    if not all(isinstance(part, str) for part in path):
+        return None
+
+    return list(path)
+
+
+def _scalar(value: Any) -> bool:
+    if value is None or isinstance(value, (str, bool)):
+        return True
+    if isinstance(value, int):
+        return abs(value) <= MAX_SAFE_INTEGER
+    if isinstance(value, float):
+        return math.isfinite(value)
+
+    return False
@@ -0,0 +1,281 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    import redis
+    import redis.asyncio
+
+# The clients are imported by the first pool or resource asking for them, a
+# process using only Redis never imports boto3 and the other way around.
+
+
+class ConnectionRegistry:
+    """
+    Represents the Redis connection pools and S3 resources shared by every
+    storage of the process.
+
+    Storages asking for the same URI, or the same credentials, with the same
+    options share one pool or resource instead of opening their own sockets.
+    After ``os.fork`` the child process forgets everything it inherited and
+    creates new pools on first use. Redis pools reset their connections in
+    the child on their own and `S3Storage` instances ask for a new resource,
+    so pre-fork servers can build these storages before forking. Asyncio
+    pools belong to event loops, which do not survive a fork.
+
+    The statistics count the acquisitions of every pool or resource since it
+    was created, storages do not give them back when they are closed.
+
+    Example usage:
+
+    >>> from tinydbstorage.registry import registry
+    >>> registry.stats()
+
+    :param forks: The number of times the registry was reset in a forked child.
+    :type forks: int
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self):
+        self.forks = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._redis: Dict[Tuple, "redis.ConnectionPool"] = {}
+        self._async_redis: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._s3: Dict[Tuple, Any] = {}
+        self._acquisitions: Dict[Tuple, int] = {}
+
+    def redis_pool(
+        self,
+        redis_uri: str,
+        max_connections: Optional[int] = None,
+        health_check_interval: int = 0,
+    ) -> "redis.ConnectionPool":
+        """
+        Return the shared Redis connection pool of a URI.
+
+        :param redis_uri: The URI for the Redis connection.
+        :type redis_uri: str
+        :param max_connections: The maximum number of connections of the pool, None for no limit.
+        :type max_connections: Optional[int]
+        :param health_check_interval: Seconds of idleness after which a connection is
+            checked with a PING before being used, 0 disables the checks.
+        :type health_check_interval: int
+
+        :return: The connection pool.
+        :rtype: redis.ConnectionPool
+        """
+        import redis
+
+        key = ("redis", redis_uri, max_connections, health_check_interval)
+        with self._lock:
+            self._check_pid()
+            if key not in self._redis:
+                self._redis[key] = redis.ConnectionPool.from_url(
+                    redis_uri,
+                    max_connections=max_connections,
+                    health_check_interval=health_check_interval,
+                )
+            self._acquisitions[key] = self._acquisitions.get(key, 0) + 1
+            return self._redis[key]
+
+    def async_redis_pool(
+        self,
+        redis_uri: str,
+        max_connections: Optional[int] = None,
+        health_check_interval: int = 0,
+    ) -> "redis.asyncio.ConnectionPool":
+        """
+        Return the shared asyncio Redis connection pool of a URI for the running event loop.
+
+        Asyncio connections belong to the event loop that opened them, each
+        loop gets its own pools.
+
+        :param redis_uri: The URI for the Redis connection.
+        :type redis_uri: str
+        :param max_connections: The maximum number of connections of the pool, None for no limit.
+        :type max_connections: Optional[int]
+        :param health_check_interval: Seconds of idleness before a connection is checked.
+        :type health_check_interval: int
+
+        :return: The connection pool.
+        :rtype: redis.asyncio.ConnectionPool
+        """
+        import redis.asyncio
+
+        key = ("async_redis", redis_uri, max_connections, health_check_interval)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._check_pid()
+            pools = self._async_redis.setdefault(loop, {})
+            if key not in pools:
+                pools[key] = redis.asyncio.ConnectionPool.from_url(
+                    redis_uri,
+                    max_connections=max_connections,
+                    health_check_interval=health_check_interval,
+                )
+            self._acquisitions[key] = self._acquisitions.get(key, 0) + 1
+            return pools[key]
+
+    def s3_resource(
+        self,
+        region_name: str,
+        access_key_id: str,
+        secret_access_key: str,
+        max_pool_connections: Optional[int] = None,
+    ):
+        """
+        Return the shared S3 resource of a set of credentials.
+
+        :param region_name: The AWS region of the S3 bucket.
+        :type region_name: str
+        :param access_key_id: The AWS access key ID for authentication.
+        :type access_key_id: str
+        :param secret_access_key: The AWS secret access key for authentication.
+        :type secret_access_key: str
+        :param max_pool_connections: The maximum number of HTTP connections, None uses the botocore default.
+        :type max_pool_connections: Optional[int]
+
+        :return: The S3 resource from the `boto3` library.
+        :rtype: boto3.resources.base.ServiceResource
+        """
+        import boto3
+        from botocore.config import Config
+
+        key = (
+            "s3",
+            region_name,
+            access_key_id,
+            secret_access_key,
+            max_pool_connections,
+        )
+        with self._lock:
+            self._check_pid()
+            if key not in self._s3:
+                params = {}
+                if max_pool_connections is not None:
+                    params["config"] = Config(max_pool_connections=max_pool_connections)
+                self._s3[key] = boto3.resource(
+                    "s3",
+                    region_name=region_name,
+                    aws_access_key_id=access_key_id,
+                    aws_secret_access_key=secret_access_key,
+                    **params,
+                )
+            self._acquisitions[key] = self._acquisitions.get(key, 0) + 1
+            return self._s3[key]
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Return the usage of every shared pool and resource.
+
+        ``acquisitions`` is the number of times a pool or resource was handed
+        to a storage, it is never decremented. Redis URIs are reported without
+        their password and S3 resources by region and access key ID. The
+        pools of a URI or of credentials, one per set of options and event
+        loop, are reported together: ``pools`` counts them and the other
+        statistics are summed, None when one of them is unknown or unbounded.
+
+        :return: For ``"redis"``, ``"async_redis"`` and ``"s3"``, the statistics of each pool.
+        :rtype: Dict[str, Dict[str, Dict[str, Any]]]
+        """
+        with self._lock:
+            self._check_pid()
+            stats = {"redis": {}, "async_redis": {}, "s3": {}}
+            for key, pool in self._redis.items():
+                _add_stats(
+                    stats["redis"], _redis_name(key), self._pool_stats(key, pool)
+                )
+            for pools in list(self._async_redis.values()):
+                for key, pool in pools.items():
+                    _add_stats(
+                        stats["async_redis"],
+                        _redis_name(key),
+                        self._pool_stats(key, pool),
+                    )
+            for key in self._s3:
+                _, region_name, access_key_id, _, max_pool_connections = key
+                _add_stats(
+                    stats["s3"],
+                    f"{region_name}/{access_key_id}",
+                    {
+                        "pools": 1,
+                        "acquisitions": self._acquisitions.get(key, 0),
+                        "max_connections": max_pool_connections,
+                    },
+                )
+            return stats
+
+    def clear(self):
+        """
+        Forget every pool and resource, storages already built keep theirs.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self._reset()
+
+    def _pool_stats(self, key: Tuple, pool) -> Dict[str, Any]:
+        return {
+            "pools": 1,
+            "acquisitions": self._acquisitions.get(key, 0),
+            "max_connections": key[2],
+            "created": getattr(pool, "_created_connections", None),
+            "in_use": len(getattr(pool, "_in_use_connections", ())),
+            "available": len(getattr(pool, "_available_connections", ())),
+        }
+
+    def _check_pid(self):
+        # Covers platforms without os.register_at_fork.
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _after_fork(self):
+        """
+        Forget the pools inherited from the parent, their sockets are its own.
+        """
+        self._lock = threading.Lock()
+        self._reset()
+        self._pid = os.getpid()
+        self.forks += 1
+
+    def _reset(self):
+        self._redis = {}
+        self._async_redis = weakref.WeakKeyDictionary()
+        self._s3 = {}
+        self._acquisitions = {}
+
+
+def _add_stats(entries: Dict[str, Dict[str, Any]], name: str, stats: Dict[str, Any]):
+    """
+    Add the statistics of a pool to those of the other pools with the same name.
+    """
+    total = entries.setdefault(name, dict.fromkeys(stats, 0))
+    for field, value in stats.items():
+        if value is None or total[field] is None:
+            total[field] = None
+        else:
+            total[field] += value
+
+
+def _redis_name(key: Tuple) -> str:
+    """
+    Return the URI of a pool key with its password masked.
+    """
+    parts = urlsplit(key[1])
+    if parts.password:
+        netloc = parts.netloc.replace(f":{parts.password}@", ":***@", 1)
+        parts = parts._replace(netloc=netloc)
+
+    return urlunsplit(parts)
+
+
+registry = ConnectionRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry._after_fork)
@@ -1 +1,3 @@
+from tinydbstorage.schema.index import IndexSchema
+from tinydbstorage.schema.retry import RetrySchema
 from tinydbstorage.schema.s3 import S3Schema
@@ -0,0 +1,22 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class IndexSchema(BaseModel):
+    """
+    Represents a secondary index on a field of the documents of a table.
+
+    :param table: The name of the indexed table.
+    :type table: str
+    :param field: The indexed field, nested fields are separated by dots, e.g. ``"address.city"``.
+    :type field: str
+    :param kind: ``"hash"`` for equality lookups or ``"sorted"`` for range lookups.
+    :type kind: str
+
+    .. versionadded:: 2.1.0
+    """
+
+    table: str = Field(min_length=1)
+    field: str = Field(min_length=1)
+    kind: Literal["hash", "sorted"] = Field(default="hash")
@@ -0,0 +1,42 @@
+import random
+
+from pydantic import BaseModel, Field
+
+
+class RetrySchema(BaseModel):
+    """
+    Represents a retry policy with exponential backoff.
+
+    :param max_retries: How many times an operation is retried before giving up.
+    :type max_retries: int
+    :param base_delay: The delay in seconds before the first retry.
+    :type base_delay: float
+    :param max_delay: The upper bound in seconds of a single delay.
+    :type max_delay: float
+    :param multiplier: The factor applied to the delay after every retry.
+    :type multiplier: float
+    :param jitter: Whether to randomize the delay to spread out competing writers.
+    :type jitter: bool
+    """
+
+    max_retries: int = Field(default=5, ge=0)
+    base_delay: float = Field(default=0.01, ge=0)
+    max_delay: float = Field(default=1.0, ge=0)
+    multiplier: float = Field(default=2.0, ge=1)
+    jitter: bool = Field(default=True)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Return the delay before the given retry attempt.
+
+        :param attempt: The retry attempt, starting at 1.
+        :type attempt: int
+
+        :return: The delay in seconds.
+        :rtype: float
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            return random.uniform(0, delay)
+
+        return delay
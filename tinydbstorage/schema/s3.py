@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +17,34 @@ class S3Schema(BaseModel):
     :type access_key_id: str
     :param secret_access_key: The AWS secret access key for authentication.
     :type secret_access_key: str
+    :param max_staleness: Seconds during which the cached data is returned without asking S3.
+    :type max_staleness: Optional[float]
+    :param write_behind: Whether writes are buffered in memory and uploaded by a background thread.
+    :type write_behind: bool
+    :param flush_interval: Seconds between two background uploads in write-behind mode.
+    :type flush_interval: float
+    :param flush_every: Number of buffered writes that triggers an upload in write-behind mode.
+    :type flush_every: Optional[int]
+    :param layout: ``"single"`` for one object holding every table, ``"sharded"`` for a manifest plus one object per table shard.
+    :type layout: str
+    :param key_prefix: The key prefix of the sharded layout, defaults to `file_path`.
+    :type key_prefix: Optional[str]
+    :param shard_size: The number of consecutive doc_ids per shard, None keeps one shard per table.
+    :type shard_size: Optional[int]
+    :param max_concurrency: The number of objects transferred in parallel.
+    :type max_concurrency: int
+    :param codec: The compression codec of the objects, see `tinydbstorage.codec.CODECS`.
+    :type codec: str
+    :param compression_level: The compression level, None uses the codec default.
+    :type compression_level: Optional[int]
+    :param serializer: The serializer name, see `tinydbstorage.serializer.SERIALIZERS`.
+    :type serializer: str
+    :param max_pool_connections: The maximum number of HTTP connections of the shared client, None uses the botocore default.
+    :type max_pool_connections: Optional[int]
+    :param streaming: Whether the single object is parsed while it downloads and uploaded in parts while it is serialized.
+    :type streaming: bool
+    :param part_size: The size in bytes of the multipart upload parts in streaming mode, at least 5 MiB.
+    :type part_size: int
     """
 
     file_path: str
@@ -22,6 +52,20 @@ class S3Schema(BaseModel):
     region_name: str = Field(default="ap-southeast-1")
     access_key_id: str
     secret_access_key: str
+    max_staleness: Optional[float] = Field(default=None, ge=0)
+    write_behind: bool = Field(default=False)
+    flush_interval: float = Field(default=1.0, gt=0)
+    flush_every: Optional[int] = Field(default=None, ge=1)
+    layout: Literal["single", "sharded"] = Field(default="single")
+    key_prefix: Optional[str] = Field(default=None)
+    shard_size: Optional[int] = Field(default=None, ge=1)
+    max_concurrency: int = Field(default=8, ge=1)
+    codec: Literal["none", "gzip", "zlib", "lzma", "zstd"] = Field(default="none")
+    compression_level: Optional[int] = Field(default=None)
+    serializer: Literal["json", "orjson", "msgpack"] = Field(default="json")
+    max_pool_connections: Optional[int] = Field(default=None, ge=1)
+    streaming: bool = Field(default=False)
+    part_size: int = Field(default=8 * 1024 * 1024, ge=5 * 1024 * 1024)
 
     @classmethod
     def from_param(
@@ -31,6 +75,20 @@ class S3Schema(BaseModel):
         region_name: str,
         access_key_id: str,
         secret_access_key: str,
+        max_staleness: Optional[float] = None,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        flush_every: Optional[int] = None,
+        layout: str = "single",
+        key_prefix: Optional[str] = None,
+        shard_size: Optional[int] = None,
+        max_concurrency: int = 8,
+        codec: str = "none",
+        compression_level: Optional[int] = None,
+        serializer: str = "json",
+        max_pool_connections: Optional[int] = None,
+        streaming: bool = False,
+        part_size: int = 8 * 1024 * 1024,
     ) -> "S3Schema":
         """
         Create an instance of S3Schema from individual parameters.
@@ -45,6 +103,34 @@ class S3Schema(BaseModel):
         :type access_key_id: str
         :param secret_access_key: The AWS secret access key for authentication.
         :type secret_access_key: str
+        :param max_staleness: Seconds during which the cached data is returned without asking S3.
+        :type max_staleness: Optional[float]
+        :param write_behind: Whether writes are buffered in memory and uploaded by a background thread.
+        :type write_behind: bool
+        :param flush_interval: Seconds between two background uploads in write-behind mode.
+        :type flush_interval: float
+        :param flush_every: Number of buffered writes that triggers an upload in write-behind mode.
+        :type flush_every: Optional[int]
+        :param layout: ``"single"`` or ``"sharded"``.
+        :type layout: str
+        :param key_prefix: The key prefix of the sharded layout, defaults to `file_path`.
+        :type key_prefix: Optional[str]
+        :param shard_size: The number of consecutive doc_ids per shard.
+        :type shard_size: Optional[int]
+        :param max_concurrency: The number of objects transferred in parallel.
+        :type max_concurrency: int
+        :param codec: The compression codec of the objects.
+        :type codec: str
+        :param compression_level: The compression level, None uses the codec default.
+        :type compression_level: Optional[int]
+        :param serializer: The serializer name.
+        :type serializer: str
+        :param max_pool_connections: The maximum number of HTTP connections of the shared client.
+        :type max_pool_connections: Optional[int]
+        :param streaming: Whether the single object is streamed.
+        :type streaming: bool
+        :param part_size: The size in bytes of the multipart upload parts in streaming mode.
+        :type part_size: int
 
         :return: An instance of S3Schema.
         :rtype: S3Schema
@@ -55,4 +141,18 @@ class S3Schema(BaseModel):
             region_name=region_name,
             access_key_id=access_key_id,
             secret_access_key=secret_access_key,
+            max_staleness=max_staleness,
+            write_behind=write_behind,
+            flush_interval=flush_interval,
+            flush_every=flush_every,
+            layout=layout,
+            key_prefix=key_prefix,
+            shard_size=shard_size,
+            max_concurrency=max_concurrency,
+            codec=codec,
+            compression_level=compression_level,
+            serializer=serializer,
+            max_pool_connections=max_pool_connections,
+            streaming=streaming,
+            part_size=part_size,
         )
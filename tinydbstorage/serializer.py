@@ -0,0 +1,201 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Union
+
+from tinydbstorage.instrument import DESERIALIZE, SERIALIZE, measured
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class Serializer(ABC):
+    """
+    Represents the (de)serialization of the database used by the storages.
+
+    TinyDB expects the doc_ids of a table read from a storage to be strings,
+    as the JSON format turns every key into a string. Every serializer keeps
+    that behaviour, whatever its format supports.
+
+    .. versionadded:: 2.1.0
+
+    .. versionchanged:: 2.1.0
+       The ``dumps`` and ``loads`` methods of subclasses are measured by
+       `tinydbstorage.instrument`.
+    """
+
+    name = ""
+
+    def __init_subclass__(cls, **kwargs):
+        # Every serializer, custom ones included, reports its timings to the
+        # instrumentation.
+        super().__init_subclass__(**kwargs)
+        for method, operation in (("dumps", SERIALIZE), ("loads", DESERIALIZE)):
+            function = cls.__dict__.get(method)
+            if function is not None and not hasattr(function, "__measured__"):
+                setattr(cls, method, measured(operation)(function))
+
+    @abstractmethod
+    def dumps(self, data: Any) -> Union[str, bytes]:
+        """
+        Serialize data.
+
+        :param data: The data to serialize.
+        :type data: Any
+
+        :return: The serialized data.
+        :rtype: Union[str, bytes]
+        """
+        raise NotImplementedError("To be overridden!")
+
+    @abstractmethod
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        """
+        Deserialize data.
+
+        :param payload: The serialized data.
+        :type payload: Union[str, bytes]
+
+        :return: The deserialized data.
+        :rtype: Any
+        """
+        raise NotImplementedError("To be overridden!")
+
+    def dumpb(self, data: Any) -> bytes:
+        """
+        Serialize data to bytes.
+
+        :param data: The data to serialize.
+        :type data: Any
+
+        :return: The serialized data.
+        :rtype: bytes
+        """
+        payload = self.dumps(data)
+        if isinstance(payload, str):
+            return payload.encode("utf-8")
+
+        return payload
+
+
+class JSONSerializer(Serializer):
+    """
+    Serialize with the standard library `json` module.
+
+    :param encoding: The text encoding of serialized bytes. Default is "utf-8".
+    :type encoding: str
+    :param kwargs: Additional keyword arguments to pass to `json.dumps`.
+    """
+
+    name = "json"
+
+    def __init__(self, encoding: str = "utf-8", **kwargs):
+        self.encoding = encoding
+        self.kwargs = kwargs
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data, **self.kwargs)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        if isinstance(payload, (bytes, bytearray)) and self.encoding != "utf-8":
+            payload = payload.decode(self.encoding)
+
+        return json.loads(payload)
+
+    def dumpb(self, data: Any) -> bytes:
+        return self.dumps(data).encode(self.encoding)
+
+
+class OrjsonSerializer(Serializer):
+    """
+    Serialize JSON with `orjson`, working on bytes without text copies.
+
+    Non string keys are only converted, like `json` does, when the data
+    contains some, as the conversion slows `orjson` down.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The orjson serializer requires the orjson package")
+
+    def dumps(self, data: Any) -> bytes:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        return orjson.loads(payload)
+
+
+class MsgpackSerializer(Serializer):
+    """
+    Serialize with the compact binary `msgpack` format.
+
+    The keys of the two outer levels (tables and doc_ids) are converted to
+    strings, deeper keys keep their type.
+    """
+
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("The msgpack serializer requires the msgpack package")
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(_str_keys(data), use_bin_type=True)
+
+    def loads(self, payload: Union[str, bytes]) -> Any:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, Serializer] = "json", **kwargs) -> Serializer:
+    """
+    Return a serializer instance from its name.
+
+    :param serializer: A serializer name from `SERIALIZERS`, or an instance.
+    :type serializer: Union[str, Serializer]
+    :param kwargs: Keyword arguments for the serializer, e.g. `json.dumps` options.
+
+    :return: The serializer.
+    :rtype: Serializer
+
+    :raises ValueError: When the serializer name is unknown.
+    :raises ImportError: When the serializer needs a package that is not installed.
+    """
+    if isinstance(serializer, Serializer):
+        return serializer
+
+    if serializer not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown serializer: {serializer!r}, expected one of {tuple(SERIALIZERS)}"
+        )
+
+    return SERIALIZERS[serializer](**kwargs)
+
+
+def _str_keys(data: Any) -> Any:
+    if not isinstance(data, dict):
+        return data
+
+    return {
+        str(key): (
+            {str(k): v for k, v in value.items()} if isinstance(value, dict) else value
+        )
+        for key, value in data.items()
+    }
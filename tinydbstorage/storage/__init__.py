@@ -1,5 +1,50 @@
-from tinydbstorage.storage.file import FileStorage
-from tinydbstorage.storage.memory import MemoryStorage
-from tinydbstorage.storage.redis import RedisStorage
-from tinydbstorage.storage.s3 import S3Storage
-from tinydbstorage.storage.s3 import S3Storage
+"""
+The storages are imported on first access, so importing `MemoryStorage` or
+`FileStorage` does not import boto3, redis or pydantic.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# The module of every storage, by name.
+_STORAGES = {
+    "AsyncRedisStorage": "async_redis",
+    "AsyncS3Storage": "async_s3",
+    "ConcurrentMemoryStorage": "concurrent",
+    "LockedTable": "concurrent",
+    "FileStorage": "file",
+    "JournalFileStorage": "journal",
+    "MappedFileStorage": "mapped",
+    "MemoryStorage": "memory",
+    "RedisStorage": "redis",
+    "S3Storage": "s3",
+    "TieredStorage": "tiered",
+}
+
+__all__ = list(_STORAGES)
+
+if TYPE_CHECKING:
+    from tinydbstorage.storage.async_redis import AsyncRedisStorage
+    from tinydbstorage.storage.async_s3 import AsyncS3Storage
+    from tinydbstorage.storage.concurrent import ConcurrentMemoryStorage, LockedTable
+    from tinydbstorage.storage.file import FileStorage
+    from tinydbstorage.storage.journal import JournalFileStorage
+    from tinydbstorage.storage.mapped import MappedFileStorage
+    from tinydbstorage.storage.memory import MemoryStorage
+    from tinydbstorage.storage.redis import RedisStorage
+    from tinydbstorage.storage.s3 import S3Storage
+    from tinydbstorage.storage.tiered import TieredStorage
+
+
+def __getattr__(name: str):
+    module = _STORAGES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_STORAGES})
@@ -0,0 +1,307 @@
+import asyncio
+from typing import Optional, Dict, Any, Callable, Union
+
+import redis
+import redis.asyncio
+
+from tinydbstorage.aio import AsyncStorage
+from tinydbstorage.codec import NONE, check_codec, decompress
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.instrument import NETWORK, instrumentation, instrumented
+from tinydbstorage.registry import registry
+from tinydbstorage.schema import RetrySchema
+from tinydbstorage.serializer import JSONSerializer, Serializer, get_serializer
+from tinydbstorage.storage.redis import (
+    BLOB_LAYOUT,
+    HASH_LAYOUT,
+    RedisLayout,
+    _to_bytes,
+    _to_str,
+)
+from tinydbstorage.tracker import ChangeTracker
+
+
+class AsyncRedisStorage(RedisLayout, AsyncStorage):
+    """
+    Represents an asyncio storage using Redis, for `AsyncTinyDB`.
+
+    It stores the data like `RedisStorage`, both storages can share a prefix.
+    Connections come from a pool shared by the storages of the event loop
+    using the same URI.
+
+    Example usage:
+
+    >>> db = AsyncTinyDB(storage=AsyncRedisStorage, redis_uri="redis://localhost:6379/0")
+    >>> await db.insert({"name": "John"})
+
+    :param redis_uri: The URI for the Redis connection.
+    :type redis_uri: str
+    :param prefix: The key (or key prefix in the hash layout) used to store the database.
+    :type prefix: str
+    :param layout: Either ``"blob"`` or ``"hash"``, see `RedisStorage`.
+    :type layout: str
+    :param optimistic: Whether writes fail with `WriteConflictError` when another
+        writer changed the database since the last read.
+    :type optimistic: bool
+    :param retry: The backoff policy used by `retry_on_conflict`.
+    :type retry: RetrySchema
+    :param codec: The compression codec of the stored values, see `tinydbstorage.codec.CODECS`.
+    :type codec: str
+    :param compression_level: The compression level, None uses the codec default.
+    :type compression_level: int or None
+    :param serializer: The serializer name or instance, see `tinydbstorage.serializer`.
+    :type serializer: str or Serializer
+    :param max_connections: The maximum number of connections of the shared pool, None for no limit.
+    :type max_connections: int or None
+    :param health_check_interval: Seconds of idleness after which a pooled connection is checked with a PING.
+    :type health_check_interval: int
+    :param kwargs: Additional keyword arguments to pass to the Redis client.
+    :param conflicts: The number of writes rejected because of a concurrent write.
+    :type conflicts: int
+    :param retries: The number of operations retried by `retry_on_conflict`.
+    :type retries: int
+
+    .. versionadded:: 2.1.0
+       Added the `AsyncRedisStorage` class.
+    """
+
+    def __init__(
+        self,
+        redis_uri: str,
+        prefix: str = "tiny_db",
+        layout: str = BLOB_LAYOUT,
+        optimistic: bool = False,
+        retry: Optional[RetrySchema] = None,
+        codec: str = NONE,
+        compression_level: Optional[int] = None,
+        serializer: Union[str, Serializer] = JSONSerializer.name,
+        max_connections: Optional[int] = None,
+        health_check_interval: int = 0,
+        **kwargs,
+    ):
+        """
+        Initialize a new asyncio Redis storage.
+
+        The connection is opened by the first operation, inside the event loop.
+
+        :param redis_uri: The URI for the Redis connection.
+        :type redis_uri: str
+        :param prefix: The key (or key prefix in the hash layout) used to store the database.
+        :type prefix: str
+        :param layout: Either ``"blob"`` or ``"hash"``. Default is ``"blob"``.
+        :type layout: str
+        :param optimistic: Whether to detect concurrent writes. Default is False.
+        :type optimistic: bool
+        :param retry: The backoff policy used by `retry_on_conflict`. Default is `RetrySchema()`.
+        :type retry: RetrySchema or None
+        :param codec: The compression codec. Default is "none".
+        :type codec: str
+        :param compression_level: The compression level. Default is None.
+        :type compression_level: int or None
+        :param serializer: The serializer name or instance. Default is "json".
+        :type serializer: str or Serializer
+        :param max_connections: The maximum number of connections of the shared pool. Default is None.
+        :type max_connections: int or None
+        :param health_check_interval: Seconds of idleness before a connection is checked, 0 disables it.
+        :type health_check_interval: int
+        :param kwargs: Additional keyword arguments to pass to the Redis client.
+        """
+        if layout not in (BLOB_LAYOUT, HASH_LAYOUT):
+            raise ValueError(f"Unknown Redis layout: {layout!r}")
+        check_codec(codec)
+
+        self.redis_uri = redis_uri
+        self.prefix = prefix
+        self.version_key = f"{prefix}:__version__"
+        self.layout = layout
+        self.optimistic = optimistic
+        self.retry = retry or RetrySchema()
+        self.conflicts = 0
+        self.retries = 0
+        self.codec = codec
+        self.compression_level = compression_level
+        self.serializer = get_serializer(serializer)
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self._kwargs = kwargs
+        self._connection: Optional[redis.asyncio.Redis] = None
+        self._tracker = ChangeTracker(self.serializer.dumpb)
+        self._version: Optional[bytes] = None
+
+    @property
+    def connection(self) -> redis.asyncio.Redis:
+        """
+        The Redis client, bound to the shared pool of the running event loop.
+
+        :return: The Redis client.
+        :rtype: redis.asyncio.Redis
+        """
+        if self._connection is None:
+            self._connection = redis.asyncio.Redis(
+                connection_pool=registry.async_redis_pool(
+                    self.redis_uri, self.max_connections, self.health_check_interval
+                ),
+                **self._kwargs,
+            )
+
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection: redis.asyncio.Redis):
+        self._connection = connection
+
+    @instrumented
+    async def read(self, track: bool = True) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read data from Redis storage.
+
+        :param track: Whether the version and the documents read become the
+            base of the next write, see `read_snapshot`.
+        :type track: bool
+
+        :return: Dictionary data from Redis storage.
+        :rtype: Dict[str, Any]
+        """
+        try:
+            if self.layout == HASH_LAYOUT:
+                return await self._read_hash(track)
+
+            if self.optimistic and track:
+                pipe = self.connection.pipeline(transaction=True)
+                pipe.get(self.version_key)
+                pipe.get(self.prefix)
+                with instrumentation.span(NETWORK) as span:
+                    self._version, resp = await pipe.execute()
+                    span.size = len(resp or b"")
+            else:
+                with instrumentation.span(NETWORK) as span:
+                    resp = await self.connection.get(self.prefix)
+                    span.size = len(resp or b"")
+
+            return self.serializer.loads(decompress(resp))
+        except Exception:
+            return {}
+
+    async def read_snapshot(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read data from Redis storage without changing the base of the next write.
+
+        The tasks of `AsyncTinyDB` share the storage, a read-only operation
+        overlapping a write would otherwise record a newer version than the
+        data being written was read at, and the optimistic check would pass.
+
+        :return: Dictionary data from Redis storage.
+        :rtype: Dict[str, Any]
+        """
+        return await self.read(track=False)
+
+    @instrumented
+    async def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write all data to Redis storage.
+
+        :param data: Dictionary data to store in Redis.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+
+        :raises WriteConflictError: In optimistic mode, when another writer
+            changed the database since the last read.
+        """
+        if self.layout == HASH_LAYOUT and not self._tracker.synced:
+            # Nothing was read yet, load the current state to diff against.
+            await self._read_hash()
+
+        if not self.optimistic:
+            pipe = self.connection.pipeline(transaction=True)
+            delta = self._queue_write(pipe, data)
+            with instrumentation.span(NETWORK):
+                self._version = _to_bytes((await pipe.execute())[-1])
+            self._commit(delta, self._version)
+            return None
+
+        async with self.connection.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.version_key)
+                if await pipe.get(self.version_key) != self._version:
+                    raise redis.WatchError(self.version_key)
+
+                pipe.multi()
+                delta = self._queue_write(pipe, data)
+                with instrumentation.span(NETWORK):
+                    self._version = _to_bytes((await pipe.execute())[-1])
+                self._commit(delta, self._version)
+            except redis.WatchError:
+                self.conflicts += 1
+                # Force the retried operation to start from the current state.
+                self._tracker.reset()
+                self._version = None
+                raise WriteConflictError(
+                    f"{self.prefix} was modified by another writer"
+                ) from None
+
+        return None
+
+    async def retry_on_conflict(self, operation: Callable, *args, **kwargs):
+        """
+        Await a TinyDB operation, retrying it while its write is rejected.
+
+        :param operation: The coroutine function to call, e.g. ``db.table("users").update``.
+        :type operation: Callable
+        :param args: Positional arguments for the operation.
+        :param kwargs: Keyword arguments for the operation.
+
+        :return: The result of the operation.
+
+        :raises WriteConflictError: When the retry policy is exhausted.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await operation(*args, **kwargs)
+            except WriteConflictError:
+                if attempt >= self.retry.max_retries:
+                    raise
+
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(self.retry.delay(attempt))
+
+    async def close(self):
+        """
+        Release the Redis client, the shared pool stays open.
+
+        :return: None
+        :rtype: None
+        """
+        if self._connection is not None:
+            await self._connection.aclose()
+            self._connection = None
+
+    async def _read_hash(self, track: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every table hash in a single pipeline.
+
+        :param track: Whether the version and the documents become the base of the next write.
+        :type track: bool
+
+        :return: Dictionary data from Redis storage.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        pipe = self.connection.pipeline(transaction=True)
+        pipe.get(self.version_key)
+        pipe.smembers(self.prefix)
+        with instrumentation.span(NETWORK):
+            version, members = await pipe.execute()
+        if track:
+            self._version = version
+
+        names = sorted(_to_str(name) for name in members)
+        pipe = self.connection.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self.table_key(name))
+
+        with instrumentation.span(NETWORK):
+            tables = await pipe.execute()
+        return self._decode_hash(names, tables, track)
@@ -0,0 +1,177 @@
+import time
+from contextlib import AsyncExitStack
+from typing import Optional, Dict, Any
+
+from botocore.exceptions import ClientError
+
+from tinydbstorage.aio import AsyncStorage
+from tinydbstorage.codec import check_codec, compress, decompress
+from tinydbstorage.instrument import NETWORK, instrumentation, instrumented
+from tinydbstorage.schema import S3Schema
+from tinydbstorage.serializer import get_serializer
+from tinydbstorage.storage.s3 import NOT_MODIFIED, SINGLE_LAYOUT
+from tinydbstorage.tracker import copy_data
+
+try:
+    from aiobotocore.session import get_session
+except ImportError:  # pragma: no cover - optional dependency
+    get_session = None
+
+
+class AsyncS3Storage(AsyncStorage):
+    """
+    Represents an asyncio storage using Amazon S3, for `AsyncTinyDB`.
+
+    It stores the data in one object like `S3Storage` and keeps the decoded
+    data with its ETag, reads only download the object again when it changed.
+    Requests are sent with `aiobotocore`, which must be installed.
+
+    Example usage:
+
+    >>> db = AsyncTinyDB(storage=AsyncS3Storage, config=s3_config)
+    >>> await db.insert({"name": "John"})
+
+    :param config: The S3 configuration schema, only the single layout is supported.
+    :type config: S3Schema
+
+    .. versionadded:: 2.1.0
+       Added the `AsyncS3Storage` class.
+    """
+
+    def __init__(self, config: S3Schema):
+        """
+        Initialize a new asyncio Amazon S3 storage.
+
+        The client is created by the first operation, inside the event loop.
+
+        :param config: The S3 configuration schema.
+        :type config: S3Schema
+
+        :raises ImportError: When `aiobotocore` is not installed.
+        :raises ValueError: When the configuration asks for the sharded layout or write-behind.
+        """
+        if get_session is None:
+            raise ImportError("AsyncS3Storage requires the aiobotocore package")
+        if config.layout != SINGLE_LAYOUT or config.write_behind:
+            raise ValueError(
+                "AsyncS3Storage only supports the single layout without write-behind"
+            )
+        check_codec(config.codec)
+
+        self.config = config
+        self.bucket = config.bucket_name
+        self.file_path = config.file_path
+        self.max_staleness = config.max_staleness
+        self.codec = config.codec
+        self.compression_level = config.compression_level
+        self.serializer = get_serializer(config.serializer)
+        self.client = None
+        self._exit_stack = AsyncExitStack()
+        self._etag: Optional[str] = None
+        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fetched_at = 0.0
+
+    @instrumented
+    async def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read data from Amazon S3 storage.
+
+        :return: Dictionary data from S3 storage.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        now = time.monotonic()
+        if (
+            self._cache is not None
+            and self.max_staleness is not None
+            and now - self._fetched_at < self.max_staleness
+        ):
+            return self._cached()
+
+        params = {}
+        if self._cache is not None and self._etag is not None:
+            params["IfNoneMatch"] = self._etag
+
+        client = await self._client()
+        try:
+            with instrumentation.span(NETWORK, self) as span:
+                resp = await client.get_object(
+                    Bucket=self.bucket, Key=self.file_path, **params
+                )
+                async with resp["Body"] as stream:
+                    body = await stream.read()
+                span.size = len(body)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in NOT_MODIFIED:
+                self._fetched_at = now
+                return self._cached()
+
+            self._store_cache(None, None, now)
+            return dict()
+
+        self._store_cache(
+            self.serializer.loads(decompress(body)), resp.get("ETag"), now
+        )
+        return self._cached()
+
+    @instrumented
+    async def write(self, data: Dict[str, Any]):
+        """
+        Write all data to Amazon S3 storage.
+
+        :param data: Dictionary data to store in S3.
+        :type data: Dict[str, Any]
+
+        :return: None
+        :rtype: None
+        """
+        body = compress(self.serializer.dumpb(data), self.codec, self.compression_level)
+        client = await self._client()
+        try:
+            with instrumentation.span(NETWORK, self) as span:
+                resp = await client.put_object(
+                    Bucket=self.bucket, Key=self.file_path, Body=body
+                )
+                span.size = len(body)
+        except Exception:
+            self._store_cache(None, None, 0.0)
+            raise
+
+        self._store_cache(copy_data(data), resp.get("ETag"), time.monotonic())
+        return None
+
+    async def close(self):
+        """
+        Close the S3 client.
+
+        :return: None
+        :rtype: None
+        """
+        await self._exit_stack.aclose()
+        self.client = None
+
+    async def _client(self):
+        """
+        Return the S3 client, creating it in the running event loop.
+        """
+        if self.client is None:
+            self.client = await self._exit_stack.enter_async_context(
+                get_session().create_client(
+                    "s3",
+                    region_name=self.config.region_name,
+                    aws_access_key_id=self.config.access_key_id,
+                    aws_secret_access_key=self.config.secret_access_key,
+                )
+            )
+
+        return self.client
+
+    def _store_cache(
+        self, data: Optional[Dict[str, Any]], etag: Optional[str], fetched_at: float
+    ):
+        self._cache = data
+        self._etag = etag
+        self._fetched_at = fetched_at
+
+    def _cached(self) -> Dict[str, Dict[str, Any]]:
+        # TinyDB changes the documents it reads in place, they are copied.
+        return copy_data(self._cache)
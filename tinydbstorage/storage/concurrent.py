@@ -0,0 +1,169 @@
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+
+from tinydb.table import Table
+
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.storage.memory import MemoryStorage, TableView, _copy_table
+
+
+class ConcurrentMemoryStorage(MemoryStorage):
+    """
+    Represents a thread-safe in-memory storage with one lock per table stripe.
+
+    Reads never take a lock, they return the current immutable version of
+    the data. A write only locks the stripes of the tables it changed and
+    merges them into the latest version, so writers of different tables do
+    not wait for each other. A write changing a table that another thread
+    changed since this thread read it raises `WriteConflictError` instead of
+    losing that change.
+
+    Use `LockedTable` to run each TinyDB operation under the lock of its
+    table, so that writers of the same table queue instead of conflicting:
+
+    >>> class ConcurrentTinyDB(TinyDB):
+    ...     table_class = LockedTable
+    >>> db = ConcurrentTinyDB(storage=ConcurrentMemoryStorage)
+
+    :param stripes: The number of table locks. Default is 16.
+    :type stripes: int
+
+    .. warning::
+       In-memory storage is volatile. All data is lost when the program exits.
+
+    .. versionadded:: 2.1.0
+       Added the `ConcurrentMemoryStorage` class.
+    """
+
+    def __init__(self, stripes: int = 16):
+        """
+        Initialize a ConcurrentMemoryStorage instance.
+
+        :param stripes: The number of table locks. Default is 16.
+        :type stripes: int
+        """
+        super(ConcurrentMemoryStorage, self).__init__()
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+        # Only guards the swap of the version, never held while copying tables.
+        self._commit_lock = threading.Lock()
+        self._local = threading.local()
+        self.conflicts = 0
+
+    @instrumented
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the current version of the data without locking.
+
+        :return: Dictionary data from the in-memory storage.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        tables = self.internal_memory
+        self._local.base = tables
+        return {name: TableView(docs) for name, docs in tables.items()}
+
+    @instrumented
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Merge the tables changed since the last read of this thread.
+
+        :param data: Dictionary data to store in memory.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+
+        :raises WriteConflictError: When a changed table was changed by another thread since it was read.
+        """
+        base = getattr(self._local, "base", None)
+        if base is None:
+            # A write without a read replaces the whole data.
+            base = self.internal_memory
+        dropped = [name for name in base if name not in data]
+
+        changed = {}
+        for name, table in data.items():
+            if isinstance(table, TableView):
+                if table._docs is not base.get(name):
+                    changed[name] = table._docs
+            else:
+                changed[name] = _copy_table(table)
+
+        names = list(changed) + dropped
+        with self.locked(*names):
+            current = self.internal_memory
+            for name in names:
+                if current.get(name) is not base.get(name):
+                    self.conflicts += 1
+                    raise WriteConflictError(
+                        f"Table {name!r} was changed by another thread"
+                    )
+
+            with self._commit_lock:
+                tables = dict(self.internal_memory)
+                tables.update(changed)
+                for name in dropped:
+                    tables.pop(name, None)
+                self.internal_memory = tables
+
+        self._local.base = tables
+        return None
+
+    @contextmanager
+    def locked(self, *tables: str) -> Iterator[None]:
+        """
+        Hold the locks of some tables, writes of other threads to them wait.
+
+        Locks are reentrant, and taken in a fixed order so that two threads
+        locking the same tables cannot deadlock.
+
+        Example usage:
+
+        >>> with storage.locked("users"):
+        ...     db.table("users").update(...)
+
+        :param tables: The table names.
+        :type tables: str
+        """
+        stripes = sorted({self._stripe(name) for name in tables})
+        for stripe in stripes:
+            self._stripes[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._stripes[stripe].release()
+
+    def _stripe(self, name: str) -> int:
+        return hash(name) % len(self._stripes)
+
+
+class LockedTable(Table):
+    """
+    Represents a TinyDB table running its operations under the table lock.
+
+    Use it as the ``table_class`` of a TinyDB subclass together with
+    `ConcurrentMemoryStorage`, other storages are used without locking.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def _get_next_id(self):
+        with self._locked():
+            return super(LockedTable, self)._get_next_id()
+
+    def _update_table(self, updater):
+        with self._locked():
+            return super(LockedTable, self)._update_table(updater)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if isinstance(self._storage, ConcurrentMemoryStorage):
+            with self._storage.locked(self.name):
+                yield
+        else:
+            yield
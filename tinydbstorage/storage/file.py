@@ -1,7 +1,44 @@
+import atexit
+import io
+import os
+import stat
+import tempfile
+import threading
+import zlib
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, Set, Tuple, Union
+
 from tinydb.storages import JSONStorage
 
+from tinydbstorage.codec import (
+    NONE,
+    check_codec,
+    compress,
+    decompress,
+    iter_decompress,
+)
+from tinydbstorage.index import Indexes
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.serializer import JSONSerializer, Serializer, get_serializer
+from tinydbstorage.stream import (
+    BATCH_SIZE,
+    TableStream,
+    iter_chunks,
+    iter_table_json,
+    stream_encoding,
+)
+
+if TYPE_CHECKING:
+    from tinydbstorage.schema import IndexSchema
+
+# How far a write is pushed before it returns: kept in the buffers of the
+# process, handed to the OS, or on the disk.
+DURABILITY_NONE = "none"
+DURABILITY_FLUSH = "flush"
+DURABILITY_FSYNC = "fsync"
+DURABILITY_LEVELS = (DURABILITY_NONE, DURABILITY_FLUSH, DURABILITY_FSYNC)
+
 
-class FileStorage(JSONStorage):
+class FileStorage(TableStream, JSONStorage):
     """
     Represents a file-based storage implementation using JSON format.
 
@@ -15,12 +52,56 @@ class FileStorage(JSONStorage):
     :type encoding: str or None
     :param access_mode: The file access mode. Default is "r+".
     :type access_mode: str
-    :param kwargs: Additional keyword arguments to pass to the parent class.
+    :param codec: The compression codec, see `tinydbstorage.codec.CODECS`. Default is "none".
+    :type codec: str
+    :param compression_level: The compression level, None uses the codec default.
+    :type compression_level: int or None
+    :param serializer: The serializer name or instance, see `tinydbstorage.serializer`. Default is "json".
+    :type serializer: str or Serializer
+    :param indexes: The secondary indexes to maintain, persisted in ``<path>.idx``.
+    :type indexes: Optional[List[IndexSchema]]
+    :param durability: One of `DURABILITY_LEVELS`: ``"none"`` leaves writes in the process
+        buffers, ``"flush"`` hands them to the OS, ``"fsync"`` waits for the disk. Default is "fsync".
+    :type durability: str
+    :param atomic: Whether writes replace the file with a complete temporary file instead of
+        rewriting it in place, so a crash never leaves a torn file. Default is False.
+    :type atomic: bool
+    :param group_commit: Seconds during which writes are gathered into a single commit by a
+        background thread, None commits every write before it returns. Default is None.
+    :type group_commit: float or None
+    :param kwargs: Additional keyword arguments to pass to the serializer.
 
     Example usage:
 
     >>> db = TinyDB(storage=FileStorage, path='data.json', create_dirs=True, encoding='utf-8', access_mode='w')
 
+    Compress the file, it is read back whatever codec it was written with:
+
+    >>> db = TinyDB(storage=FileStorage, path='data.json.gz', codec='gzip')
+
+    Use a faster serializer:
+
+    >>> db = TinyDB(storage=FileStorage, path='data.msgpack', serializer='msgpack')
+
+    Look documents up by field without scanning the table:
+
+    >>> db = TinyDB(storage=FileStorage, path='data.json', indexes=[IndexSchema(table="users", field="email")])
+    >>> db.table("users").get(doc_ids=db.storage.lookup("users", "email", "john@example.com"))
+
+    Export a table larger than the memory:
+
+    >>> for batch in db.storage.iter_table("users", batch_size=1000):
+    ...     export(batch)
+
+    Never leave a torn file behind and share one fsync between the writes of
+    5 milliseconds:
+
+    >>> db = TinyDB(storage=FileStorage, path='data.json', atomic=True, group_commit=0.005)
+
+    With ``group_commit`` a write returns once serialized, reads see it right
+    away and a crash loses at most the writes of the last ``group_commit``
+    seconds. `flush` and `close` commit the pending write immediately.
+
     .. note::
        The `FileStorage` class extends `JSONStorage` from TinyDB and inherits its methods.
 
@@ -32,10 +113,31 @@ class FileStorage(JSONStorage):
 
     .. versionchanged:: 2.0.0
        Changed the default value of `create_dirs` to False.
+
+    .. versionchanged:: 2.1.0
+       Added the `codec`, `compression_level`, `serializer`, `indexes`,
+       `durability`, `atomic` and `group_commit` parameters.
+
+    :param flushes: The number of commits done by group commit.
+    :type flushes: int
+    :param coalesced_writes: The number of writes never committed because a newer one replaced them.
+    :type coalesced_writes: int
     """
 
     def __init__(
-        self, path: str, create_dirs=False, encoding=None, access_mode="r+", **kwargs
+        self,
+        path: str,
+        create_dirs=False,
+        encoding=None,
+        access_mode="r+",
+        codec: str = NONE,
+        compression_level: Optional[int] = None,
+        serializer: Union[str, Serializer] = JSONSerializer.name,
+        indexes: Optional[List["IndexSchema"]] = None,
+        durability: str = DURABILITY_FSYNC,
+        atomic: bool = False,
+        group_commit: Optional[float] = None,
+        **kwargs,
     ):
         """
         Initialize a FileStorage instance.
@@ -48,11 +150,447 @@ class FileStorage(JSONStorage):
         :type encoding: str or None
         :param access_mode: The file access mode. Default is "r+".
         :type access_mode: str
-        :param kwargs: Additional keyword arguments to pass to the parent class.
+        :param codec: The compression codec. Default is "none".
+        :type codec: str
+        :param compression_level: The compression level. Default is None.
+        :type compression_level: int or None
+        :param serializer: The serializer name or instance. Default is "json".
+        :type serializer: str or Serializer
+        :param indexes: The secondary indexes to maintain. Default is None.
+        :type indexes: Optional[List[IndexSchema]]
+        :param durability: How far a commit is pushed. Default is "fsync".
+        :type durability: str
+        :param atomic: Whether commits replace the file with a temporary file. Default is False.
+        :type atomic: bool
+        :param group_commit: Seconds during which writes are gathered into one commit. Default is None.
+        :type group_commit: float or None
+        :param kwargs: Additional keyword arguments to pass to the serializer,
+            e.g. `json.dumps` options.
+
+        :raises ValueError: When the durability level is unknown or ``group_commit`` is negative.
         """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(
+                f"Unknown durability {durability!r}, expected one of {DURABILITY_LEVELS}"
+            )
+        if group_commit is not None and group_commit < 0:
+            raise ValueError(f"group_commit must not be negative, got {group_commit}")
+
+        check_codec(codec)
+        self.codec = codec
+        self.compression_level = compression_level
+        self.encoding = encoding or "utf-8"
+        if serializer == JSONSerializer.name:
+            self.serializer = JSONSerializer(self.encoding, **kwargs)
+        else:
+            self.serializer = get_serializer(serializer, **kwargs)
+        # The file is always opened in binary mode so compressed and plain
+        # files can be told apart on read.
+        if "b" not in access_mode:
+            access_mode = access_mode[0] + "b" + access_mode[1:]
+
         super(FileStorage, self).__init__(
-            path, create_dirs, encoding, access_mode, **kwargs
+            path, create_dirs, None, access_mode, **kwargs
+        )
+        self.path = path
+        self.indexes = Indexes(indexes or [])
+        self.index_path = f"{path}.idx"
+        self._indexes_loaded = False
+
+        self.durability = durability
+        self.atomic = atomic
+        self.group_commit = group_commit
+        self.flushes = 0
+        self.coalesced_writes = 0
+        # Serialized data waiting for the group commit, and the number of
+        # writes it stands for. The file lock orders every use of the handle.
+        self._pending: Optional[bytes] = None
+        self._pending_writes = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._file_lock = threading.Lock()
+        if group_commit is not None:
+            self._committer = threading.Thread(
+                target=self._commit_loop, name=f"FileStorage-{id(self)}", daemon=True
+            )
+            self._committer.start()
+            atexit.register(self.close)
+
+    @instrumented
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read data from the file, decompressing it if needed.
+
+        :return: Dictionary data from the file, or None if the file is empty.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        with self._condition:
+            pending = self._pending
+        if pending is not None:
+            # Not committed yet, the file has older data.
+            return self.serializer.loads(decompress(pending))
+
+        with self._file_lock:
+            self._handle.seek(0, os.SEEK_END)
+            if not self._handle.tell():
+                return None
+
+            self._handle.seek(0)
+            payload = self._handle.read()
+
+        return self.serializer.loads(decompress(payload))
+
+    @instrumented
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write all data to the file, compressing it with the configured codec.
+
+        :param data: Dictionary data to store in the file.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+        """
+        serialized = compress(
+            self.serializer.dumpb(data),
+            self.codec,
+            self.compression_level,
+        )
+
+        if self.group_commit is not None:
+            if not self._handle.writable():
+                raise IOError(
+                    f'Cannot write to the database. Access mode is "{self._mode}"'
+                )
+
+            with self._condition:
+                if self._pending is not None:
+                    self.coalesced_writes += 1
+                self._pending = serialized
+                self._pending_writes += 1
+                if self.indexes:
+                    self.indexes.update(data)
+                    self._indexes_loaded = True
+                self._condition.notify()
+            return None
+
+        with self._file_lock:
+            self._commit(serialized)
+
+        if self.indexes:
+            # Diffed against the previous values, or built from scratch when
+            # they were never loaded.
+            self.indexes.update(data)
+            self._indexes_loaded = True
+            self._write_indexes(zlib.crc32(serialized))
+
+    def flush(self):
+        """
+        Commit the pending write of group commit now.
+
+        :return: None
+        :rtype: None
+
+        .. versionadded:: 2.1.0
+        """
+        with self._file_lock:
+            with self._condition:
+                payload = self._pending
+                if payload is None:
+                    return None
+
+            # The pending data stays readable until the file has it.
+            self._commit(payload)
+
+            with self._condition:
+                self.flushes += 1
+                indexes = None
+                if self._pending is payload:
+                    self._pending = None
+                    self._pending_writes = 0
+                    if self.indexes:
+                        # Only written when they match the committed data.
+                        indexes = self.indexes.dump()
+
+            if indexes is not None:
+                self._write_indexes(zlib.crc32(payload), indexes)
+
+        return None
+
+    def close(self):
+        """
+        Commit the pending write, stop the group commit and close the file.
+
+        :return: None
+        :rtype: None
+        """
+        if self.group_commit is not None and not self._stopped:
+            with self._condition:
+                self._stopped = True
+                self._condition.notify()
+            self._committer.join()
+            atexit.unregister(self.close)
+
+        self.flush()
+        super(FileStorage, self).close()
+
+    def iter_documents(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate the documents of a table, parsing the file incrementally.
+
+        The file is read through its own handle, chunk by chunk. A serializer
+        that cannot be parsed incrementally reads the whole file.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: Unused, the file is read in chunks of `CHUNK_SIZE` bytes.
+        :type batch_size: int
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+
+        .. warning::
+           A write during the iteration rewrites the file being parsed.
+
+        .. versionadded:: 2.1.0
+        """
+        encoding = stream_encoding(self.serializer)
+        if encoding is None:
+            yield from (self.read() or {}).get(name, {}).items()
+            return
+
+        with self._condition:
+            pending = self._pending
+        if pending is not None:
+            yield from iter_table_json(
+                iter_decompress(iter_chunks(io.BytesIO(pending))), name, encoding
+            )
+            return
+
+        with open(self.path, "rb") as handle:
+            yield from iter_table_json(
+                iter_decompress(iter_chunks(handle)), name, encoding
+            )
+
+    def lookup(self, table: str, field: str, value: Any) -> Set[int]:
+        """
+        Return the documents of a table whose indexed field equals a value.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The indexed field.
+        :type field: str
+        :param value: The value to look for.
+        :type value: Any
+
+        :return: The doc_ids of the matching documents.
+        :rtype: Set[int]
+
+        :raises KeyError: When the field is not indexed.
+
+        .. versionadded:: 2.1.0
+        """
+        self._load_indexes()
+        return self.indexes.lookup(table, field, value)
+
+    def range(
+        self,
+        table: str,
+        field: str,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> List[int]:
+        """
+        Return the documents of a table whose field, with a sorted index, is between two values.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The field of a sorted index.
+        :type field: str
+        :param low: The lower bound, None for no lower bound.
+        :type low: Any
+        :param high: The upper bound, None for no upper bound.
+        :type high: Any
+        :param include_low: Whether documents equal to ``low`` are returned.
+        :type include_low: bool
+        :param include_high: Whether documents equal to ``high`` are returned.
+        :type include_high: bool
+
+        :return: The doc_ids of the matching documents, ordered by value.
+        :rtype: List[int]
+
+        :raises KeyError: When the field is not indexed.
+        :raises ValueError: When the index is not sorted.
+
+        .. versionadded:: 2.1.0
+        """
+        self._load_indexes()
+        return self.indexes.range(table, field, low, high, include_low, include_high)
+
+    def _load_indexes(self):
+        """
+        Load the indexes from their sidecar file, or rebuild them when it
+        does not match the data file.
+        """
+        if self._indexes_loaded:
+            return
+
+        with self._file_lock:
+            self._handle.seek(0)
+            checksum = zlib.crc32(self._handle.read())
+        try:
+            with open(self.index_path, "rb") as handle:
+                persisted = self.serializer.loads(handle.read())
+        except Exception:
+            persisted = None
+
+        if (
+            not isinstance(persisted, dict)
+            or persisted.get("checksum") != checksum
+            or not self.indexes.load(persisted.get("indexes", {}))
+        ):
+            self.indexes.clear()
+            self.indexes.update(self.read())
+            if self._mode[0] != "r" or "+" in self._mode:
+                self._write_indexes(checksum)
+
+        self._indexes_loaded = True
+
+    def _write_indexes(self, checksum: int, indexes: Optional[Dict[str, Any]] = None):
+        """
+        Replace the sidecar file with the current indexes.
+
+        :param checksum: The CRC32 of the data file the indexes match.
+        :type checksum: int
+        :param indexes: The dumped indexes, None dumps the current ones.
+        :type indexes: Optional[Dict[str, Any]]
+        """
+        if indexes is None:
+            indexes = self.indexes.dump()
+        payload = self.serializer.dumpb({"checksum": checksum, "indexes": indexes})
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.index_path)), suffix=".tmp"
         )
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _commit(self, payload: bytes):
+        """
+        Store a serialized database in the file with the configured durability.
+
+        Rewriting in place leaves a torn file if the process dies midway, the
+        atomic mode writes a temporary file next to it and renames it over
+        the file, which readers see either entirely or not at all.
+
+        :param payload: The serialized data.
+        :type payload: bytes
+
+        :raises IOError: When the file is not open for writing.
+        """
+        if not self._handle.writable():
+            raise IOError(
+                f'Cannot write to the database. Access mode is "{self._mode}"'
+            )
+
+        if not self.atomic:
+            self._handle.seek(0)
+            self._handle.write(payload)
+            self._handle.truncate()
+            self._sync(self._handle)
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".write-")
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                temp.write(payload)
+                self._sync(temp)
+            os.chmod(temp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        # Reopened first, a failing directory fsync must not leave the handle
+        # on the replaced file.
+        self._reopen()
+        if self.durability == DURABILITY_FSYNC:
+            # The rename itself is only durable once the directory is.
+            _fsync_directory(directory)
+
+    def _reopen(self):
+        """
+        Open the file again once it was replaced.
+
+        The access mode it was first opened with may truncate, e.g. ``"w"``,
+        which would empty the file just written.
+        """
+        mode = "rb+" if self._handle.writable() else "rb"
+        self._handle.close()
+        self._handle = open(self.path, mode)
+
+    def _sync(self, handle):
+        """
+        Push the writes of a file as far as the durability level asks.
+
+        :param handle: The file object written to.
+        :type handle: io.BufferedIOBase
+        """
+        if self.durability == DURABILITY_NONE:
+            return
+
+        handle.flush()
+        if self.durability == DURABILITY_FSYNC:
+            os.fsync(handle.fileno())
+
+    def _commit_loop(self):
+        """
+        Commit the pending write ``group_commit`` seconds after it arrived,
+        together with the writes that replaced it meanwhile.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped or self._pending is not None
+                )
+                self._condition.wait_for(
+                    lambda: self._stopped, timeout=self.group_commit
+                )
+                if self._stopped:
+                    return
+
+            try:
+                self.flush()
+            except Exception:
+                # The write stays pending and is committed again after a pause.
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._stopped, timeout=max(self.group_commit, 1.0)
+                    )
 
     def __repr__(self):
         return f"FileStorage at {id(self)}"
+
+
+def _fsync_directory(directory: str):
+    """
+    Make the entries of a directory durable, not supported on Windows.
+    """
+    if os.name == "nt":
+        return
+
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,423 @@
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+from tinydbstorage.codec import compress
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.serializer import JSONSerializer, Serializer
+from tinydbstorage.storage.file import FileStorage
+from tinydbstorage.stream import BATCH_SIZE
+from tinydbstorage.tracker import ChangeTracker
+
+# Every journal record is prefixed by the length and the CRC32 of its payload.
+RECORD_HEADER = struct.Struct(">II")
+
+
+class JournalFileStorage(FileStorage):
+    """
+    Represents a file-based storage that appends changes to a journal.
+
+    A write only appends the documents that changed since the previous write
+    to ``<path>.journal`` instead of rewriting the whole file. On open, the
+    journal is replayed on top of the snapshot stored at ``path``. Once the
+    journal grows bigger than ``compact_ratio`` times the snapshot, the
+    snapshot is rewritten and the journal emptied.
+
+    Example usage:
+
+    >>> db = TinyDB(storage=JournalFileStorage, path='data.json')
+
+    Compact from a background thread instead of during the write:
+
+    >>> db = TinyDB(storage=JournalFileStorage, path='data.json', background_compaction=True)
+
+    :param path: The path to the snapshot file.
+    :type path: str
+    :param compact_ratio: Journal to snapshot size ratio that triggers a compaction. Default is 2.0.
+    :type compact_ratio: float
+    :param compact_min_bytes: Journal size under which no compaction happens. Default is 1 MiB.
+    :type compact_min_bytes: int
+    :param background_compaction: Whether compactions run in a background thread. Default is False.
+    :type background_compaction: bool
+    :param kwargs: Additional keyword arguments to pass to `FileStorage`,
+        ``durability`` applies to the journal appends.
+
+    .. note::
+       Each record carries its length and checksum, a record torn by a crash
+       is detected on open and dropped with everything after it.
+
+    .. warning::
+       The data is read from disk once, the files must not be shared with
+       another storage writing to them.
+
+    .. versionadded:: 2.1.0
+       Added the `JournalFileStorage` class.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compact_ratio: float = 2.0,
+        compact_min_bytes: int = 1024 * 1024,
+        background_compaction: bool = False,
+        **kwargs,
+    ):
+        """
+        Initialize a JournalFileStorage instance.
+
+        :param path: The path to the snapshot file.
+        :type path: str
+        :param compact_ratio: Journal to snapshot size ratio that triggers a compaction.
+        :type compact_ratio: float
+        :param compact_min_bytes: Journal size under which no compaction happens.
+        :type compact_min_bytes: int
+        :param background_compaction: Whether compactions run in a background thread.
+        :type background_compaction: bool
+        :param kwargs: Additional keyword arguments to pass to `FileStorage`.
+
+        :raises ValueError: When indexes or group commit are requested, the
+            journal does not maintain indexes and appends are already small.
+        """
+        if kwargs.get("indexes"):
+            raise ValueError("JournalFileStorage does not support indexes")
+        if kwargs.get("group_commit") is not None:
+            raise ValueError("JournalFileStorage does not support group_commit")
+
+        super(JournalFileStorage, self).__init__(path, **kwargs)
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.background_compaction = background_compaction
+        self.compactions = 0
+        # Records are written with the standard json module when the snapshot
+        # uses its own json options, other serializers are used as is.
+        self._records: Serializer = self.serializer
+        if isinstance(self.serializer, JSONSerializer):
+            self._records = JSONSerializer(self.serializer.encoding)
+
+        with open(self.journal_path, "ab"):
+            pass
+        self._journal = open(self.journal_path, "rb+")
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._state: Optional[Dict[str, Dict[str, Any]]] = None
+        self._encoded: Dict[str, Dict[str, bytes]] = {}
+        self._tracker = ChangeTracker(self._records.dumpb)
+        self._snapshot_size = 0
+        self._journal_size = 0
+
+        self._compact_requested = threading.Event()
+        self._closed = False
+        if background_compaction:
+            self._compactor = threading.Thread(
+                target=self._compact_loop,
+                name=f"JournalFileStorage-{id(self)}",
+                daemon=True,
+            )
+            self._compactor.start()
+
+    @instrumented
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the snapshot with the journal replayed on top of it.
+
+        The documents are decoded from their encoded form, TinyDB changes
+        them in place and an update failing halfway must not leak into the
+        state the next read returns.
+
+        :return: Dictionary data from the files, or None if both are empty.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        with self._lock:
+            if self._state is None:
+                self._load()
+
+            if not self._state and not self._snapshot_size:
+                return None
+
+            return {name: self._decode(table) for name, table in self._encoded.items()}
+
+    @instrumented
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Append the changes between ``data`` and the previous state to the journal.
+
+        :param data: Dictionary data to store.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            if self._state is None:
+                self._load()
+
+            try:
+                record, delta, encoded = self._diff(data)
+                if record:
+                    self._append(record)
+            except Exception:
+                # The in-memory state may not match the files anymore.
+                self._state = None
+                raise
+
+            self._tracker.commit(delta)
+            self._state = data
+            self._encoded = encoded
+
+        if self._should_compact():
+            if self.background_compaction:
+                self._compact_requested.set()
+            else:
+                self.compact()
+
+        return None
+
+    def iter_documents(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate the documents of a table of the replayed state.
+
+        The state is already in memory, the snapshot alone would miss the
+        changes of the journal.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: Unused.
+        :type batch_size: int
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+
+        .. versionadded:: 2.1.0
+        """
+        with self._lock:
+            if self._state is None:
+                self._load()
+
+            table = dict(self._encoded.get(name, {}))
+
+        for doc_id, doc in table.items():
+            yield doc_id, self._records.loads(doc)
+
+    def compact(self):
+        """
+        Rewrite the snapshot with the current state and empty the journal.
+
+        The snapshot is built from the encoded documents without blocking
+        writers. The new snapshot then replaces the old one and the journal
+        is replaced by the records appended in the meantime. A crash in
+        between replays records already contained in the snapshot, which is
+        harmless.
+
+        :return: None
+        :rtype: None
+        """
+        with self._compact_lock:
+            with self._lock:
+                if self._state is None:
+                    self._load()
+
+                encoded = {name: dict(table) for name, table in self._encoded.items()}
+                covered = self._journal_size
+
+            state = {name: self._decode(table) for name, table in encoded.items()}
+            payload = compress(
+                self.serializer.dumpb(state), self.codec, self.compression_level
+            )
+            snapshot_path = self._write_temp(payload)
+
+            with self._lock:
+                self._journal.seek(covered)
+                tail = self._journal.read(self._journal_size - covered)
+                journal_path = self._write_temp(tail)
+
+                os.replace(snapshot_path, self.path)
+                os.replace(journal_path, self.journal_path)
+                self._reopen()
+                self._journal.close()
+                self._journal = open(self.journal_path, "rb+")
+
+                self._snapshot_size = len(payload)
+                self._journal_size = len(tail)
+                self.compactions += 1
+
+        return None
+
+    def close(self):
+        """
+        Stop the background compaction and close both files.
+
+        :return: None
+        :rtype: None
+        """
+        if self._closed:
+            return None
+
+        self._closed = True
+        if self.background_compaction:
+            self._compact_requested.set()
+            self._compactor.join()
+
+        self._journal.close()
+        super(JournalFileStorage, self).close()
+        return None
+
+    def _load(self):
+        """
+        Read the snapshot then replay the journal, dropping a torn tail.
+        """
+        state = super(JournalFileStorage, self).read() or {}
+        self._handle.seek(0, os.SEEK_END)
+        self._snapshot_size = self._handle.tell()
+
+        self._journal.seek(0)
+        journal = self._journal.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(journal):
+            length, checksum = RECORD_HEADER.unpack_from(journal, offset)
+            start = offset + RECORD_HEADER.size
+            payload = journal[start : start + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+
+            _apply(state, self._records.loads(payload))
+            offset = start + length
+
+        if offset != len(journal):
+            self._journal.seek(offset)
+            self._journal.truncate()
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+        self._journal_size = offset
+        self._state = state
+        self._encoded = {
+            name: {doc_id: self._records.dumpb(doc) for doc_id, doc in table.items()}
+            for name, table in state.items()
+        }
+        self._tracker.track(state)
+
+    def _decode(self, table: Dict[str, bytes]) -> Dict[str, Any]:
+        """
+        Decode the encoded documents of a table into fresh objects.
+        """
+        return {doc_id: self._records.loads(doc) for doc_id, doc in table.items()}
+
+    def _diff(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Compute the journal record turning the previous state into ``data``.
+
+        Only the documents the tracker reports as changed are encoded.
+
+        :param data: Dictionary data to store.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: The record, empty when nothing changed, the delta to commit
+            and the encoded documents of ``data``.
+        :rtype: tuple
+        """
+        delta = self._tracker.diff(data)
+        record = {}
+        encoded = {name: table for name, table in self._encoded.items() if name in data}
+        for name, changes in delta.tables.items():
+            table = {} if changes.created else dict(self._encoded[name])
+            changed = changes.changed
+            if changed or changes.created:
+                record.setdefault("upsert", {})[name] = changed
+            if changes.deleted:
+                record.setdefault("delete", {})[name] = changes.deleted
+
+            for doc_id, doc in changed.items():
+                table[doc_id] = self._records.dumpb(doc)
+            for doc_id in changes.deleted:
+                del table[doc_id]
+            encoded[name] = table
+
+        if delta.dropped:
+            record["drop"] = delta.dropped
+
+        return record, delta, encoded
+
+    def _append(self, record: Dict[str, Any]):
+        """
+        Append a record to the journal with the configured durability.
+
+        :param record: The journal record.
+        :type record: Dict[str, Any]
+        """
+        payload = self._records.dumpb(record)
+        self._journal.seek(self._journal_size)
+        self._journal.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._journal.write(payload)
+        self._sync(self._journal)
+        self._journal_size += RECORD_HEADER.size + len(payload)
+
+    def _write_temp(self, payload: bytes) -> str:
+        """
+        Durably write a payload to a temporary file next to the snapshot.
+
+        :param payload: The file content.
+        :type payload: bytes
+
+        :return: The path of the temporary file.
+        :rtype: str
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".compact-")
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                temp.write(payload)
+                temp.flush()
+                os.fsync(temp.fileno())
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        return temp_path
+
+    def _should_compact(self) -> bool:
+        return self._journal_size >= max(
+            self.compact_min_bytes, self.compact_ratio * self._snapshot_size
+        )
+
+    def _compact_loop(self):
+        """
+        Compact on request until the storage is closed.
+        """
+        while True:
+            self._compact_requested.wait()
+            self._compact_requested.clear()
+            if self._closed:
+                return
+
+            try:
+                self.compact()
+            except Exception:
+                # The journal is still complete, the next request retries.
+                pass
+
+
+def _apply(state: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    """
+    Apply a journal record to the state.
+
+    :param state: The state to update in place.
+    :type state: Dict[str, Dict[str, Any]]
+    :param record: The journal record.
+    :type record: Dict[str, Any]
+    """
+    for name in record.get("drop", ()):
+        state.pop(name, None)
+    for name, doc_ids in record.get("delete", {}).items():
+        table = state.get(name, {})
+        for doc_id in doc_ids:
+            table.pop(doc_id, None)
+    for name, docs in record.get("upsert", {}).items():
+        state.setdefault(name, {}).update(docs)
@@ -0,0 +1,290 @@
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import MutableMapping
+from typing import Optional, Dict, Any, Iterator, Tuple, Union
+
+from tinydb.storages import Storage, touch
+
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.serializer import Serializer, get_serializer
+
+MAGIC = b"TDBMAP1\n"
+# Magic, then the offset and length of the table index.
+HEADER = struct.Struct(">8sQQ")
+
+
+class MappedFileStorage(Storage):
+    """
+    Represents a read-optimized file storage accessed through ``mmap``.
+
+    The file holds every document serialized on its own, an index per table
+    giving the position of each document, and an index giving the position
+    of each table index. `read` returns tables that only decode a document
+    when TinyDB accesses it, the file content stays in the page cache which
+    is shared by every process mapping the file, e.g. forked workers.
+
+    A write rewrites the whole file to a temporary file that replaces the
+    old one, documents of tables that were not modified are copied as is
+    without being decoded.
+
+    Example usage:
+
+    >>> db = TinyDB(storage=MappedFileStorage, path='data.tdb')
+
+    :param path: The path to the file.
+    :type path: str
+    :param create_dirs: Whether to create directories if they don't exist. Default is False.
+    :type create_dirs: bool
+    :param serializer: The serializer name or instance of the documents. Default is "json".
+    :type serializer: str or Serializer
+
+    .. warning::
+       The format is meant for large, read-mostly databases. Every write
+       costs a full rewrite of the file.
+
+    .. versionadded:: 2.1.0
+       Added the `MappedFileStorage` class.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        create_dirs: bool = False,
+        serializer: Union[str, Serializer] = "json",
+    ):
+        """
+        Initialize a MappedFileStorage instance.
+
+        :param path: The path to the file.
+        :type path: str
+        :param create_dirs: Whether to create directories if they don't exist. Default is False.
+        :type create_dirs: bool
+        :param serializer: The serializer name or instance of the documents. Default is "json".
+        :type serializer: str or Serializer
+        """
+        super(MappedFileStorage, self).__init__()
+        touch(path, create_dirs=create_dirs)
+        self.path = path
+        self.serializer = get_serializer(serializer)
+        self._mapping = _Mapping.open(path, self.serializer)
+
+    @instrumented
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read the tables of the file without decoding their documents.
+
+        :return: Lazily decoded tables by name, or None if the file is empty.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        if self._mapping is None:
+            return None
+
+        return {name: LazyTable(self._mapping, name) for name in self._mapping.tables}
+
+    @instrumented
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Rewrite the file with all data.
+
+        :param data: Dictionary data to store, tables may be `LazyTable` instances.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".mapped-")
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                temp.write(HEADER.pack(MAGIC, 0, 0))
+                offset = HEADER.size
+                tables = {}
+                for name, table in data.items():
+                    index = {}
+                    for doc_id, raw in self._raw_documents(table):
+                        temp.write(raw)
+                        index[doc_id] = [offset, len(raw)]
+                        offset += len(raw)
+
+                    raw = self.serializer.dumpb(index)
+                    temp.write(raw)
+                    tables[name] = [offset, len(raw)]
+                    offset += len(raw)
+
+                raw = self.serializer.dumpb(tables)
+                temp.write(raw)
+                temp.seek(0)
+                temp.write(HEADER.pack(MAGIC, offset, len(raw)))
+                temp.flush()
+                os.fsync(temp.fileno())
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        # Tables handed out earlier keep the previous mapping alive.
+        self._mapping = _Mapping.open(self.path, self.serializer)
+        return None
+
+    def close(self):
+        """
+        Release the mapping of the file.
+
+        :return: None
+        :rtype: None
+        """
+        self._mapping = None
+
+    def _raw_documents(self, table) -> Iterator[Tuple[str, bytes]]:
+        """
+        Return the serialized documents of a table.
+
+        :param table: A table as returned by `read` or a dictionary.
+        :type table: Union[LazyTable, Dict[str, Any]]
+
+        :return: The doc_id and serialized document pairs.
+        :rtype: Iterator[Tuple[str, bytes]]
+        """
+        if isinstance(table, LazyTable) and table.serializer is self.serializer:
+            return table.raw_items()
+
+        return (
+            (str(doc_id), self.serializer.dumpb(doc)) for doc_id, doc in table.items()
+        )
+
+
+class _Mapping:
+    """
+    One version of the file mapped in memory with its decoded indexes.
+    """
+
+    def __init__(self, handle, buffer: mmap.mmap, serializer: Serializer):
+        self.handle = handle
+        self.buffer = buffer
+        self.serializer = serializer
+        magic, offset, length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a MappedFileStorage file")
+
+        self.tables: Dict[str, list] = serializer.loads(
+            buffer[offset : offset + length]
+        )
+        self._indexes: Dict[str, Dict[str, list]] = {}
+
+    @classmethod
+    def open(cls, path: str, serializer: Serializer) -> Optional["_Mapping"]:
+        handle = open(path, "rb")
+        if not os.fstat(handle.fileno()).st_size:
+            handle.close()
+            return None
+
+        return cls(
+            handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ), serializer
+        )
+
+    def __del__(self):
+        self.buffer.close()
+        self.handle.close()
+
+    def index(self, name: str) -> Dict[str, list]:
+        """
+        Return the position of every document of a table, decoded once.
+        """
+        if name not in self._indexes:
+            offset, length = self.tables[name]
+            self._indexes[name] = self.serializer.loads(
+                self.buffer[offset : offset + length]
+            )
+
+        return self._indexes[name]
+
+    def raw(self, offset: int, length: int) -> bytes:
+        return self.buffer[offset : offset + length]
+
+
+class LazyTable(MutableMapping):
+    """
+    Represents a table of a `MappedFileStorage` decoding documents on access.
+
+    Changes are kept in memory until the table is written, documents that
+    were not changed are written back without being decoded.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, mapping: _Mapping, name: str):
+        self._mapping = mapping
+        self._name = name
+        self._changes: Dict[str, Any] = {}
+        self._deleted = set()
+
+    @property
+    def serializer(self) -> Serializer:
+        return self._mapping.serializer
+
+    @property
+    def _index(self) -> Dict[str, list]:
+        return self._mapping.index(self._name)
+
+    def __getitem__(self, doc_id):
+        doc_id = str(doc_id)
+        if doc_id in self._changes:
+            return self._changes[doc_id]
+        if doc_id in self._deleted or doc_id not in self._index:
+            raise KeyError(doc_id)
+
+        return self.serializer.loads(self._mapping.raw(*self._index[doc_id]))
+
+    def __setitem__(self, doc_id, doc):
+        doc_id = str(doc_id)
+        self._changes[doc_id] = doc
+        self._deleted.discard(doc_id)
+
+    def __delitem__(self, doc_id):
+        doc_id = str(doc_id)
+        if doc_id in self._changes:
+            del self._changes[doc_id]
+            if doc_id in self._index:
+                self._deleted.add(doc_id)
+        elif doc_id in self._index and doc_id not in self._deleted:
+            self._deleted.add(doc_id)
+        else:
+            raise KeyError(doc_id)
+
+    def __contains__(self, doc_id):
+        doc_id = str(doc_id)
+        if doc_id in self._changes:
+            return True
+
+        return doc_id in self._index and doc_id not in self._deleted
+
+    def __iter__(self):
+        for doc_id in self._index:
+            if doc_id not in self._deleted:
+                yield doc_id
+        for doc_id in self._changes:
+            if doc_id not in self._index:
+                yield doc_id
+
+    def __len__(self):
+        added = sum(1 for doc_id in self._changes if doc_id not in self._index)
+        return len(self._index) - len(self._deleted) + added
+
+    def __repr__(self):
+        return f"LazyTable({self._name!r}, {len(self)} documents)"
+
+    def raw_items(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Return the serialized documents, only serializing the changed ones.
+
+        :return: The doc_id and serialized document pairs.
+        :rtype: Iterator[Tuple[str, bytes]]
+        """
+        for doc_id in self:
+            if doc_id in self._changes:
+                yield doc_id, self.serializer.dumpb(self._changes[doc_id])
+            else:
+                yield doc_id, self._mapping.raw(*self._index[doc_id])
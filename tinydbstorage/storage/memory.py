@@ -1,8 +1,19 @@
-from collections import defaultdict
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, Iterable, Union
 
 from tinydb.storages import Storage
 
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.serializer import JSONSerializer, Serializer, get_serializer
+from tinydbstorage.tracker import copy_data
+
+LRU = "lru"
+LFU = "lfu"
+EVICTIONS = (LRU, LFU)
+# Values of a document copied along with it, documents are JSON-like.
+CONTAINERS = (dict, list)
+
 
 class MemoryStorage(Storage):
     """
@@ -14,19 +25,55 @@ class MemoryStorage(Storage):
 
     >>> db = TinyDB(storage=MemoryStorage)
 
+    Keep the data serialized, isolated from the objects TinyDB hands out:
+
+    >>> db = TinyDB(storage=MemoryStorage, serializer="msgpack")
+
+    Take a consistent, read-only view of the data for another thread:
+
+    >>> snapshot = db.storage.snapshot()
+
+    Keep at most 100k documents in memory, spilling cold tables to a file:
+
+    >>> db = TinyDB(storage=MemoryStorage, max_documents=100_000, spill=FileStorage("spill.json"))
+
     :versionadded: 1.0.0
 
     .. note::
        The `MemoryStorage` class extends `Storage` from TinyDB and inherits its methods.
 
+    .. note::
+       Stored tables are never modified once written. `read` hands out views
+       copying a document when it is accessed, a write only copies the tables
+       TinyDB touched and shares the others with the previous version, so a
+       snapshot is a reference to the current version. Nested dictionaries
+       and lists are copied with their document, other mutable values are
+       shared with the stored version and must not be changed in place.
+
+    .. note::
+       With a budget, whole tables are evicted. A spilled table is read back
+       from the ``spill`` storage the first time TinyDB accesses it, and only
+       written to it again if it changed. Taking a snapshot reads the spilled
+       tables from the ``spill`` storage once, later evictions do not change it. The ``hits``, ``misses``
+       and ``evictions`` attributes count table accesses served from memory,
+       tables loaded back and tables spilled.
+
     .. warning::
        In-memory storage is volatile. All data is lost when the program exits.
 
-    :param internal_memory: The internal memory storage using a defaultdict.
-    :type internal_memory: defaultdict
+    :param internal_memory: The current version of the tables by name,
+        or the serialized data when a serializer is set.
+    :type internal_memory: dict or bytes
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        serializer: Optional[Union[str, Serializer]] = None,
+        max_documents: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        spill: Optional[Storage] = None,
+        eviction: str = LRU,
+    ):
         """
         Initialize a new in-memory storage.
 
@@ -34,31 +81,446 @@ class MemoryStorage(Storage):
 
         >>> storage = MemoryStorage()
 
+        :param serializer: The serializer name or instance used to store the
+            data serialized, None keeps the objects as written. Default is None.
+        :type serializer: str or Serializer or None
+        :param max_documents: The number of documents kept in memory, None for no limit.
+        :type max_documents: Optional[int]
+        :param max_bytes: The JSON size of the tables kept in memory, None for no limit.
+        :type max_bytes: Optional[int]
+        :param spill: The storage receiving evicted tables, required with a budget.
+        :type spill: Optional[Storage]
+        :param eviction: Evict the least recently (``"lru"``) or least frequently
+            (``"lfu"``) used table first. Default is ``"lru"``.
+        :type eviction: str
+
         .. versionadded:: 1.0.0
            Added the `MemoryStorage` class.
 
+        .. versionchanged:: 2.1.0
+           Added the `serializer` parameter, stored tables are copy-on-write.
+           Added the `max_documents`, `max_bytes`, `spill` and `eviction` parameters.
+
         :warning:
            In-memory storage is volatile. All data is lost when the program exits.
+
+        :raises ValueError: When a budget is set without a ``spill`` storage,
+            together with a serializer, or with an unknown eviction policy.
         """
         super(MemoryStorage, self).__init__()
-        self.internal_memory = defaultdict()
+        self.serializer = None if serializer is None else get_serializer(serializer)
+        self.internal_memory: Union[Dict[str, Dict[str, Any]], bytes] = {}
+
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.eviction = eviction
+        self.bounded = max_documents is not None or max_bytes is not None
+        if eviction not in EVICTIONS:
+            raise ValueError(
+                f"Unknown eviction: {eviction!r}, expected one of {EVICTIONS}"
+            )
+        if self.bounded and spill is None:
+            raise ValueError("A memory budget requires a spill storage")
+        if self.bounded and self.serializer is not None:
+            raise ValueError("A memory budget cannot be used with a serializer")
 
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The id of each spilled table, to recognize it when TinyDB hands
+        # the table back unchanged.
+        self._spilled: Dict[str, int] = {}
+        # Access count of the tables in memory, least recently used first.
+        self._usage: "OrderedDict[str, int]" = OrderedDict()
+        # Tables loaded back from the spill storage and not changed since.
+        self._clean: Dict[str, Dict[str, Any]] = {}
+        self._sizes: Dict[str, tuple] = {}
+        self._size_serializer = JSONSerializer()
+
+    @instrumented
     def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
         """
         Read data from the in-memory storage.
 
         :return: Dictionary data from the in-memory storage.
         :rtype: Optional[Dict[str, Dict[str, Any]]]
+
+        .. versionchanged:: 2.1.0
+           Tables are returned as views copying documents on access.
         """
-        return self.internal_memory
+        if isinstance(self.internal_memory, bytes):
+            return self.serializer.loads(self.internal_memory)
+
+        if not self.bounded:
+            return {
+                name: TableView(docs) for name, docs in self.internal_memory.items()
+            }
+
+        tables = _Tables(self)
+        for name, docs in self.internal_memory.items():
+            dict.__setitem__(tables, name, TableView(docs))
+        for name in self._spilled:
+            dict.__setitem__(tables, name, _SpilledTable(self, name))
+        return tables
 
+    @instrumented
     def write(self, data: Dict[str, Dict[str, Any]]):
         """
         Write all data to the in-memory storage.
 
+        Tables passed back as returned by `read` are kept as is, the others
+        are copied so that later changes of ``data`` are not seen.
+
         :param data: Dictionary data to store in memory.
         :type data: Dict[str, Dict[str, Any]]
 
         :return: The same dictionary data.
         """
-        self.internal_memory = data
+        if self.serializer is not None:
+            self.internal_memory = self.serializer.dumpb(data)
+            return
+
+        if self.bounded:
+            return self._write_bounded(data)
+
+        self.internal_memory = {
+            name: (table._docs if isinstance(table, TableView) else _copy_table(table))
+            for name, table in data.items()
+        }
+
+    def snapshot(self) -> "Snapshot":
+        """
+        Return a read-only view of the current version of the data.
+
+        Taking a snapshot does not copy anything, later writes are not seen
+        by the snapshot. Spilled tables are read from the ``spill`` storage
+        when the snapshot is taken.
+
+        Example usage:
+
+        >>> snapshot = storage.snapshot()
+        >>> snapshot["_default"]["1"]
+
+        :return: The snapshot.
+        :rtype: Snapshot
+
+        .. versionadded:: 2.1.0
+        """
+        if isinstance(self.internal_memory, bytes):
+            return Snapshot(self.internal_memory, self.serializer)
+
+        if self._spilled:
+            # Read now, the spill storage is rewritten by later evictions.
+            backing = self.spill.read() or {}
+            tables = dict(self.internal_memory)
+            tables.update({name: backing.get(name, {}) for name in self._spilled})
+            return Snapshot(tables)
+
+        return Snapshot(self.internal_memory)
+
+    @property
+    def resident_size(self) -> int:
+        """
+        The usage of the memory budget, in documents or bytes.
+
+        :return: The size of the tables kept in memory.
+        :rtype: int
+
+        .. versionadded:: 2.1.0
+        """
+        return sum(
+            self._size(name, docs) for name, docs in self.internal_memory.items()
+        )
+
+    def close(self):
+        """
+        Close the spill storage.
+
+        :return: None
+        :rtype: None
+        """
+        if self.spill is not None:
+            self.spill.close()
+
+    def _write_bounded(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write the tables, keeping unchanged spilled tables out of memory.
+
+        :param data: Dictionary data to store in memory.
+        :type data: Dict[str, Dict[str, Any]]
+        """
+        resident = {}
+        spilled = {}
+        changed = []
+        for name, table in data.items():
+            if isinstance(table, _SpilledTable):
+                # Not accessed since the read, the table did not change.
+                if name in self._spilled:
+                    spilled[name] = self._spilled[name]
+                elif name in self.internal_memory:
+                    resident[name] = self.internal_memory[name]
+            elif isinstance(table, TableView):
+                if self._spilled.get(name) == id(table._docs):
+                    # Evicted while TinyDB held it, but unchanged.
+                    spilled[name] = self._spilled[name]
+                else:
+                    resident[name] = table._docs
+            else:
+                resident[name] = _copy_table(table)
+                changed.append(name)
+
+        dropped = [
+            name for name in (*self.internal_memory, *self._spilled) if name not in data
+        ]
+        if dropped:
+            backing = self.spill.read() or {}
+            if any(name in backing for name in dropped):
+                for name in dropped:
+                    backing.pop(name, None)
+                self.spill.write(backing)
+
+        self.internal_memory = resident
+        self._spilled = spilled
+        for name in list(self._usage):
+            if name not in resident:
+                del self._usage[name]
+        for name in resident:
+            self._usage.setdefault(name, 0)
+        for name in changed:
+            # A write counts as a use, so a new table is not evicted first.
+            self._usage[name] += 1
+            self._usage.move_to_end(name)
+        self._sizes = {
+            name: size for name, size in self._sizes.items() if name in resident
+        }
+        self._clean = {
+            name: docs
+            for name, docs in self._clean.items()
+            if resident.get(name) is docs
+        }
+        self._evict(keep=changed)
+
+    def _fault_in(self, name: str) -> Dict[str, Any]:
+        """
+        Load a spilled table back in memory.
+
+        :param name: The table name.
+        :type name: str
+
+        :return: The documents of the table.
+        :rtype: Dict[str, Any]
+        """
+        if name in self.internal_memory:
+            self._touch(name)
+            return self.internal_memory[name]
+
+        docs = self._load(name)
+        self.misses += 1
+        self._spilled.pop(name, None)
+        self.internal_memory = dict(self.internal_memory)
+        self.internal_memory[name] = docs
+        self._usage[name] = 1
+        self._clean[name] = docs
+        self._evict(keep=(name,))
+        return docs
+
+    def _load(self, name: str) -> Dict[str, Any]:
+        return (self.spill.read() or {}).get(name, {})
+
+    def _touch(self, name: str):
+        """
+        Record an access to a table kept in memory.
+        """
+        self.hits += 1
+        self._usage[name] = self._usage.get(name, 0) + 1
+        self._usage.move_to_end(name)
+
+    def _evict(self, keep: Iterable[str] = ()):
+        """
+        Spill tables to the spill storage until the budget is respected.
+
+        :param keep: Tables that were just used, evicted last.
+        :type keep: Iterable[str]
+        """
+        keep = set(keep)
+        evicted = {}
+        while self._over_budget():
+            candidates = [name for name in self._usage if name not in keep]
+            if not candidates:
+                # A table bigger than the budget on its own is not kept.
+                candidates = list(self._usage)
+            if not candidates:
+                break
+
+            if self.eviction == LFU:
+                # min keeps the least recently used on a tie.
+                name = min(candidates, key=self._usage.__getitem__)
+            else:
+                name = candidates[0]
+
+            docs = self.internal_memory[name]
+            if self._clean.get(name) is not docs:
+                evicted[name] = docs
+            del self._usage[name]
+            self._sizes.pop(name, None)
+            self._clean.pop(name, None)
+            self.internal_memory = {
+                key: value for key, value in self.internal_memory.items() if key != name
+            }
+            self._spilled[name] = id(docs)
+            self.evictions += 1
+
+        if evicted:
+            backing = self.spill.read() or {}
+            backing.update(evicted)
+            self.spill.write(backing)
+
+    def _over_budget(self) -> bool:
+        if self.max_documents is not None:
+            documents = sum(len(docs) for docs in self.internal_memory.values())
+            if documents > self.max_documents:
+                return True
+
+        if self.max_bytes is not None:
+            return self.resident_size > self.max_bytes
+
+        return False
+
+    def _size(self, name: str, docs: Dict[str, Any]) -> int:
+        """
+        Return the size of a table, in documents or bytes depending on the budget.
+        """
+        if self.max_bytes is None:
+            return len(docs)
+
+        cached = self._sizes.get(name)
+        if cached is None or cached[0] is not docs:
+            cached = (docs, len(self._size_serializer.dumpb(docs)))
+            self._sizes[name] = cached
+
+        return cached[1]
+
+
+def _copy_table(table: Mapping) -> Dict[str, Any]:
+    """
+    Copy the documents of a table written by the caller, nested values included.
+    """
+    return copy_data({str(doc_id): dict(doc) for doc_id, doc in table.items()})
+
+
+class TableView(Mapping):
+    """
+    Represents a read-only view of a stored table.
+
+    Documents are copied when accessed, along with their nested dictionaries
+    and lists, changes made by the caller never reach the stored version.
+
+    .. versionadded:: 2.1.0
+    """
+
+    __slots__ = ("_docs",)
+
+    def __init__(self, docs: Dict[str, Any]):
+        self._docs = docs
+
+    def __getitem__(self, doc_id):
+        doc = self._docs[doc_id]
+        if any(isinstance(value, CONTAINERS) for value in doc.values()):
+            return copy_data(doc)
+
+        return dict(doc)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __repr__(self):
+        return f"TableView({len(self._docs)} documents)"
+
+
+class Snapshot(Mapping):
+    """
+    Represents a point-in-time, read-only version of a `MemoryStorage`.
+
+    Serialized data is only decoded when the snapshot is first accessed.
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(
+        self,
+        tables: Union[Dict[str, Dict[str, Any]], bytes],
+        serializer: Optional[Serializer] = None,
+    ):
+        self._tables = tables
+        self._serializer = serializer
+
+    @property
+    def _data(self) -> Dict[str, Dict[str, Any]]:
+        if isinstance(self._tables, bytes):
+            self._tables = self._serializer.loads(self._tables)
+
+        return self._tables
+
+    def __getitem__(self, name: str) -> TableView:
+        return TableView(self._data[name])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Tables(dict):
+    """
+    The tables returned by a bounded `MemoryStorage`, recording accesses and
+    loading spilled tables back in memory when TinyDB asks for them.
+    """
+
+    def __init__(self, storage: MemoryStorage):
+        super(_Tables, self).__init__()
+        self._storage = storage
+
+    def __getitem__(self, name: str):
+        table = super(_Tables, self).__getitem__(name)
+        if isinstance(table, _SpilledTable):
+            table = TableView(self._storage._fault_in(name))
+            super(_Tables, self).__setitem__(name, table)
+        elif name in self._storage.internal_memory:
+            self._storage._touch(name)
+
+        return table
+
+
+class _SpilledTable(Mapping):
+    """
+    A table in the spill storage, read from it when accessed directly.
+    """
+
+    def __init__(self, storage: MemoryStorage, name: str):
+        self._storage = storage
+        self._name = name
+        self._docs: Optional[Dict[str, Any]] = None
+
+    @property
+    def docs(self) -> Dict[str, Any]:
+        if self._docs is None:
+            self._docs = self._storage._load(self._name)
+
+        return self._docs
+
+    def __getitem__(self, doc_id):
+        return self.docs[doc_id]
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self):
+        return len(self.docs)
@@ -1,11 +1,281 @@
+import io
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List, Set, Tuple, Union
 
 import redis
 from tinydb.storages import Storage
+from tinydb.table import Document
 
+from tinydbstorage.codec import (
+    NONE,
+    check_codec,
+    compress,
+    decompress,
+    iter_decompress,
+)
+from tinydbstorage.exceptions import WriteConflictError
+from tinydbstorage.index import (
+    SORTED_INDEX,
+    Index,
+    Indexes,
+    hash_key,
+    range_rank,
+    sortable,
+)
+from tinydbstorage.instrument import NETWORK, instrumentation, instrumented
+from tinydbstorage.query import translate
+from tinydbstorage.registry import registry
+from tinydbstorage.schema import IndexSchema, RetrySchema
+from tinydbstorage.serializer import JSONSerializer, Serializer, get_serializer
+from tinydbstorage.stream import (
+    BATCH_SIZE,
+    TableStream,
+    iter_chunks,
+    iter_table_json,
+    stream_encoding,
+)
+from tinydbstorage.tracker import ChangeTracker, Delta, copy_data
 
-class RedisStorage(Storage):
+BLOB_LAYOUT = "blob"
+HASH_LAYOUT = "hash"
+
+# Evaluates a predicate of `tinydbstorage.query.translate` on one HSCAN page
+# of a table hash. Returns the next cursor followed by the doc_id and value
+# of every match, values that are not JSON are returned for the client to
+# evaluate. Booleans compare as numbers and comparisons between different
+# types are false, as in Python minus the TypeError.
+SEARCH_SCRIPT = """
+local function resolve(doc, path)
+    local value = doc
+    for _, part in ipairs(path) do
+        if type(value) ~= "table" then
+            return nil
+        end
+        value = value[part]
+    end
+    return value
+end
+
+local function scalar(value)
+    if value == true then
+        return 1
+    elseif value == false then
+        return 0
+    end
+    return value
+end
+
+local function compare(op, a, b)
+    a, b = scalar(a), scalar(b)
+    if op == "==" then
+        return a == b
+    elseif op == "!=" then
+        return a ~= b
+    end
+    if type(a) ~= type(b) or (type(a) ~= "number" and type(a) ~= "string") then
+        return false
+    end
+    if op == "<" then
+        return a < b
+    elseif op == "<=" then
+        return a <= b
+    elseif op == ">" then
+        return a > b
+    elseif op == ">=" then
+        return a >= b
+    end
+    return false
+end
+
+local function test(doc, predicate)
+    local op = predicate[1]
+    if op == "and" then
+        for _, part in ipairs(predicate[2]) do
+            if not test(doc, part) then
+                return false
+            end
+        end
+        return true
+    elseif op == "or" then
+        for _, part in ipairs(predicate[2]) do
+            if test(doc, part) then
+                return true
+            end
+        end
+        return false
+    elseif op == "not" then
+        return not test(doc, predicate[2])
+    end
+
+    local value = resolve(doc, predicate[2])
+    if value == nil then
+        return false
+    elseif op == "exists" then
+        return true
+    elseif op == "one_of" then
+        for _, item in ipairs(predicate[3]) do
+            if compare("==", value, item) then
+                return true
+            end
+        end
+        return false
+    end
+    return compare(op, value, predicate[3])
+end
+
+local predicate = cjson.decode(ARGV[1])
+local page = redis.call("HSCAN", KEYS[1], ARGV[2], "COUNT", ARGV[3])
+local fields = page[2]
+local matches = {page[1]}
+for i = 1, #fields, 2 do
+    local ok, doc = pcall(cjson.decode, fields[i + 1])
+    if not ok or test(doc, predicate) then
+        matches[#matches + 1] = fields[i]
+        matches[#matches + 1] = fields[i + 1]
+    end
+end
+return matches
+"""
+
+
+class RedisLayout:
+    """
+    Encoding of a database into the Redis keys of a layout, shared by the
+    blocking and the asyncio Redis storages.
+
+    The commands are queued on a pipeline, its execution is left to the storage.
+
+    .. versionadded:: 2.1.0
+    """
+
+    prefix: str
+    layout: str
+    version_key: str
+    serializer: Serializer
+    codec: str
+    compression_level: Optional[int]
+    _tracker: ChangeTracker
+    _version: Optional[bytes]
+
+    def table_key(self, name: str) -> str:
+        """
+        Return the Redis key holding a table in the hash layout.
+
+        :param name: The table name.
+        :type name: str
+
+        :return: The Redis key of the table hash.
+        :rtype: str
+        """
+        return f"{self.prefix}:{name}"
+
+    def _queue_write(self, pipe, data: Dict[str, Dict[str, Any]]):
+        """
+        Queue the commands writing ``data`` followed by the version increment.
+
+        :param pipe: The pipeline to queue the commands on.
+        :type pipe: redis.client.Pipeline
+        :param data: Dictionary data to store in Redis.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: The changes to commit to the tracker once the pipeline is executed.
+        :rtype: Optional[Delta]
+        """
+        delta = None
+        if self.layout == HASH_LAYOUT:
+            delta = self._queue_hash(pipe, data)
+        else:
+            pipe.set(self.prefix, self._compress(self.serializer.dumps(data)))
+
+        pipe.incr(self.version_key)
+        return delta
+
+    def _queue_hash(self, pipe, data: Dict[str, Dict[str, Any]]) -> Delta:
+        """
+        Queue the difference between ``data`` and the last known state.
+
+        :param pipe: The pipeline to queue the commands on.
+        :type pipe: redis.client.Pipeline
+        :param data: Dictionary data to store in Redis.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: The changes of ``data``.
+        :rtype: Delta
+        """
+        delta = self._tracker.diff(data)
+        for name, changes in delta.tables.items():
+            if changes.created:
+                pipe.sadd(self.prefix, name)
+            changed = {
+                doc_id.encode("utf-8"): self._compress(self.serializer.dumpb(doc))
+                for doc_id, doc in changes.changed.items()
+            }
+            if changed:
+                pipe.hset(self.table_key(name), mapping=changed)
+            if changes.deleted:
+                pipe.hdel(
+                    self.table_key(name),
+                    *(doc_id.encode("utf-8") for doc_id in changes.deleted),
+                )
+
+        for name in delta.dropped:
+            pipe.delete(self.table_key(name))
+            pipe.srem(self.prefix, name)
+
+        return delta
+
+    def _commit(self, delta: Optional[Delta], version: bytes):
+        """
+        Record the executed changes, with the version they produced when no
+        other writer came in between since the tracked version.
+
+        :param delta: The changes returned by `_queue_write`.
+        :type delta: Optional[Delta]
+        :param version: The version counter after the write.
+        :type version: bytes
+        """
+        if delta is None:
+            return
+
+        previous = self._tracker.version
+        if previous is None or int(version) != int(previous) + 1:
+            version = None
+        self._tracker.commit(delta, version)
+
+    def _compress(self, payload: Union[str, bytes]):
+        return compress(payload, self.codec, self.compression_level)
+
+    def _decode_hash(
+        self, names, tables, track: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Decode the table hashes read from Redis and track them as last seen.
+
+        :param names: The table names.
+        :type names: List[str]
+        :param tables: The fields of each table hash, in the order of ``names``.
+        :type tables: List[Dict[bytes, bytes]]
+        :param track: Whether the data becomes the base of the next write.
+        :type track: bool
+
+        :return: Dictionary data from Redis storage.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        data = {}
+        for name, fields in zip(names, tables):
+            data[name] = {
+                _to_str(k): self.serializer.loads(decompress(_to_bytes(v)))
+                for k, v in fields.items()
+            }
+
+        if track:
+            # Free when the data is the version written last by this storage.
+            self._tracker.track(data, self._version)
+        return data
+
+
+class RedisStorage(RedisLayout, TableStream, Storage):
     """
     Represents a storage implementation for TinyDB using Redis.
 
@@ -16,8 +286,61 @@ class RedisStorage(Storage):
     >>> redis_uri = "redis://localhost:6379/0"
     >>> db = TinyDB(storage=RedisStorage, redis_uri=redis_uri)
 
+    Store every table as its own Redis hash and only send changed documents:
+
+    >>> db = TinyDB(storage=RedisStorage, redis_uri=redis_uri, layout="hash")
+
+    Reject writes based on stale data and retry the TinyDB operation:
+
+    >>> db = TinyDB(storage=RedisStorage, redis_uri=redis_uri, optimistic=True)
+    >>> db.storage.retry_on_conflict(db.table("users").update, {"active": True})
+
+    Keep the decoded database in memory and only check the version counter:
+
+    >>> db = TinyDB(storage=RedisStorage, redis_uri=redis_uri, cache=True, cache_ttl=0.5)
+
+    Maintain secondary indexes in Redis and look documents up without scanning:
+
+    >>> db = TinyDB(storage=RedisStorage, redis_uri=redis_uri, indexes=[IndexSchema(table="users", field="age", kind="sorted")])
+    >>> db.storage.range("users", "age", 18, 30)
+
+    Filter a table in Redis and only transfer the matching documents:
+
+    >>> db.storage.search("users", (Query().age >= 18) & (Query().country == "FR"))
+
+    Export a table page by page with ``HSCAN`` in the hash layout:
+
+    >>> for batch in db.storage.iter_table("users", batch_size=1000):
+    ...     export(batch)
+
     :param redis_uri: The URI for the Redis connection.
     :type redis_uri: str
+    :param prefix: The key (or key prefix in the hash layout) used to store the database.
+    :type prefix: str
+    :param layout: Either ``"blob"`` (the whole database in one key) or ``"hash"``
+        (one Redis hash per table, ``<prefix>:<table>`` mapping doc_id to JSON).
+    :type layout: str
+    :param optimistic: Whether writes fail with `WriteConflictError` when another
+        writer changed the database since the last read.
+    :type optimistic: bool
+    :param retry: The backoff policy used by `retry_on_conflict`.
+    :type retry: RetrySchema
+    :param cache: Whether to keep the decoded data and revalidate it with the version counter.
+    :type cache: bool
+    :param cache_ttl: How many seconds cached data is served without asking Redis at all.
+    :type cache_ttl: float
+    :param codec: The compression codec of the stored values, see `tinydbstorage.codec.CODECS`.
+    :type codec: str
+    :param compression_level: The compression level, None uses the codec default.
+    :type compression_level: int or None
+    :param serializer: The serializer name or instance, see `tinydbstorage.serializer`.
+    :type serializer: str or Serializer
+    :param max_connections: The maximum number of connections of the shared pool, None for no limit.
+    :type max_connections: int or None
+    :param health_check_interval: Seconds of idleness after which a pooled connection is checked with a PING.
+    :type health_check_interval: int
+    :param indexes: The secondary indexes to maintain, see `index_key` for their Redis keys.
+    :type indexes: Optional[List[IndexSchema]]
     :param kwargs: Additional keyword arguments to pass to the Redis connection.
 
     .. note::
@@ -28,64 +351,772 @@ class RedisStorage(Storage):
     :warning:
        Ensure that the Redis server is running and accessible. Data may be lost upon Redis server restart.
 
+    :warning:
+       The two layouts are not interchangeable, in the hash layout ``prefix`` holds
+       a Redis set with the table names instead of the serialized database.
+
     :seealso: https://redis-py.readthedocs.io/
 
     :param connection: The Redis connection object.
     :type connection: redis.client.StrictRedis
+    :param conflicts: The number of writes rejected because of a concurrent write.
+    :type conflicts: int
+    :param retries: The number of operations retried by `retry_on_conflict`.
+    :type retries: int
+    :param server_searches: The number of `search` calls filtered by Redis.
+    :type server_searches: int
+    :param client_searches: The number of `search` calls filtered by the client.
+    :type client_searches: int
     """
 
-    def __init__(self, redis_uri: str, **kwargs):
+    def __init__(
+        self,
+        redis_uri: str,
+        prefix: str = "tiny_db",
+        layout: str = BLOB_LAYOUT,
+        optimistic: bool = False,
+        retry: Optional[RetrySchema] = None,
+        cache: bool = False,
+        cache_ttl: float = 0,
+        codec: str = NONE,
+        compression_level: Optional[int] = None,
+        serializer: Union[str, Serializer] = JSONSerializer.name,
+        max_connections: Optional[int] = None,
+        health_check_interval: int = 0,
+        indexes: Optional[List[IndexSchema]] = None,
+        **kwargs,
+    ):
         """
         Initialize a new Redis storage.
 
         :param redis_uri: The URI for the Redis connection.
         :type redis_uri: str
+        :param prefix: The key (or key prefix in the hash layout) used to store the database.
+        :type prefix: str
+        :param layout: Either ``"blob"`` or ``"hash"``. Default is ``"blob"``.
+        :type layout: str
+        :param optimistic: Whether to detect concurrent writes. Default is False.
+        :type optimistic: bool
+        :param retry: The backoff policy used by `retry_on_conflict`. Default is `RetrySchema()`.
+        :type retry: RetrySchema or None
+        :param cache: Whether to cache the decoded data locally. Default is False.
+        :type cache: bool
+        :param cache_ttl: Seconds during which cached data is returned without
+            revalidation, trading freshness for zero round trips. Default is 0.
+        :type cache_ttl: float
+        :param codec: The compression codec. Values are decompressed whatever
+            codec they were written with. Default is "none".
+        :type codec: str
+        :param compression_level: The compression level. Default is None.
+        :type compression_level: int or None
+        :param serializer: The serializer name or instance. Default is "json".
+        :type serializer: str or Serializer
+        :param max_connections: The maximum number of connections of the shared pool. Default is None.
+        :type max_connections: int or None
+        :param health_check_interval: Seconds of idleness before a connection is checked, 0 disables it.
+        :type health_check_interval: int
+        :param indexes: The secondary indexes to maintain. Default is None.
+        :type indexes: Optional[List[IndexSchema]]
         :param kwargs: Additional keyword arguments to pass to the Redis connection.
 
         .. versionadded:: 1.0.0
            Added the `RedisStorage` class.
 
+        .. versionchanged:: 2.1.0
+           Added the `layout`, `optimistic`, `retry`, `cache`, `cache_ttl`, `codec`,
+           `compression_level`, `serializer`, `max_connections`, `health_check_interval`
+           and `indexes` parameters. Storages using the same URI share a connection pool.
+
         :warning:
            Ensure that the Redis server is running and accessible. Data may be lost upon Redis server restart.
 
         :seealso: https://redis-py.readthedocs.io/
         """
-        self.prefix = kwargs.get("prefix", "tiny_db")
+        if layout not in (BLOB_LAYOUT, HASH_LAYOUT):
+            raise ValueError(f"Unknown Redis layout: {layout!r}")
+        check_codec(codec)
+
+        self.prefix = prefix
+        self.version_key = f"{prefix}:__version__"
+        self.layout = layout
+        self.optimistic = optimistic
+        self.retry = retry or RetrySchema()
+        self.conflicts = 0
+        self.retries = 0
+        self.server_searches = 0
+        self.client_searches = 0
+        self._search_script = None
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.codec = codec
+        self.compression_level = compression_level
+        self.serializer = get_serializer(serializer)
         self.connection = redis.client.StrictRedis(
-            connection_pool=redis.ConnectionPool.from_url(redis_uri), **kwargs
+            connection_pool=registry.redis_pool(
+                redis_uri, max_connections, health_check_interval
+            ),
+            **kwargs,
         )
+        # Documents as last seen in Redis, used by the hash layout to only
+        # send the documents that changed since.
+        self._tracker = ChangeTracker(self.serializer.dumpb)
+        # Value of the version counter when the data was last read, every
+        # write increments it so optimistic writers can detect each other.
+        self._version: Optional[bytes] = None
+        # Decoded data matching ``_version`` when the cache is enabled.
+        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._validated_at = 0.0
+        # The lookup structures live in Redis, only the indexed values are
+        # kept to diff the written documents against.
+        self.indexes = Indexes(indexes or [], lookups=False)
+        self.index_set_key = f"{prefix}:__indexes__"
+        # Version the indexed values match, None when they must be reloaded,
+        # and the indexes known to be built in Redis.
+        self._index_version: Optional[bytes] = None
+        self._built: Set[str] = set()
 
+    @instrumented
     def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
         """
         Read data from Redis storage.
 
+        With the cache enabled the decoded data is reused as long as the
+        version counter did not change, or without asking Redis at all
+        within `cache_ttl` seconds of the last check.
+
         :return: Dictionary data from Redis storage.
         :rtype: Dict[str, Any]
         """
         try:
-            resp = self.connection.get(self.prefix)
-            return json.loads(resp)
+            if self.cache and self._is_cache_valid():
+                return self._cached()
+
+            if self.layout == HASH_LAYOUT:
+                data = self._read_hash()
+            elif self.optimistic or self.cache:
+                pipe = self.connection.pipeline(transaction=True)
+                pipe.get(self.version_key)
+                pipe.get(self.prefix)
+                with instrumentation.span(NETWORK) as span:
+                    self._version, resp = pipe.execute()
+                    span.size = len(resp or b"")
+                data = self.serializer.loads(decompress(resp))
+            else:
+                with instrumentation.span(NETWORK) as span:
+                    resp = self.connection.get(self.prefix)
+                    span.size = len(resp or b"")
+                return self.serializer.loads(decompress(resp))
         except Exception:
             return {}
 
+        if not self.cache:
+            return data
+
+        self._store_cache(data)
+        return self._cached()
+
+    @instrumented
     def write(self, data: Dict[str, Dict[str, Any]]):
         """
         Write all data to Redis storage.
 
+        In the hash layout only the documents that changed since the last
+        read or write are sent, together with the deleted ones.
+
         :param data: Dictionary data to store in Redis.
         :type data: Dict[str, Dict[str, Any]]
 
         :return: None
         :rtype: None
+
+        :raises WriteConflictError: In optimistic mode, when another writer
+            changed the database since the last read.
         """
-        self.connection.set(self.prefix, json.dumps(data))
+        previous = self._version
+        try:
+            self._write(data)
+        except Exception:
+            self._cache = None
+            raise
+
+        if not self.cache:
+            return None
+
+        if previous is None or int(self._version) != int(previous) + 1:
+            # Another writer came in between, the hash layout left its
+            # changes in Redis and ``data`` does not have them.
+            self._cache = None
+        else:
+            # The caller may still hold, and change, the written documents.
+            self._store_cache(copy_data(data))
+
         return None
 
+    def iter_documents(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate the documents of a table without reading the whole database.
+
+        The hash layout pages through the table with ``HSCAN``, the blob
+        layout parses the value incrementally, both return the cached data
+        instead while it is valid.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: The ``COUNT`` hint of every ``HSCAN`` call.
+        :type batch_size: int
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+
+        .. note::
+           As with ``HSCAN``, documents written during the iteration may be
+           missed, and a document may be yielded more than once.
+
+        .. versionadded:: 2.1.0
+        """
+        if self.cache and self._is_cache_valid():
+            yield from copy_data(self._cache.get(name, {})).items()
+            return
+
+        if self.layout == HASH_LAYOUT:
+            key, cursor = self.table_key(name), 0
+            while True:
+                with instrumentation.span(NETWORK, self):
+                    cursor, fields = self.connection.hscan(
+                        key, cursor, count=batch_size
+                    )
+                for doc_id, value in fields.items():
+                    yield _to_str(doc_id), self.serializer.loads(
+                        decompress(_to_bytes(value))
+                    )
+                if not int(cursor):
+                    return
+
+        with instrumentation.span(NETWORK, self) as span:
+            resp = self.connection.get(self.prefix)
+            span.size = len(resp or b"")
+        if not resp:
+            return
+
+        encoding = stream_encoding(self.serializer)
+        if encoding is None:
+            yield from self.serializer.loads(decompress(resp)).get(name, {}).items()
+            return
+
+        # The value itself is in memory, the decoded database is not.
+        yield from iter_table_json(
+            iter_decompress(iter_chunks(io.BytesIO(resp))), name, encoding
+        )
+
+    def search(self, name: str, cond, batch_size: int = BATCH_SIZE) -> List[Document]:
+        """
+        Return the documents of a table matching a query.
+
+        In the hash layout, with JSON values and no compression, equality,
+        range, ``exists`` and ``one_of`` tests combined with ``&``, ``|``
+        and ``~`` are evaluated by a Lua script on every ``HSCAN`` page of
+        the table, only the matching documents are transferred. Other
+        queries, layouts and codecs read the table with `iter_documents`
+        and evaluate the query on the client, as do reads from the cache.
+
+        :param name: The table name.
+        :type name: str
+        :param cond: The TinyDB query, e.g. ``Query().age >= 18``.
+        :type cond: tinydb.queries.QueryLike
+        :param batch_size: The ``COUNT`` hint of every ``HSCAN`` call.
+        :type batch_size: int
+
+        :return: The matching documents.
+        :rtype: List[Document]
+
+        .. note::
+           The query is evaluated again on the documents Redis returns, the
+           result is the one of ``db.table(name).search(cond)``. Only numbers
+           beyond 2**53 in the documents, which Lua rounds, may be missed.
+
+        .. versionadded:: 2.1.0
+        """
+        predicate = translate(cond)
+        if (
+            predicate is None
+            or self.layout != HASH_LAYOUT
+            or self.codec != NONE
+            or stream_encoding(self.serializer) is None
+            or (self.cache and self._is_cache_valid())
+        ):
+            self.client_searches += 1
+            documents = self.iter_documents(name, batch_size)
+        else:
+            self.server_searches += 1
+            documents = self._search_server(name, predicate, batch_size)
+
+        return [
+            Document(doc, doc_id=int(doc_id)) for doc_id, doc in documents if cond(doc)
+        ]
+
+    def _search_server(
+        self, name: str, predicate: list, batch_size: int
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Run the search script on every ``HSCAN`` page of a table.
+
+        :param name: The table name.
+        :type name: str
+        :param predicate: The predicate of `tinydbstorage.query.translate`.
+        :type predicate: list
+        :param batch_size: The ``COUNT`` hint of every ``HSCAN`` call.
+        :type batch_size: int
+
+        :return: The matching documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+        """
+        if self._search_script is None:
+            self._search_script = self.connection.register_script(SEARCH_SCRIPT)
+
+        key, cursor = self.table_key(name), b"0"
+        args = json.dumps(predicate)
+        while True:
+            with instrumentation.span(NETWORK, self) as span:
+                reply = self._search_script(keys=[key], args=[args, cursor, batch_size])
+                span.size = sum(len(value) for value in reply[2::2])
+
+            cursor = reply[0]
+            for doc_id, value in zip(reply[1::2], reply[2::2]):
+                yield _to_str(doc_id), self.serializer.loads(_to_bytes(value))
+            if not int(cursor):
+                return
+
+    def _write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write all data, watching the version counter in optimistic mode.
+
+        :param data: Dictionary data to store in Redis.
+        :type data: Dict[str, Dict[str, Any]]
+        """
+        if self.layout == HASH_LAYOUT and not self._tracker.synced:
+            # Nothing was read yet, load the current state to diff against.
+            self._read_hash()
+
+        if not self.optimistic:
+            pipe = self.connection.pipeline(transaction=True)
+            if self.indexes:
+                self._sync_indexes(self.connection.get(self.version_key))
+                self._queue_indexes(pipe, data)
+            delta = self._queue_write(pipe, data)
+            with instrumentation.span(NETWORK):
+                self._version = _to_bytes(pipe.execute()[-1])
+            self._commit(delta, self._version)
+            self._indexed(self._version)
+            return None
+
+        with self.connection.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(self.version_key)
+                version = pipe.get(self.version_key)
+                if version != self._version:
+                    raise redis.WatchError(self.version_key)
+
+                if self.indexes:
+                    self._sync_indexes(version)
+                pipe.multi()
+                if self.indexes:
+                    self._queue_indexes(pipe, data)
+                delta = self._queue_write(pipe, data)
+                with instrumentation.span(NETWORK):
+                    self._version = _to_bytes(pipe.execute()[-1])
+                self._commit(delta, self._version)
+                self._indexed(self._version)
+            except redis.WatchError:
+                self.conflicts += 1
+                # Force the retried operation to start from the current state.
+                self._tracker.reset()
+                self._version = None
+                raise WriteConflictError(
+                    f"{self.prefix} was modified by another writer"
+                ) from None
+
+    def index_key(self, index: Index) -> str:
+        """
+        Return the Redis key prefix of an index.
+
+        The key itself is a hash from doc_id to the indexed value. A hash
+        index adds a set of doc_ids per value, ``<key>:<value as JSON>``, a
+        sorted index adds the sorted sets ``<key>:__num__`` (scored by the
+        value) and ``<key>:__str__`` (ordered by ``<value>\\0<doc_id>``).
+
+        :param index: The index.
+        :type index: Index
+
+        :return: The Redis key of the index.
+        :rtype: str
+
+        .. versionadded:: 2.1.0
+        """
+        return f"{self.prefix}:__index__:{index.table}:{index.field}"
+
+    def lookup(self, table: str, field: str, value: Any) -> Set[int]:
+        """
+        Return the documents of a table whose indexed field equals a value.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The indexed field.
+        :type field: str
+        :param value: The value to look for.
+        :type value: Any
+
+        :return: The doc_ids of the matching documents.
+        :rtype: Set[int]
+
+        :raises KeyError: When the field is not indexed.
+
+        .. versionadded:: 2.1.0
+        """
+        index = self.indexes.get(table, field)
+        if index.kind == SORTED_INDEX:
+            if not sortable(value):
+                return set()
+            return set(self.range(table, field, value, value))
+
+        self._build_indexes()
+        members = self.connection.smembers(f"{self.index_key(index)}:{hash_key(value)}")
+        return {int(doc_id) for doc_id in members}
+
+    def range(
+        self,
+        table: str,
+        field: str,
+        low: Any = None,
+        high: Any = None,
+        include_low: bool = True,
+        include_high: bool = True,
+    ) -> List[int]:
+        """
+        Return the documents of a table whose field, with a sorted index, is between two values.
+
+        :param table: The table name.
+        :type table: str
+        :param field: The field of a sorted index.
+        :type field: str
+        :param low: The lower bound, None for no lower bound.
+        :type low: Any
+        :param high: The upper bound, None for no upper bound.
+        :type high: Any
+        :param include_low: Whether documents equal to ``low`` are returned.
+        :type include_low: bool
+        :param include_high: Whether documents equal to ``high`` are returned.
+        :type include_high: bool
+
+        :return: The doc_ids of the matching documents, ordered by value.
+        :rtype: List[int]
+
+        :raises KeyError: When the field is not indexed.
+        :raises ValueError: When the index is not sorted.
+
+        .. versionadded:: 2.1.0
+        """
+        index = self.indexes.get(table, field)
+        if index.kind != SORTED_INDEX:
+            raise ValueError(f"{table}.{field} is not a sorted index")
+
+        rank = range_rank(low, high)
+        self._build_indexes()
+        key = self.index_key(index)
+        if rank is None:
+            pipe = self.connection.pipeline(transaction=False)
+            pipe.zrange(f"{key}:__num__", 0, -1)
+            pipe.zrange(f"{key}:__str__", 0, -1)
+            numbers, strings = pipe.execute()
+        elif rank == 0:
+            numbers = self.connection.zrangebyscore(
+                f"{key}:__num__",
+                _score_bound(low, include_low, "-inf"),
+                _score_bound(high, include_high, "+inf"),
+            )
+            strings = []
+        else:
+            numbers = []
+            strings = self.connection.zrangebylex(
+                f"{key}:__str__",
+                "-" if low is None else (f"[{low}" if include_low else f"({low}\x01"),
+                (
+                    "+"
+                    if high is None
+                    else (f"({high}\x01" if include_high else f"({high}")
+                ),
+            )
+
+        return [int(doc_id) for doc_id in numbers] + [
+            int(_to_str(member).rsplit("\x00", 1)[1]) for member in strings
+        ]
+
+    def retry_on_conflict(self, operation: Callable, *args, **kwargs):
+        """
+        Call a TinyDB operation, retrying it while its write is rejected.
+
+        :param operation: The operation to call, e.g. ``db.table("users").update``.
+        :type operation: Callable
+        :param args: Positional arguments for the operation.
+        :param kwargs: Keyword arguments for the operation.
+
+        :return: The result of the operation.
+
+        :raises WriteConflictError: When the retry policy is exhausted.
+        """
+        attempt = 0
+        while True:
+            try:
+                return operation(*args, **kwargs)
+            except WriteConflictError:
+                if attempt >= self.retry.max_retries:
+                    raise
+
+                attempt += 1
+                self.retries += 1
+                time.sleep(self.retry.delay(attempt))
+
     def close(self):
         """
-        Close the Redis connection.
+        Release the Redis client, the shared pool stays open.
 
         :return: None
         :rtype: None
         """
         self.connection.close()
+
+    def _is_cache_valid(self) -> bool:
+        """
+        Check whether the cached data still matches Redis.
+
+        :return: True when the cached data can be returned.
+        :rtype: bool
+        """
+        if self._cache is None or self._version is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._validated_at < self.cache_ttl:
+            return True
+
+        if self.connection.get(self.version_key) != self._version:
+            return False
+
+        self._validated_at = now
+        return True
+
+    def _store_cache(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Remember decoded data as matching the current version.
+
+        :param data: Dictionary data matching `_version`.
+        :type data: Dict[str, Dict[str, Any]]
+        """
+        self._cache = data
+        self._validated_at = time.monotonic()
+
+    def _cached(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return a copy of the cached data.
+
+        TinyDB adds, removes and changes documents in place on the data it
+        reads, the copies keep those changes out of the cache until they are
+        written, and out of it for good when the write never comes.
+
+        :return: Dictionary data from the cache.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        return copy_data(self._cache)
+
+    def _sync_indexes(self, version: Optional[bytes]):
+        """
+        Reload the indexed values unless they match the version in Redis.
+
+        :param version: The current value of the version counter.
+        :type version: Optional[bytes]
+        """
+        if self._index_version is not None and version == self._index_version:
+            return
+
+        pipe = self.connection.pipeline(transaction=True)
+        pipe.smembers(self.index_set_key)
+        for index in self.indexes:
+            pipe.hgetall(self.index_key(index))
+        built, *values = pipe.execute()
+
+        self._built = {_to_str(name) for name in built}
+        for index, fields in zip(self.indexes, values):
+            index.clear()
+            # An index that was never built starts empty, the next diff adds
+            # every document.
+            if _index_name(index) in self._built:
+                index.apply({_to_str(k): json.loads(v) for k, v in fields.items()}, {})
+
+    def _queue_indexes(self, pipe, data: Dict[str, Dict[str, Any]]):
+        """
+        Queue the index changes between ``data`` and the indexed values.
+
+        The indexed values are updated right away, `_indexed` must be called
+        once the pipeline is executed.
+
+        :param pipe: The pipeline to queue the commands on.
+        :type pipe: redis.client.Pipeline
+        :param data: Dictionary data to store in Redis.
+        :type data: Dict[str, Dict[str, Any]]
+        """
+        self._index_version = None
+        for index, added, removed in self.indexes.update(data):
+            key = self.index_key(index)
+            stale = [doc_id for doc_id in removed if doc_id not in added]
+            if stale:
+                pipe.hdel(key, *stale)
+            if added:
+                pipe.hset(
+                    key,
+                    mapping={
+                        doc_id: hash_key(value) for doc_id, value in added.items()
+                    },
+                )
+
+            if index.kind == SORTED_INDEX:
+                _queue_sorted(pipe, key, added, removed)
+            else:
+                _queue_hashed(pipe, key, added, removed)
+
+        missing = {_index_name(index) for index in self.indexes} - self._built
+        if missing:
+            pipe.sadd(self.index_set_key, *missing)
+
+    def _indexed(self, version: Optional[bytes]):
+        """
+        Record that the queued index changes were executed.
+
+        :param version: The version counter the indexes now match.
+        :type version: Optional[bytes]
+        """
+        if self.indexes:
+            self._index_version = version
+            self._built = {_index_name(index) for index in self.indexes}
+
+    def _build_indexes(self):
+        """
+        Build the indexes that are not in Redis yet from the stored documents.
+
+        :raises WriteConflictError: When writers kept changing the database
+            beyond the retry policy.
+        """
+        names = {_index_name(index) for index in self.indexes}
+        if names <= self._built:
+            return None
+
+        for attempt in range(self.retry.max_retries + 1):
+            with self.connection.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(self.version_key)
+                    built = {
+                        _to_str(name) for name in pipe.smembers(self.index_set_key)
+                    }
+                    if names <= built:
+                        self._built = built
+                        return None
+
+                    version = pipe.get(self.version_key)
+                    self._sync_indexes(version)
+                    data = self.read()
+                    pipe.multi()
+                    self._queue_indexes(pipe, data)
+                    pipe.execute()
+                    self._indexed(version)
+                    return None
+                except redis.WatchError:
+                    self.conflicts += 1
+                    time.sleep(self.retry.delay(attempt + 1))
+
+        raise WriteConflictError(f"{self.prefix} kept changing while building indexes")
+
+    def _read_hash(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every table hash in a single pipeline.
+
+        :return: Dictionary data from Redis storage.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        # The version is read before the tables, a write in between makes
+        # the next optimistic write fail instead of losing an update.
+        pipe = self.connection.pipeline(transaction=True)
+        pipe.get(self.version_key)
+        pipe.smembers(self.prefix)
+        with instrumentation.span(NETWORK):
+            self._version, members = pipe.execute()
+
+        names = sorted(_to_str(name) for name in members)
+        pipe = self.connection.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self.table_key(name))
+
+        with instrumentation.span(NETWORK):
+            tables = pipe.execute()
+        return self._decode_hash(names, tables)
+
+
+def _index_name(index: Index) -> str:
+    return f"{index.table}:{index.field}:{index.kind}"
+
+
+def _queue_hashed(pipe, key: str, added: Dict[str, Any], removed: Dict[str, Any]):
+    """
+    Queue the changes of the per value sets of a hash index.
+    """
+    for doc_ids, command in ((removed, pipe.srem), (added, pipe.sadd)):
+        groups: Dict[str, List[str]] = {}
+        for doc_id, value in doc_ids.items():
+            groups.setdefault(f"{key}:{hash_key(value)}", []).append(doc_id)
+        for group, members in groups.items():
+            command(group, *members)
+
+
+def _queue_sorted(pipe, key: str, added: Dict[str, Any], removed: Dict[str, Any]):
+    """
+    Queue the changes of the sorted sets of a sorted index.
+    """
+    numbers = [
+        doc_id for doc_id, value in removed.items() if not isinstance(value, str)
+    ]
+    strings = [
+        f"{value}\x00{doc_id}"
+        for doc_id, value in removed.items()
+        if isinstance(value, str)
+    ]
+    if numbers:
+        pipe.zrem(f"{key}:__num__", *numbers)
+    if strings:
+        pipe.zrem(f"{key}:__str__", *strings)
+
+    numbers = {
+        doc_id: value for doc_id, value in added.items() if not isinstance(value, str)
+    }
+    strings = {
+        f"{value}\x00{doc_id}": 0
+        for doc_id, value in added.items()
+        if isinstance(value, str)
+    }
+    if numbers:
+        pipe.zadd(f"{key}:__num__", numbers)
+    if strings:
+        pipe.zadd(f"{key}:__str__", strings)
+
+
+def _score_bound(bound: Any, inclusive: bool, unbounded: str) -> str:
+    if bound is None:
+        return unbounded
+
+    return repr(bound) if inclusive else f"({bound!r}"
+
+
+def _to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+
+def _to_str(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
@@ -1,14 +1,89 @@
-import json
-from typing import Optional, Dict, Any
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+from urllib.parse import quote
 
 import boto3
 from botocore.exceptions import ClientError
 from tinydb.storages import Storage
 
+from tinydbstorage.codec import (
+    check_codec,
+    compress,
+    compressor,
+    decompress,
+    iter_decompress,
+)
+from tinydbstorage.instrument import NETWORK, instrumentation, instrumented
+from tinydbstorage.registry import registry
 from tinydbstorage.schema import S3Schema
+from tinydbstorage.serializer import get_serializer
+from tinydbstorage.stream import (
+    BATCH_SIZE,
+    TableStream,
+    dump_json,
+    iter_chunks,
+    iter_table_json,
+    load_json,
+    stream_encoding,
+)
+from tinydbstorage.tracker import ChangeTracker, copy_data
 
+SINGLE_LAYOUT = "single"
+SHARDED_LAYOUT = "sharded"
+NOT_MODIFIED = ("304", "NotModified")
+NOT_FOUND = ("404", "NoSuchKey")
+# Serialized pieces are compressed in batches of this many bytes.
+STREAM_BATCH_SIZE = 64 * 1024
+# Storages of the process, given a new resource in a forked child.
+_storages: "weakref.WeakSet" = weakref.WeakSet()
 
-class S3Storage(Storage):
+
+def get_resource(
+    region_name: str,
+    access_key_id: str,
+    secret_access_key: str,
+    max_pool_connections: Optional[int] = None,
+):
+    """
+    Return the S3 resource of this process for the given credentials.
+
+    :param region_name: The AWS region of the S3 bucket.
+    :type region_name: str
+    :param access_key_id: The AWS access key ID for authentication.
+    :type access_key_id: str
+    :param secret_access_key: The AWS secret access key for authentication.
+    :type secret_access_key: str
+    :param max_pool_connections: The maximum number of HTTP connections, None uses the botocore default.
+    :type max_pool_connections: Optional[int]
+
+    :return: The S3 resource from the `boto3` library.
+    :rtype: boto3.resources.base.ServiceResource
+
+    .. versionchanged:: 2.1.0
+       Resources are kept by `tinydbstorage.registry.registry`.
+    """
+    return registry.s3_resource(
+        region_name, access_key_id, secret_access_key, max_pool_connections
+    )
+
+
+def clear_resources():
+    """
+    Forget every shared S3 resource and connection pool.
+
+    :return: None
+    :rtype: None
+    """
+    registry.clear()
+
+
+class S3Storage(TableStream, Storage):
     """
     Represents a storage implementation for TinyDB using Amazon S3.
 
@@ -25,6 +100,31 @@ class S3Storage(Storage):
     ... )
     >>> db = TinyDB(storage=storage, config=s3_config)
 
+    The decoded data is kept in memory together with its ETag, reads only
+    download the object again when it changed. Set ``max_staleness`` on the
+    config to skip the request entirely for that many seconds.
+
+    With ``write_behind=True`` writes only replace an in-memory snapshot, a
+    background thread uploads the newest one every ``flush_interval`` seconds,
+    after ``flush_every`` writes, on `flush` and on `close` (which also runs
+    at interpreter exit).
+
+    With ``layout="sharded"`` the database is split under ``key_prefix`` into
+    a ``manifest.json`` object listing the tables and one object per table,
+    or per ``shard_size`` doc_ids. Shards are fetched in parallel and only
+    the shards that changed are uploaded.
+
+    Objects are compressed with ``codec`` and decompressed on read whatever
+    codec they were written with.
+
+    With ``streaming=True`` the single object is parsed while it downloads
+    and serialized one document at a time into a multipart upload of
+    ``part_size`` parts, ``max_concurrency`` of them uploading in parallel,
+    so neither the whole body nor its serialized text is held in memory.
+
+    `iter_documents` and `iter_table` parse a single table while the object
+    downloads, or fetch its shards a few at a time in the sharded layout.
+
     :param config: The S3 configuration schema.
     :type config: S3Schema
 
@@ -42,8 +142,17 @@ class S3Storage(Storage):
     :type bucket: str
     :param file_path: The file path in the S3 bucket.
     :type file_path: str
-    :param client: The S3 client from the `boto3` library.
+    :param client: The S3 client from the `boto3` library, replaced by a new
+        one in a child process after ``os.fork``.
     :type client: boto3.resources.base.ServiceResource
+    :param flushes: The number of uploads done in write-behind mode.
+    :type flushes: int
+    :param coalesced_writes: The number of writes that never got uploaded because a newer one replaced them.
+    :type coalesced_writes: int
+    :param last_flush_latency: The duration in seconds of the last upload.
+    :type last_flush_latency: float
+    :param total_flush_latency: The total duration in seconds of all uploads.
+    :type total_flush_latency: float
     """
 
     def __init__(self, config: S3Schema):
@@ -63,41 +172,785 @@ class S3Storage(Storage):
         """
         self.bucket = config.bucket_name
         self.file_path = config.file_path
-        self.client = boto3.resource(
-            "s3",
-            region_name=config.region_name,
-            aws_access_key_id=config.access_key_id,
-            aws_secret_access_key=config.secret_access_key,
+        self.max_staleness = config.max_staleness
+        self.layout = config.layout
+        self.key_prefix = (config.key_prefix or config.file_path).rstrip("/")
+        self.shard_size = config.shard_size
+        self.max_concurrency = config.max_concurrency
+        check_codec(config.codec)
+        self.codec = config.codec
+        self.compression_level = config.compression_level
+        self.serializer = get_serializer(config.serializer)
+        self.streaming = config.streaming
+        self.part_size = config.part_size
+        if self.streaming:
+            if self.layout != SINGLE_LAYOUT:
+                raise ValueError("Streaming requires the single layout")
+            if config.write_behind:
+                raise ValueError("Streaming does not support write_behind")
+            if stream_encoding(self.serializer) is None:
+                raise ValueError(
+                    f"Streaming requires a JSON serializer, got {self.serializer.name!r}"
+                )
+        self._credentials = (
+            config.region_name,
+            config.access_key_id,
+            config.secret_access_key,
+            config.max_pool_connections,
         )
+        self.client = get_resource(*self._credentials)
+        # Last known ETag of the object and its decoded content.
+        self._etag: Optional[str] = None
+        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fetched_at = 0.0
+        # Sharded layout: body of every object as last seen on S3, and the
+        # ETag and decoded content (None until needed) of each of them.
+        self._uploaded: Dict[str, Union[str, bytes]] = {}
+        self._objects: Dict[str, List] = {}
+        # Sharded layout: documents as last read or written and the encoded
+        # shards of every table, only the shards of changed documents are
+        # encoded again by a write.
+        self._tracker = ChangeTracker(self.serializer.dumpb)
+        self._shards: Dict[str, Dict[str, Union[str, bytes]]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self.write_behind = config.write_behind
+        self.flush_interval = config.flush_interval
+        self.flush_every = config.flush_every
+        self.flushes = 0
+        self.coalesced_writes = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+        # Serialized objects waiting for the background upload, and the
+        # number of writes they stand for.
+        self._pending: Optional[Dict[str, Union[str, bytes]]] = None
+        self._pending_writes = 0
+        self._in_flight = False
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        _storages.add(self)
+        if self.write_behind:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name=f"S3Storage-{id(self)}", daemon=True
+            )
+            self._flusher.start()
+            atexit.register(self.close)
 
+    @instrumented
     def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
         """
         Read data from Amazon S3 storage.
 
+        The object is only downloaded when its ETag differs from the cached
+        one, S3 answers ``304 Not Modified`` otherwise.
+
         :return: Dictionary data from S3 storage.
         :rtype: Optional[Dict[str, Dict[str, Any]]]
         """
+        with self._condition:
+            if self._pending is not None or self._in_flight:
+                # S3 does not have the newest data yet.
+                return self._cached()
+
+        now = time.monotonic()
+        if (
+            self._cache is not None
+            and self.max_staleness is not None
+            and now - self._fetched_at < self.max_staleness
+        ):
+            return self._cached()
+
+        if self.layout == SHARDED_LAYOUT:
+            return self._read_sharded(now)
+
+        params = {}
+        if self._cache is not None and self._etag is not None:
+            params["IfNoneMatch"] = self._etag
+
         try:
-            cl = self.client.Object(self.bucket, self.file_path).get()
-            obj = cl["Body"].read()
-            if isinstance(obj, bytes):
-                return json.loads(obj.decode("utf-8"))
+            if self.streaming:
+                cl, obj = self._download_stream(params)
+            else:
+                with instrumentation.span(NETWORK, self) as span:
+                    cl = self.client.Object(self.bucket, self.file_path).get(**params)
+                    obj = cl["Body"].read()
+                    span.size = len(obj)
+                if isinstance(obj, bytes):
+                    obj = self.serializer.loads(decompress(obj))
 
-            return obj
+            self._store_cache(obj, cl.get("ETag"), now)
+            return self._cached()
         except ClientError as e:
+            if e.response["Error"]["Code"] in NOT_MODIFIED:
+                self._fetched_at = now
+                return self._cached()
+
+            self._store_cache(None, None, now)
             if e.response["Error"]["Code"] == "404":
                 return dict()
 
         return dict()
 
+    @instrumented
     def write(self, data: Dict[str, Any]):
         """
         Write all data to Amazon S3 storage.
 
+        In write-behind mode the data is buffered for the background upload,
+        or uploaded right away once the storage is closed.
+
         :param data: Dictionary data to store in S3.
         :type data: Dict[str, Any]
 
         :return: None
         :rtype: None
         """
-        self.client.Object(self.bucket, self.file_path).put(Body=json.dumps(data))
+        objects = None if self.streaming else self._encode(data)
+        if self.write_behind:
+            with self._condition:
+                # Once closed nothing uploads the buffer, the write is synchronous.
+                if not self._closed:
+                    self._pending = objects
+                    self._pending_writes += 1
+                    self._store_cache(copy_data(data), None, time.monotonic())
+                    if self.flush_every and self._pending_writes >= self.flush_every:
+                        self._flush_requested = True
+                        self._condition.notify()
+                    return None
+
+        try:
+            if self.streaming:
+                etag = self._upload_stream(data)
+            else:
+                etag = self._upload(objects)
+        except Exception:
+            self._store_cache(None, None, 0.0)
+            raise
+
+        self._store_cache(copy_data(data), etag, time.monotonic())
+
+    def iter_documents(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate the documents of a table without reading the whole database.
+
+        The single object is parsed while it downloads, unless the cached
+        data is still current. In the sharded layout the shards of the table
+        are fetched in order, ``max_concurrency`` of them ahead. A serializer
+        that cannot be parsed incrementally reads the whole object.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: Unused, the object is read in chunks of `CHUNK_SIZE` bytes.
+        :type batch_size: int
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+
+        .. versionadded:: 2.1.0
+        """
+        with self._condition:
+            buffered = self._pending is not None or self._in_flight
+        if buffered:
+            # S3 does not have the newest data yet.
+            yield from copy_data(self._cache.get(name, {})).items()
+            return
+
+        if self.layout == SHARDED_LAYOUT:
+            yield from self._iter_shards(name)
+            return
+
+        params = {}
+        if self._cache is not None and self._etag is not None:
+            params["IfNoneMatch"] = self._etag
+
+        try:
+            with instrumentation.span(NETWORK, self):
+                cl = self.client.meta.client.get_object(
+                    Bucket=self.bucket, Key=self.file_path, **params
+                )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in NOT_MODIFIED:
+                yield from copy_data(self._cache.get(name, {})).items()
+                return
+            if e.response["Error"]["Code"] in NOT_FOUND:
+                return
+            raise
+
+        encoding = stream_encoding(self.serializer)
+        if encoding is None:
+            data = self.serializer.loads(decompress(cl["Body"].read()))
+            yield from data.get(name, {}).items()
+            return
+
+        yield from iter_table_json(
+            iter_decompress(iter_chunks(cl["Body"])), name, encoding
+        )
+
+    def flush(self):
+        """
+        Upload the newest buffered snapshot in write-behind mode.
+
+        :return: None
+        :rtype: None
+        """
+        with self._flush_lock:
+            with self._condition:
+                objects, writes = self._pending, self._pending_writes
+                if objects is None:
+                    return None
+
+                self._pending, self._pending_writes = None, 0
+                self._in_flight = True
+
+            start = time.perf_counter()
+            try:
+                etag = self._upload(objects)
+            except Exception:
+                with self._condition:
+                    if self._pending is None:
+                        # Nothing newer was written, keep it for the next flush.
+                        self._pending = objects
+                    self._pending_writes += writes
+                    self._in_flight = False
+                raise
+
+            latency = time.perf_counter() - start
+            with self._condition:
+                self._in_flight = False
+                self.flushes += 1
+                self.coalesced_writes += writes - 1
+                self.last_flush_latency = latency
+                self.total_flush_latency += latency
+                if self._pending is None:
+                    self._etag = etag
+                    self._fetched_at = time.monotonic()
+
+        return None
+
+    def close(self):
+        """
+        Upload the buffered snapshot and stop the background threads.
+
+        :return: None
+        :rtype: None
+        """
+        if self._closed:
+            return None
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        if self.write_behind:
+            # The registration keeps the storage alive until the interpreter exits.
+            atexit.unregister(self.close)
+            self._flusher.join()
+            self.flush()
+
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return None
+
+    def _flush_loop(self):
+        """
+        Upload the buffered snapshot periodically until the storage is closed.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._flush_requested,
+                    timeout=self.flush_interval,
+                )
+                if self._closed:
+                    return
+
+                self._flush_requested = False
+
+            try:
+                self.flush()
+            except Exception:
+                # The snapshot is kept and uploaded again on the next tick.
+                pass
+
+    def _encode(self, data: Dict[str, Any]) -> Dict[str, Union[str, bytes]]:
+        """
+        Serialize data into the objects of the configured layout.
+
+        :param data: Dictionary data to store in S3.
+        :type data: Dict[str, Any]
+
+        :return: The body of every object by key.
+        :rtype: Dict[str, Union[str, bytes]]
+        """
+        if self.layout == SINGLE_LAYOUT:
+            return {self.file_path: self._compress(self.serializer.dumps(data))}
+
+        if not self._tracker.synced:
+            # Nothing was read yet, every shard is encoded.
+            self._tracker.track({})
+            self._shards = {}
+
+        delta = self._tracker.diff(data)
+        shards = {name: self._shards.get(name, {}) for name in data}
+        for name, changes in delta.tables.items():
+            if changes.created:
+                dirty = None
+            else:
+                dirty = {
+                    self._shard_id(doc_id)
+                    for doc_id in [*changes.changed, *changes.deleted]
+                }
+
+            docs = {shard: {} for shard in dirty or ()}
+            for doc_id, doc in data[name].items():
+                shard = self._shard_id(doc_id)
+                if dirty is None or shard in dirty:
+                    docs.setdefault(shard, {})[str(doc_id)] = doc
+
+            table = dict(shards[name])
+            for shard, shard_docs in docs.items():
+                if shard_docs:
+                    table[shard] = self._compress(self.serializer.dumpb(shard_docs))
+                else:
+                    table.pop(shard, None)
+            shards[name] = table
+
+        self._tracker.commit(delta)
+        self._shards = shards
+
+        objects = {
+            self._shard_key(name, shard): body
+            for name, table in shards.items()
+            for shard, body in table.items()
+        }
+        objects[self._manifest_key] = self._compress(
+            self.serializer.dumpb(
+                {
+                    "tables": {
+                        name: sorted(table, key=int) for name, table in shards.items()
+                    }
+                }
+            )
+        )
+        return objects
+
+    def _upload(self, objects: Dict[str, Union[str, bytes]]) -> Optional[str]:
+        """
+        Upload serialized objects.
+
+        The single object is always uploaded. In the sharded layout only the
+        shards that changed are uploaded, the manifest is uploaded once they
+        are all stored and the shards that disappeared are deleted last, so
+        readers never see a manifest referencing a missing shard.
+
+        :param objects: The body of every object by key.
+        :type objects: Dict[str, Union[str, bytes]]
+
+        :return: The ETag of the single object.
+        :rtype: Optional[str]
+        """
+        if self.layout == SINGLE_LAYOUT:
+            body = objects[self.file_path]
+            with instrumentation.span(NETWORK, self) as span:
+                resp = self.client.Object(self.bucket, self.file_path).put(Body=body)
+                span.size = len(body)
+            return resp.get("ETag")
+
+        try:
+            changed = [
+                (key, body)
+                for key, body in objects.items()
+                if key != self._manifest_key and self._uploaded.get(key) != body
+            ]
+            list(self._executor().map(lambda item: self._put(*item), changed))
+
+            manifest = objects[self._manifest_key]
+            if self._uploaded.get(self._manifest_key) != manifest:
+                self._put(self._manifest_key, manifest)
+
+            removed = [key for key in self._uploaded if key not in objects]
+            for start in range(0, len(removed), 1000):
+                keys = removed[start : start + 1000]
+                self.client.meta.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in keys]},
+                )
+                for key in keys:
+                    self._uploaded.pop(key, None)
+                    self._objects.pop(key, None)
+        except Exception:
+            # TinyDB may have modified the cached documents in place.
+            for entry in self._objects.values():
+                entry[1] = None
+            raise
+
+        return None
+
+    def _download_stream(
+        self, params: Dict[str, str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Download the single object and parse it while it arrives.
+
+        :param params: The extra arguments of the request, e.g. ``IfNoneMatch``.
+        :type params: Dict[str, str]
+
+        :return: The response and the decoded data.
+        :rtype: Tuple[Dict[str, Any], Dict[str, Any]]
+        """
+        encoding = stream_encoding(self.serializer)
+        with instrumentation.span(NETWORK, self) as span:
+            cl = self.client.meta.client.get_object(
+                Bucket=self.bucket, Key=self.file_path, **params
+            )
+            size = 0
+
+            def chunks():
+                nonlocal size
+                for chunk in iter_chunks(cl["Body"]):
+                    size += len(chunk)
+                    yield chunk
+
+            data = load_json(iter_decompress(chunks()), encoding)
+            span.size = size
+
+        return cl, data
+
+    def _upload_stream(self, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Serialize and upload the single object in parts.
+
+        Parts are uploaded while the next ones are serialized, at most
+        ``max_concurrency`` parts are held in memory. A database smaller
+        than one part is uploaded with a single request.
+
+        :param data: Dictionary data to store in S3.
+        :type data: Dict[str, Any]
+
+        :return: The ETag of the object.
+        :rtype: Optional[str]
+        """
+        stream = compressor(self.codec, self.compression_level)
+        client = self.client.meta.client
+        upload_id = None
+        parts: List[Dict[str, Any]] = []
+        in_flight = set()
+        buffer = bytearray()
+
+        def upload_part():
+            nonlocal upload_id
+            if upload_id is None:
+                upload_id = client.create_multipart_upload(
+                    Bucket=self.bucket, Key=self.file_path
+                )["UploadId"]
+
+            if len(in_flight) >= self.max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    parts.append(future.result())
+
+            in_flight.add(
+                self._executor().submit(
+                    self._put_part,
+                    upload_id,
+                    len(parts) + len(in_flight) + 1,
+                    bytes(buffer),
+                )
+            )
+            buffer.clear()
+
+        try:
+            batch = []
+            batch_size = 0
+            for piece in dump_json(data, self.serializer.dumpb):
+                batch.append(piece)
+                batch_size += len(piece)
+                if batch_size >= STREAM_BATCH_SIZE:
+                    buffer += stream.compress(b"".join(batch))
+                    batch, batch_size = [], 0
+                    if len(buffer) >= self.part_size:
+                        upload_part()
+            buffer += stream.compress(b"".join(batch))
+            buffer += stream.flush()
+
+            if upload_id is None:
+                with instrumentation.span(NETWORK, self) as span:
+                    resp = client.put_object(
+                        Bucket=self.bucket, Key=self.file_path, Body=bytes(buffer)
+                    )
+                    span.size = len(buffer)
+                return resp.get("ETag")
+
+            if buffer:
+                upload_part()
+            for future in in_flight:
+                parts.append(future.result())
+            in_flight.clear()
+
+            parts.sort(key=lambda part: part["PartNumber"])
+            resp = client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.file_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            return resp.get("ETag")
+        except BaseException:
+            if upload_id is not None:
+                wait(in_flight)
+                client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.file_path, UploadId=upload_id
+                )
+            raise
+
+    def _put_part(self, upload_id: str, number: int, body: bytes) -> Dict[str, Any]:
+        """
+        Upload one part of a multipart upload.
+
+        :param upload_id: The ID of the multipart upload.
+        :type upload_id: str
+        :param number: The part number, from 1.
+        :type number: int
+        :param body: The content of the part.
+        :type body: bytes
+
+        :return: The part, as expected by ``complete_multipart_upload``.
+        :rtype: Dict[str, Any]
+        """
+        with instrumentation.span(NETWORK, self) as span:
+            resp = self.client.meta.client.upload_part(
+                Bucket=self.bucket,
+                Key=self.file_path,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+            span.size = len(body)
+        return {"ETag": resp["ETag"], "PartNumber": number}
+
+    def _put(self, key: str, body: bytes):
+        """
+        Upload one object of the sharded layout.
+
+        The low level client is used as it is safe to share between threads,
+        unlike the resource.
+
+        :param key: The object key.
+        :type key: str
+        :param body: The serialized object.
+        :type body: bytes
+        """
+        with instrumentation.span(NETWORK, self) as span:
+            resp = self.client.meta.client.put_object(
+                Bucket=self.bucket, Key=key, Body=body
+            )
+            span.size = len(body)
+        self._uploaded[key] = body
+        self._objects[key] = [resp.get("ETag"), None]
+
+    def _fetch(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Download and decode one object of the sharded layout if it changed.
+
+        :param key: The object key.
+        :type key: str
+
+        :return: The decoded object, or None if it does not exist.
+        :rtype: Optional[Dict[str, Any]]
+        """
+        entry = self._objects.get(key)
+        params = {}
+        if entry is not None and entry[0] is not None:
+            params["IfNoneMatch"] = entry[0]
+
+        try:
+            with instrumentation.span(NETWORK, self) as span:
+                cl = self.client.meta.client.get_object(
+                    Bucket=self.bucket, Key=key, **params
+                )
+                body = cl["Body"].read()
+                span.size = len(body)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in NOT_MODIFIED:
+                if entry[1] is None:
+                    entry[1] = self.serializer.loads(decompress(self._uploaded[key]))
+                return entry[1]
+
+            if e.response["Error"]["Code"] in NOT_FOUND:
+                self._uploaded.pop(key, None)
+                self._objects.pop(key, None)
+                return None
+
+            raise
+
+        decoded = self.serializer.loads(decompress(body))
+        self._uploaded[key] = body
+        self._objects[key] = [cl.get("ETag"), decoded]
+        return decoded
+
+    def _iter_shards(self, name: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Fetch the shards of a table in order, without caching them.
+
+        :param name: The table name.
+        :type name: str
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+        """
+        manifest = self._fetch(self._manifest_key)
+        if manifest is None:
+            return
+
+        fetching = deque()
+        for shard in manifest["tables"].get(name, ()):
+            key = self._shard_key(name, shard)
+            fetching.append(self._executor().submit(self._get_shard, key))
+            if len(fetching) >= self.max_concurrency:
+                yield from fetching.popleft().result().items()
+
+        while fetching:
+            yield from fetching.popleft().result().items()
+
+    def _get_shard(self, key: str) -> Dict[str, Any]:
+        """
+        Download and decode one shard, empty when it was deleted meanwhile.
+
+        :param key: The object key.
+        :type key: str
+
+        :return: The documents of the shard.
+        :rtype: Dict[str, Any]
+        """
+        try:
+            with instrumentation.span(NETWORK, self) as span:
+                cl = self.client.meta.client.get_object(Bucket=self.bucket, Key=key)
+                body = cl["Body"].read()
+                span.size = len(body)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in NOT_FOUND:
+                return {}
+            raise
+
+        return self.serializer.loads(decompress(body))
+
+    def _read_sharded(self, now: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the manifest then every shard in parallel.
+
+        :param now: The monotonic time of the read.
+        :type now: float
+
+        :return: Dictionary data from S3 storage.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        manifest = self._fetch(self._manifest_key)
+        if manifest is None:
+            self._store_cache(None, None, now)
+            return dict()
+
+        tables = manifest["tables"]
+        keys = [
+            self._shard_key(name, shard)
+            for name, shards in tables.items()
+            for shard in shards
+        ]
+        shards = iter(self._executor().map(self._fetch, keys))
+
+        data, encoded = {}, {}
+        for name, table_shards in tables.items():
+            data[name], encoded[name] = {}, {}
+            for shard in table_shards:
+                docs = next(shards)
+                if docs is not None:
+                    data[name].update(docs)
+                    encoded[name][shard] = self._uploaded[self._shard_key(name, shard)]
+
+        if not self._tracker.synced or encoded != self._shards:
+            # Another writer changed some shards, the next write is diffed
+            # against what was read.
+            self._tracker.track(data)
+        self._shards = encoded
+
+        self._store_cache(data, None, now)
+        return self._cached()
+
+    def _compress(self, payload: Union[str, bytes]):
+        return compress(payload, self.codec, self.compression_level)
+
+    @property
+    def _manifest_key(self) -> str:
+        return f"{self.key_prefix}/manifest.json"
+
+    def _shard_key(self, name: str, shard: str) -> str:
+        return f"{self.key_prefix}/{quote(name, safe='')}/{shard}.json"
+
+    def _shard_id(self, doc_id) -> str:
+        if self.shard_size is None:
+            return "0"
+
+        return str(int(doc_id) // self.shard_size)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="S3Storage"
+            )
+
+        return self._pool
+
+    def _after_fork(self):
+        """
+        Replace the resource and thread pool inherited from the parent process.
+
+        The connections of the resource are the parent's and the threads of
+        the pool do not exist in the child.
+        """
+        self.client = get_resource(*self._credentials)
+        self._pool = None
+
+    def _store_cache(
+        self, data: Optional[Dict[str, Any]], etag: Optional[str], fetched_at: float
+    ):
+        """
+        Remember the decoded data of the object version identified by ``etag``.
+
+        :param data: The decoded data, or None to drop the cache.
+        :type data: Optional[Dict[str, Any]]
+        :param etag: The ETag of the object.
+        :type etag: Optional[str]
+        :param fetched_at: The monotonic time at which S3 returned the data.
+        :type fetched_at: float
+        """
+        self._cache = data
+        self._etag = etag
+        self._fetched_at = fetched_at
+
+    def _cached(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return a copy of the cached data.
+
+        TinyDB adds, removes and changes documents in place on the data it
+        reads, the copies keep those changes out of the cache until they are
+        written, and out of it for good when the write never comes.
+
+        :return: Dictionary data from the cache.
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+        return copy_data(self._cache)
+
+
+def _after_fork():
+    for storage in list(_storages):
+        storage._after_fork()
+
+
+# Registered after the registry, which forgets its resources first.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
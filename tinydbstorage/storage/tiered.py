@@ -0,0 +1,273 @@
+import atexit
+import threading
+from typing import Optional, Dict, Any, List
+
+from tinydb.storages import Storage
+
+from tinydbstorage.instrument import instrumented
+from tinydbstorage.tracker import copy_data
+
+WRITE_THROUGH = "write_through"
+WRITE_BEHIND = "write_behind"
+POLICIES = (WRITE_THROUGH, WRITE_BEHIND)
+
+
+class TieredStorage(Storage):
+    """
+    Represents a stack of storages, from the fastest to the most durable.
+
+    Reads are served by the first tier holding data, which is then copied to
+    the tiers above it. Once a tier got data, from a read or a write, reads
+    do not go below it anymore. Writes go to the first tier, then to every
+    tier below it according to its policy:
+
+    - ``"write_through"``: the tier is written before `write` returns.
+    - ``"write_behind"``: the newest data is written by a background thread
+      every ``flush_interval`` seconds, after ``flush_every`` writes, on
+      `flush` and on `close` (which also runs at interpreter exit).
+
+    Example usage:
+
+    >>> db = TinyDB(
+    ...     storage=TieredStorage,
+    ...     tiers=[MemoryStorage(), S3Storage(config=s3_config)],
+    ...     policies=["write_behind"],
+    ... )
+
+    :param tiers: The storages, from the fastest to the most durable.
+    :type tiers: List[Storage]
+    :param policies: The write policy of each tier below the first. Default is write-through for all.
+    :type policies: Optional[List[str]]
+    :param flush_interval: Seconds between two background writes. Default is 1.0.
+    :type flush_interval: float
+    :param flush_every: Number of writes that triggers a background write, None to only flush on time.
+    :type flush_every: Optional[int]
+    :param flushes: The number of background writes done, all tiers included.
+    :type flushes: int
+    :param coalesced_writes: The number of writes a write-behind tier never got because a newer one replaced them.
+    :type coalesced_writes: int
+
+    .. warning::
+       A write-behind tier lags behind the first tier, writes that were not
+       flushed are lost if the process crashes.
+
+    .. versionadded:: 2.1.0
+       Added the `TieredStorage` class.
+    """
+
+    def __init__(
+        self,
+        tiers: List[Storage],
+        policies: Optional[List[str]] = None,
+        flush_interval: float = 1.0,
+        flush_every: Optional[int] = None,
+    ):
+        """
+        Initialize a TieredStorage instance.
+
+        :param tiers: The storages, from the fastest to the most durable.
+        :type tiers: List[Storage]
+        :param policies: The write policy of each tier below the first.
+        :type policies: Optional[List[str]]
+        :param flush_interval: Seconds between two background writes.
+        :type flush_interval: float
+        :param flush_every: Number of writes that triggers a background write.
+        :type flush_every: Optional[int]
+
+        :raises ValueError: When there is no tier, or the policies do not match the tiers.
+        """
+        super(TieredStorage, self).__init__()
+        if not tiers:
+            raise ValueError("TieredStorage needs at least one tier")
+
+        if policies is None:
+            policies = [WRITE_THROUGH] * (len(tiers) - 1)
+        if len(policies) != len(tiers) - 1:
+            raise ValueError("One policy is expected for each tier below the first")
+        for policy in policies:
+            if policy not in POLICIES:
+                raise ValueError(
+                    f"Unknown policy: {policy!r}, expected one of {POLICIES}"
+                )
+
+        self.tiers = list(tiers)
+        # The first tier is always written synchronously.
+        self.policies = [WRITE_THROUGH, *policies]
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.flushes = 0
+        self.coalesced_writes = 0
+        # Whether each tier holds the newest data, or at least had it queued.
+        self._filled = [False] * len(self.tiers)
+        # Data waiting for each write-behind tier, and the number of writes
+        # it stands for.
+        self._pending: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._pending_writes: Dict[int, int] = {}
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+
+        self.write_behind = WRITE_BEHIND in self.policies
+        if self.write_behind:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name=f"TieredStorage-{id(self)}", daemon=True
+            )
+            self._flusher.start()
+            atexit.register(self.close)
+
+    @instrumented
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read data from the fastest tier holding it, copying it to the tiers above.
+
+        :return: Dictionary data from the first tier holding data, or None.
+        :rtype: Optional[Dict[str, Dict[str, Any]]]
+        """
+        for index, tier in enumerate(self.tiers):
+            data = tier.read()
+            if self._filled[index]:
+                return data
+
+            if data:
+                if index:
+                    # Data read from the lower tier is written to the faster ones.
+                    copy = _materialize(data)
+                    for upper in range(index):
+                        self.tiers[upper].write(copy)
+                for upper in range(index + 1):
+                    self._filled[upper] = True
+                return data
+
+        return None
+
+    @instrumented
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        """
+        Write data to the first tier, then to the others according to their policy.
+
+        :param data: Dictionary data to store.
+        :type data: Dict[str, Dict[str, Any]]
+
+        :return: None
+        :rtype: None
+        """
+        self.tiers[0].write(data)
+        self._filled[0] = True
+
+        copy = None
+        for index in range(1, len(self.tiers)):
+            self._filled[index] = True
+            if self.policies[index] == WRITE_BEHIND:
+                if copy is None:
+                    copy = _materialize(data)
+                with self._condition:
+                    # Copied, the caller may change ``data`` before the flush.
+                    self._pending[index] = copy_data(copy)
+                    self._pending_writes[index] = self._pending_writes.get(index, 0) + 1
+                    if (
+                        self.flush_every
+                        and self._pending_writes[index] >= self.flush_every
+                    ):
+                        self._flush_requested = True
+                        self._condition.notify()
+                continue
+
+            if copy is None:
+                copy = _materialize(data)
+            self.tiers[index].write(copy)
+
+        return None
+
+    def flush(self):
+        """
+        Write the newest data to every write-behind tier.
+
+        :return: None
+        :rtype: None
+        """
+        with self._flush_lock:
+            with self._condition:
+                pending, writes = self._pending, self._pending_writes
+                self._pending, self._pending_writes = {}, {}
+
+            for index in sorted(pending):
+                try:
+                    self.tiers[index].write(pending[index])
+                except Exception:
+                    with self._condition:
+                        for failed in pending:
+                            if failed < index:
+                                continue
+                            # Kept for the next flush unless something newer was written.
+                            self._pending.setdefault(failed, pending[failed])
+                            self._pending_writes[failed] = self._pending_writes.get(
+                                failed, 0
+                            ) + writes.get(failed, 0)
+                    raise
+
+                with self._condition:
+                    self.flushes += 1
+                    self.coalesced_writes += writes[index] - 1
+
+        return None
+
+    def close(self):
+        """
+        Flush the write-behind tiers and close every tier.
+
+        :return: None
+        :rtype: None
+        """
+        if self._closed:
+            return None
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        if self.write_behind:
+            self._flusher.join()
+            atexit.unregister(self.close)
+            self.flush()
+
+        for tier in self.tiers:
+            tier.close()
+        return None
+
+    def _flush_loop(self):
+        """
+        Write the pending data periodically until the storage is closed.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._flush_requested,
+                    timeout=self.flush_interval,
+                )
+                if self._closed:
+                    return
+
+                self._flush_requested = False
+
+            try:
+                self.flush()
+            except Exception:
+                # The data is kept and written again on the next tick.
+                pass
+
+
+def _materialize(data: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Turn the tables returned by any storage, e.g. lazy views, into dictionaries.
+
+    :param data: Dictionary data read from a storage.
+    :type data: Dict[str, Dict[str, Any]]
+
+    :return: The data with every table as a dictionary.
+    :rtype: Dict[str, Dict[str, Any]]
+    """
+    return {
+        name: table if isinstance(table, dict) else dict(table.items())
+        for name, table in data.items()
+    }
@@ -0,0 +1,383 @@
+import codecs
+import itertools
+import json
+import re
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+# The serializers writing JSON, which can be streamed.
+JSON_SERIALIZERS = ("json", "orjson")
+CHUNK_SIZE = 1024 * 1024
+BATCH_SIZE = 1000
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DOC_ID = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+_DECODER = json.JSONDecoder()
+
+
+def stream_encoding(serializer) -> Optional[str]:
+    """
+    Return the text encoding of a serializer writing JSON.
+
+    :param serializer: The serializer of a storage.
+    :type serializer: tinydbstorage.serializer.Serializer
+
+    :return: The encoding, or None when its output cannot be parsed incrementally.
+    :rtype: Optional[str]
+
+    .. versionadded:: 2.1.0
+    """
+    if serializer.name not in JSON_SERIALIZERS:
+        return None
+
+    return getattr(serializer, "encoding", "utf-8")
+
+
+def iter_chunks(body, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Read a file-like object, e.g. a botocore ``StreamingBody``, chunk by chunk.
+
+    :param body: The object to read, with a ``read(size)`` method.
+    :param chunk_size: The number of bytes read at once.
+    :type chunk_size: int
+
+    :return: The chunks.
+    :rtype: Iterator[bytes]
+
+    .. versionadded:: 2.1.0
+    """
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def dump_json(
+    data: Dict[str, Dict[str, Any]], dumpb: Callable[[Any], bytes]
+) -> Iterator[bytes]:
+    """
+    Serialize a database as JSON one document at a time.
+
+    The output is the one of `json.dumps` with its default separators, only
+    a single document is serialized in memory at once.
+
+    :param data: Dictionary data to serialize.
+    :type data: Dict[str, Dict[str, Any]]
+    :param dumpb: Serializes one value to JSON bytes, e.g. the `dumpb` method of a serializer.
+    :type dumpb: Callable[[Any], bytes]
+
+    :return: The pieces of the serialized data.
+    :rtype: Iterator[bytes]
+
+    .. versionadded:: 2.1.0
+    """
+    yield b"{"
+    for n, (name, table) in enumerate(data.items()):
+        yield (b", " if n else b"") + dumpb(str(name)) + b": {"
+        for m, (doc_id, doc) in enumerate(table.items()):
+            yield (b", " if m else b"") + dumpb(str(doc_id)) + b": " + dumpb(doc)
+        yield b"}"
+    yield b"}"
+
+
+def iter_json(
+    chunks: Iterable[bytes], encoding: str = "utf-8"
+) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """
+    Parse a JSON database incrementally, one document at a time.
+
+    Every table yields ``(name, None, None)`` before its documents, so empty
+    tables are reported too. Only the document being parsed and the
+    unparsed end of the last chunk are kept in memory.
+
+    Example usage:
+
+    >>> for name, doc_id, doc in iter_json([b'{"users": {"1": {"name": "John"}}}']):
+    ...     print(name, doc_id, doc)
+    users None None
+    users 1 {'name': 'John'}
+
+    :param chunks: The chunks of the serialized data.
+    :type chunks: Iterable[bytes]
+    :param encoding: The text encoding of the data.
+    :type encoding: str
+
+    :return: The tables and documents, as ``(name, doc_id, doc)``.
+    :rtype: Iterator[Tuple[str, Optional[str], Any]]
+
+    :raises ValueError: When the data is not a JSON object of JSON objects.
+
+    .. versionadded:: 2.1.0
+    """
+    reader = _Reader(chunks, encoding)
+    if reader.peek() == "":
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        reader.expect("")
+        return
+
+    while True:
+        name = reader.key()
+        reader.expect("{")
+        yield name, None, None
+
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            yield from reader.documents(name)
+
+        if reader.separator("}"):
+            break
+
+    reader.expect("")
+
+
+def load_json(chunks: Iterable[bytes], encoding: str = "utf-8") -> Dict[str, Any]:
+    """
+    Parse a JSON database incrementally, see `iter_json`.
+
+    :param chunks: The chunks of the serialized data.
+    :type chunks: Iterable[bytes]
+    :param encoding: The text encoding of the data.
+    :type encoding: str
+
+    :return: Dictionary data, empty when there are no chunks.
+    :rtype: Dict[str, Any]
+
+    :raises ValueError: When the data is not a JSON object of JSON objects.
+
+    .. versionadded:: 2.1.0
+    """
+    data = {}
+    for name, doc_id, doc in iter_json(chunks, encoding):
+        if doc_id is None:
+            table = data[name] = {}
+        else:
+            table[doc_id] = doc
+
+    return data
+
+
+def iter_table_json(
+    chunks: Iterable[bytes], name: str, encoding: str = "utf-8"
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Parse the documents of one table of a JSON database incrementally.
+
+    The tables before it are parsed without being kept, the ones after it
+    are not parsed at all.
+
+    :param chunks: The chunks of the serialized data.
+    :type chunks: Iterable[bytes]
+    :param name: The table name.
+    :type name: str
+    :param encoding: The text encoding of the data.
+    :type encoding: str
+
+    :return: The documents of the table, as ``(doc_id, doc)``.
+    :rtype: Iterator[Tuple[str, Any]]
+
+    :raises ValueError: When the data is not a JSON object of JSON objects.
+
+    .. versionadded:: 2.1.0
+    """
+    found = False
+    for table, doc_id, doc in iter_json(chunks, encoding):
+        if table != name:
+            if found:
+                return
+            continue
+
+        found = True
+        if doc_id is not None:
+            yield doc_id, doc
+
+
+class TableStream:
+    """
+    Iterate the documents of a table without reading the whole database.
+
+    Storages implement `iter_documents`, `iter_table` groups its documents
+    in batches. Unlike ``read``, neither keeps the other tables or the
+    documents already yielded in memory, so tables larger than the memory
+    can be exported.
+
+    Example usage:
+
+    >>> for batch in db.storage.iter_table("users", batch_size=500):
+    ...     export(batch)
+
+    .. versionadded:: 2.1.0
+    """
+
+    def iter_documents(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate the documents of a table as stored, an unknown table has none.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: The number of documents requested at once, when the backend pages its reads.
+        :type batch_size: int
+
+        :return: The documents, as ``(doc_id, doc)``.
+        :rtype: Iterator[Tuple[str, Any]]
+        """
+        raise NotImplementedError
+
+    def iter_table(
+        self, name: str, batch_size: int = BATCH_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate the documents of a table in batches.
+
+        :param name: The table name.
+        :type name: str
+        :param batch_size: The maximum number of documents of a batch.
+        :type batch_size: int
+
+        :return: The batches, as dictionaries of documents by doc_id.
+        :rtype: Iterator[Dict[str, Any]]
+
+        :raises ValueError: When ``batch_size`` is lower than 1.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        return _batches(self.iter_documents(name, batch_size), batch_size)
+
+
+def _batches(
+    documents: Iterator[Tuple[str, Any]], batch_size: int
+) -> Iterator[Dict[str, Any]]:
+    while True:
+        batch = dict(itertools.islice(documents, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class _Reader:
+    """
+    Holds the unparsed text of a chunked JSON payload.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], encoding: str):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = 1) -> bool:
+        """
+        Append at least ``size`` characters to the buffer, fewer at the end
+        of the data. Return False when nothing was left.
+        """
+        if self.eof:
+            return False
+
+        texts, length = [], 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            texts.append(text)
+            length += len(text)
+            if length >= size:
+                break
+        else:
+            texts.append(self._decoder.decode(b"", final=True))
+            self.eof = True
+
+        # Drop the parsed text, the buffer stays around the size of a chunk.
+        self.buffer = "".join([self.buffer[self.pos :], *texts])
+        self.pos = 0
+        return any(texts)
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character, empty at the end of the data.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            expected = repr(char) if char else "end of data"
+            raise ValueError(f"Expecting {expected}, found {found!r}")
+        self.pos += len(char)
+
+    def separator(self, end: str) -> bool:
+        """
+        Consume a comma or ``end``, return whether it was ``end``.
+        """
+        found = self.peek()
+        if found not in (",", end):
+            raise ValueError(f"Expecting ',' or {end!r}, found {found!r}")
+        self.pos += 1
+        return found == end
+
+    def key(self) -> str:
+        key = self.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Expecting a string key, found {key!r}")
+        self.expect(":")
+        return key
+
+    def documents(self, name: str) -> Iterator[Tuple[str, str, Any]]:
+        """
+        Parse the documents of a table up to its closing brace.
+        """
+        while True:
+            # Fast path for a document complete in the buffer with a plain
+            # doc_id, the general one reads the next chunks.
+            buffer = self.buffer
+            match = _DOC_ID.match(buffer, self.pos)
+            if match is not None:
+                try:
+                    doc, end = _DECODER.raw_decode(buffer, match.end())
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    after = _SEPARATOR.match(buffer, end)
+                    if after is not None:
+                        self.pos = after.end()
+                        yield name, match.group(1), doc
+                        if after.group(1) == "}":
+                            return
+                        continue
+
+            doc_id = self.key()
+            yield name, doc_id, self.value()
+            if self.separator("}"):
+                return
+
+    def value(self) -> Any:
+        """
+        Parse the next value, reading chunks until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number at the end of the buffer may go on in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+
+            # Double the unparsed text before trying again, a large value
+            # is parsed a logarithmic number of times.
+            self.fill(len(self.buffer) - self.pos)
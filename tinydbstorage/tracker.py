@@ -0,0 +1,250 @@
+import copy
+import marshal
+import pickle
+from typing import Optional, Dict, Any, Callable, List, Mapping
+
+
+class TableDelta:
+    """
+    Represents the changes of one table between two versions of the database.
+
+    :param inserted: The documents that did not exist, by doc_id.
+    :type inserted: Dict[str, Any]
+    :param updated: The documents whose content changed, by doc_id.
+    :type updated: Dict[str, Any]
+    :param deleted: The doc_ids of the documents that disappeared.
+    :type deleted: List[str]
+    :param created: Whether the table itself did not exist.
+    :type created: bool
+
+    .. versionadded:: 2.1.0
+    """
+
+    __slots__ = ("inserted", "updated", "deleted", "created")
+
+    def __init__(self, created: bool = False):
+        self.inserted: Dict[str, Any] = {}
+        self.updated: Dict[str, Any] = {}
+        self.deleted: List[str] = []
+        self.created = created
+
+    @property
+    def changed(self) -> Dict[str, Any]:
+        """
+        The inserted and updated documents, by doc_id.
+
+        :return: The documents to store.
+        :rtype: Dict[str, Any]
+        """
+        return {**self.inserted, **self.updated}
+
+    def __bool__(self):
+        return bool(self.created or self.inserted or self.updated or self.deleted)
+
+    def __repr__(self):
+        return (
+            f"TableDelta(inserted={len(self.inserted)}, updated={len(self.updated)}, "
+            f"deleted={len(self.deleted)}, created={self.created})"
+        )
+
+
+class Delta:
+    """
+    Represents the changes between two versions of the database.
+
+    :param tables: The changes of every table that changed, by name.
+    :type tables: Dict[str, TableDelta]
+    :param dropped: The names of the tables that disappeared.
+    :type dropped: List[str]
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, TableDelta] = {}
+        self.dropped: List[str] = []
+        # The fingerprints of the new version, kept until it is committed.
+        self._fingerprints: Dict[str, Dict[str, int]] = {}
+
+    def __bool__(self):
+        return bool(self.tables or self.dropped)
+
+    def __repr__(self):
+        return f"Delta(tables={self.tables!r}, dropped={self.dropped!r})"
+
+
+class ChangeTracker:
+    """
+    Represents the last known state of a storage backend, to compute what a
+    write actually changes.
+
+    Every document is remembered by a fingerprint, a hash of its `marshal`
+    encoding, which is several times cheaper to compute than serializing
+    the document and keeps working whatever TinyDB or the caller modified
+    in place. A storage records the state it read with `track`, asks for
+    the `Delta` of the data it is given with `diff`, persists only that and
+    then calls `commit`.
+
+    Storages knowing a version of the backend, e.g. a counter bumped by
+    every write, pass it along: reading the version the tracker already
+    describes costs nothing.
+
+    Example usage:
+
+    >>> tracker = ChangeTracker()
+    >>> tracker.track({"users": {"1": {"name": "John"}}})
+    >>> delta = tracker.diff({"users": {"1": {"name": "Jane"}, "2": {"name": "Jack"}}})
+    >>> list(delta.tables["users"].updated), list(delta.tables["users"].inserted)
+    (['1'], ['2'])
+    >>> tracker.commit(delta)
+
+    :param encode: Encodes the documents `marshal` does not support, e.g. the
+        `dumpb` method of the storage serializer. Default is `pickle.dumps`.
+    :type encode: Optional[Callable[[Any], bytes]]
+    :param fingerprints: The fingerprint of every stored document, by table and doc_id.
+    :type fingerprints: Dict[str, Dict[str, int]]
+    :param version: The backend version the fingerprints describe, if known.
+    :type version: Any
+    :param synced: Whether the fingerprints describe the backend.
+    :type synced: bool
+
+    .. versionadded:: 2.1.0
+    """
+
+    def __init__(self, encode: Optional[Callable[[Any], bytes]] = None):
+        self.encode = encode or pickle.dumps
+        self.fingerprints: Dict[str, Dict[str, int]] = {}
+        self.version: Any = None
+        self.synced = False
+
+    def track(self, data: Optional[Mapping], version: Any = None):
+        """
+        Record the state read from the backend.
+
+        :param data: Dictionary data read from the backend.
+        :type data: Optional[Mapping]
+        :param version: The version of the backend, None if unknown.
+        :type version: Any
+
+        :return: None
+        :rtype: None
+        """
+        if self.synced and version is not None and version == self.version:
+            return None
+
+        self.fingerprints = {
+            name: {str(doc_id): self.fingerprint(doc) for doc_id, doc in table.items()}
+            for name, table in (data or {}).items()
+        }
+        self.version = version
+        self.synced = True
+        return None
+
+    def diff(self, data: Mapping) -> Delta:
+        """
+        Compute the changes between the tracked state and ``data``.
+
+        :param data: Dictionary data about to be written.
+        :type data: Mapping
+
+        :return: The changes, to be passed to `commit` once persisted.
+        :rtype: Delta
+        """
+        delta = Delta()
+        for name, table in data.items():
+            old = self.fingerprints.get(name)
+            changes = TableDelta(created=old is None)
+            old = old or {}
+            new = {}
+            for doc_id, doc in table.items():
+                doc_id = str(doc_id)
+                fingerprint = self.fingerprint(doc)
+                new[doc_id] = fingerprint
+
+                previous = old.get(doc_id)
+                if previous is None:
+                    changes.inserted[doc_id] = doc
+                elif previous != fingerprint:
+                    changes.updated[doc_id] = doc
+
+            # Every document of the old version is still there unless fewer
+            # of them were kept than it had.
+            if len(new) - len(changes.inserted) < len(old):
+                changes.deleted = [doc_id for doc_id in old if doc_id not in new]
+
+            if changes:
+                delta.tables[name] = changes
+            delta._fingerprints[name] = new
+
+        delta.dropped = [name for name in self.fingerprints if name not in data]
+        return delta
+
+    def commit(self, delta: Delta, version: Any = None):
+        """
+        Record that a delta was persisted.
+
+        :param delta: The delta returned by `diff`.
+        :type delta: Delta
+        :param version: The version of the backend after the write, None if unknown.
+        :type version: Any
+
+        :return: None
+        :rtype: None
+        """
+        self.fingerprints = delta._fingerprints
+        self.version = version
+        self.synced = True
+        return None
+
+    def reset(self):
+        """
+        Forget the tracked state, e.g. after another writer changed the backend.
+
+        :return: None
+        :rtype: None
+        """
+        self.fingerprints = {}
+        self.version = None
+        self.synced = False
+        return None
+
+    def fingerprint(self, doc: Any) -> int:
+        """
+        Return the fingerprint of a document.
+
+        :param doc: The document.
+        :type doc: Any
+
+        :return: A hash of the document content.
+        :rtype: int
+        """
+        try:
+            # Version 2 has no back-references, equal documents always have
+            # the same encoding.
+            return hash(marshal.dumps(doc, 2))
+        except ValueError:
+            return hash(self.encode(doc))
+
+
+def copy_data(data: Mapping) -> Dict[str, Any]:
+    """
+    Return a copy of dictionary data, or of a table, nested values included.
+
+    TinyDB changes the documents it reads in place, a storage keeping
+    decoded documents around hands out copies so that an update failing
+    halfway does not change them.
+
+    :param data: Dictionary data, or the documents of a table by doc_id.
+    :type data: Mapping
+
+    :return: The copy.
+    :rtype: Dict[str, Any]
+
+    .. versionadded:: 2.1.0
+    """
+    try:
+        # A marshal round trip copies plain documents several times faster
+        # than `copy.deepcopy`.
+        return marshal.loads(marshal.dumps(dict(data), 2))
+    except ValueError:
+        return copy.deepcopy(dict(data))